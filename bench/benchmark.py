@@ -0,0 +1,248 @@
+#-------------------------------------------------------------------------------
+# Name:        benchmark.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Times the main stages on synthetic data, so no QSTK data directory is needed.
+#
+#   python benchmark.py [label]               run every case, write ../out/bench/<label>.json
+#   python benchmark.py compare old new       compare two result files, e.g. from two commits
+#
+# Each case runs in its own process, so its peak memory is not hidden by an
+# earlier, bigger case.
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'hw'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+import synthetic
+import tradingcalendar
+
+OUT_PATH = '../out/bench/'
+REPEAT = 3
+
+# stage -> the cases run for it; each sweep changes one size at a time
+CASES = [('five_dollar_event', {'symbols': n, 'days': 504, 'density': 0.001}) for n in [100, 200, 400, 800]] + \
+        [('five_dollar_event', {'symbols': 400, 'days': n, 'density': 0.001}) for n in [252, 1008, 2016]] + \
+        [('transactions_from_eventmatrix', {'symbols': 400, 'days': 504, 'density': f})
+         for f in [0.0005, 0.002, 0.008, 0.032]] + \
+        [('portfolio_from_orders', {'symbols': 400, 'days': 504, 'orders': n}) for n in [1000, 10000, 100000]] + \
+        [('portfolios_from_orders', {'symbols': 400, 'days': 504, 'orders': 1000, 'sets': n}) for n in [10, 100]] + \
+        [('portfolio_statistics', {'days': n}) for n in [252, 2520, 25200]] + \
+        [('statistics_matrix', {'days': 504, 'portfolios': n}) for n in [100, 1000, 10000]] + \
+        [('find_best_portfolio', {'assets': n, 'days': 252, 'step': 0.05}) for n in [3, 4, 5, 6]]
+
+
+def trading_days(i_days):
+    calendar = tradingcalendar.get_calendar()
+    return calendar.days(dt.datetime(1995, 1, 1), dt.datetime(2012, 12, 31), tradingcalendar.CLOSE)[:i_days]
+
+
+def market(d_params):
+    """
+    :return: the trading days and a SyntheticData market over them
+    """
+    ldt_timestamps = trading_days(d_params['days'])
+    dataobj = synthetic.SyntheticData(ldt_timestamps, d_params['symbols'], d_params.get('density', 0.001))
+    return ldt_timestamps, dataobj
+
+
+def setup_five_dollar_event(d_params):
+    import eventprofiler
+    ldt_timestamps, dataobj = market(d_params)
+    ls_symbols = dataobj.get_all_symbols()
+    d_data = {'actual_close': dataobj.get_data(ldt_timestamps, ls_symbols, ['actual_close'])[0]}
+    return lambda: eventprofiler.five_dollar_event(ls_symbols, d_data, dataobj.s_benchmark)
+
+
+def setup_transactions_from_eventmatrix(d_params):
+    import eventprofiler
+    ldt_timestamps, dataobj = market(d_params)
+    ls_symbols = dataobj.get_all_symbols()
+    d_data = {'actual_close': dataobj.get_data(ldt_timestamps, ls_symbols, ['actual_close'])[0]}
+    df_events = eventprofiler.five_dollar_event(ls_symbols, d_data, dataobj.s_benchmark)
+    return lambda: eventprofiler.transactions_from_eventmatrix(df_events)
+
+
+def setup_portfolio_from_orders(d_params):
+    import datasession
+    import marketsim
+    ldt_timestamps, dataobj = market(d_params)
+    datasession.set_session(datasession.DataSession(dataobj))
+    orders_file = os.path.join(tempfile.mkdtemp(), 'orders.csv')
+    synthetic.write_orders(orders_file, ldt_timestamps, dataobj.ls_symbols, d_params['orders'])
+
+    def run():
+        # time the reads too, but not a session filled by an earlier repeat
+        datasession.get_session().clear()
+        return marketsim.portfolio_from_orders(orders_file, 1000000)
+    return run
+
+
+def setup_portfolios_from_orders(d_params):
+    import datasession
+    import marketsim
+    ldt_timestamps, dataobj = market(d_params)
+    datasession.set_session(datasession.DataSession(dataobj))
+    s_dir = tempfile.mkdtemp()
+    ls_files = []
+    for i in range(d_params['sets']):
+        ls_files.append(os.path.join(s_dir, 'orders%d.csv' % i))
+        synthetic.write_orders(ls_files[-1], ldt_timestamps, dataobj.ls_symbols, d_params['orders'], i_seed=i)
+
+    def run():
+        datasession.get_session().clear()
+        return marketsim.portfolios_from_orders(ls_files, 1000000)
+    return run
+
+
+def setup_portfolio_statistics(d_params):
+    import marketsim
+    rng = np.random.RandomState(0)
+    na_values = 1000000 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, d_params['days'])))
+    portfolio = pd.DataFrame(na_values, index=pd.bdate_range('1990-01-01', periods=d_params['days']),
+                             columns=['value'])
+    return lambda: marketsim.portfolio_statistics(portfolio)
+
+
+def setup_statistics_matrix(d_params):
+    import perfstats
+    rng = np.random.RandomState(0)
+    na_values = 1000000 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (d_params['days'], d_params['portfolios'])),
+                                           axis=0))
+    return lambda: perfstats.statistics(na_values)
+
+
+def setup_find_best_portfolio(d_params):
+    import datasession
+    import hw1
+    ldt_timestamps = trading_days(d_params['days'])
+    # no gaps, so every candidate gets a Sharpe ratio
+    dataobj = synthetic.SyntheticData(ldt_timestamps, d_params['assets'], 0.0, f_missing=0.0)
+    datasession.set_session(datasession.DataSession(dataobj))
+    start, end = ldt_timestamps[0], ldt_timestamps[-1]
+    equities = dataobj.ls_symbols
+
+    def run():
+        hw1.d_compositions.clear()
+        return hw1.find_best_portfolio(start, end, equities, d_params['step'])
+    return run
+
+
+def run_case(s_stage, d_params, result_file):
+    """
+    :return: nothing; the timings and memory of one case are written to result_file as json
+    """
+    fn_run = globals()['setup_' + s_stage](d_params)
+    i_rss_setup = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    lf_seconds = []
+    for i in range(REPEAT):
+        f_start = time.time()
+        fn_run()
+        lf_seconds.append(time.time() - f_start)
+    d_result = {'stage': s_stage,
+                'params': d_params,
+                'seconds': min(lf_seconds),
+                'seconds_all': lf_seconds,
+                'rss_setup_kb': i_rss_setup,
+                'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    with open(result_file, 'w') as f:
+        json.dump(d_result, f)
+
+
+def run_all(s_label):
+    """
+    :return: the path of the json file with the results of every case
+    """
+    if not os.path.exists(OUT_PATH):
+        os.makedirs(OUT_PATH)
+    result_file = os.path.join(tempfile.mkdtemp(), 'case.json')
+    ld_results = []
+    with open(os.devnull, 'w') as devnull:
+        for s_stage, d_params in CASES:
+            i_status = subprocess.call([sys.executable, os.path.abspath(__file__), 'case', s_stage,
+                                        json.dumps(d_params), result_file], stdout=devnull)
+            if i_status != 0:
+                print "%s %s failed with status %s" % (s_stage, d_params, i_status)
+                continue
+            with open(result_file) as f:
+                d_result = json.load(f)
+            print "%-30s %-55s %10.4f s %10d KB" % (s_stage, json.dumps(d_params, sort_keys=True),
+                                                    d_result['seconds'], d_result['peak_rss_kb'])
+            ld_results.append(d_result)
+
+    d_report = {'label': s_label,
+                'commit': git_commit(),
+                'date': dt.datetime.now().isoformat(),
+                'machine': platform.platform(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'results': ld_results}
+    filename = os.path.join(OUT_PATH, s_label + '.json')
+    with open(filename, 'w') as f:
+        json.dump(d_report, f, indent=1, sort_keys=True)
+    return filename
+
+
+def compare(old_file, new_file):
+    """
+    :return: nothing, just print the time and memory ratio new / old of every case in both files
+    """
+    with open(old_file) as f:
+        d_old = json.load(f)
+    with open(new_file) as f:
+        d_new = json.load(f)
+    d_before = dict(((d['stage'], json.dumps(d['params'], sort_keys=True)), d) for d in d_old['results'])
+    print "%s (%s) -> %s (%s)" % (d_old['label'], d_old['commit'], d_new['label'], d_new['commit'])
+    for d_result in d_new['results']:
+        key = (d_result['stage'], json.dumps(d_result['params'], sort_keys=True))
+        if key not in d_before:
+            continue
+        d_prev = d_before[key]
+        print "%-30s %-55s time x%6.2f  memory x%6.2f" % (key[0], key[1], d_result['seconds'] / d_prev['seconds'],
+                                                          float(d_result['peak_rss_kb']) / d_prev['peak_rss_kb'])
+
+
+def git_commit():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                           stderr=devnull).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == 'case':
+        run_case(args[1], json.loads(args[2]), args[3])
+    elif args and args[0] == 'compare':
+        compare(args[1], args[2])
+    else:
+        s_label = args[0] if args else (git_commit() or 'current')
+        print "Results written to %s" % run_all(s_label)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    main()
+    if sys.argv[1:2] != ['case']:
+        print "--------"
+        print "Program execution time: %s seconds" % (time.time() - start_time)
@@ -0,0 +1,93 @@
+#-------------------------------------------------------------------------------
+# Name:        synthetic.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+class SyntheticData:
+    """
+    A stand-in for QSTK's DataAccess that makes up a reproducible market instead
+    of reading the Yahoo data directory. Prices are random walks that stay above
+    $6, except on a chosen share of days where they dip just under $5, so the
+    density of five dollar events can be set directly.
+    """
+
+    def __init__(self, ldt_timestamps, i_symbols, f_event_density=0.001, f_missing=0.001, i_seed=0,
+                 s_benchmark='SPY'):
+        """
+        :param ldt_timestamps:  the trading days of the market; get_data serves any subset of them
+        :param i_symbols:       number of symbols, not counting the benchmark
+        :param f_event_density: the share of (day, symbol) cells with a dip under $5
+        :param f_missing:       the share of (day, symbol) cells with no data (NaN)
+        :param i_seed:          random seed; the same arguments always make the same market
+        :param s_benchmark:     the symbol of the benchmark, which has no events
+        """
+        rng = np.random.RandomState(i_seed)
+        i_dates = len(ldt_timestamps)
+        self.ls_symbols = ['SYN%04d' % i for i in range(i_symbols)]
+        self.s_benchmark = s_benchmark
+        ls_all = self.ls_symbols + [s_benchmark]
+
+        na_rets = rng.normal(0.0003, 0.02, (i_dates, len(ls_all)))
+        na_levels = np.exp(rng.uniform(np.log(8), np.log(80), len(ls_all)))
+        na_actual = np.maximum(na_levels * np.exp(np.cumsum(na_rets, axis=0)), 6.0)
+
+        na_events = rng.rand(i_dates, len(ls_all)) < f_event_density
+        na_events[0, :] = False
+        na_events[:, -1] = False
+        na_actual[na_events] = rng.uniform(4.0, 4.99, na_events.sum())
+
+        # adjusted closes drift away from the actual closes going back in time, like dividends
+        na_close = na_actual * np.linspace(0.9, 1.0, i_dates)[:, np.newaxis]
+        na_spread = rng.uniform(0.0, 0.02, na_actual.shape)
+        d_values = {'actual_close': na_actual,
+                    'close': na_close,
+                    'open': na_actual * (1 + rng.uniform(-0.01, 0.01, na_actual.shape)),
+                    'high': na_actual * (1 + na_spread),
+                    'low': na_actual * (1 - na_spread),
+                    'volume': np.rint(rng.lognormal(13, 1, na_actual.shape))}
+
+        na_missing = rng.rand(i_dates, len(ls_all)) < f_missing
+        for na_values in d_values.values():
+            na_values[na_missing] = np.NAN
+
+        index = pd.DatetimeIndex(ldt_timestamps)
+        self.d_data = dict((s_key, pd.DataFrame(na_values, index=index, columns=ls_all))
+                           for s_key, na_values in d_values.items())
+
+    def get_all_symbols(self):
+        return self.ls_symbols + [self.s_benchmark]
+
+    def get_symbols_from_list(self, s_list):
+        return list(self.ls_symbols)
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        """
+        :return: a list of dataframes, one per key, like DataAccess.get_data
+        """
+        index = pd.DatetimeIndex(ldt_timestamps)
+        return [self.d_data[s_key].reindex(index=index, columns=ls_symbols) for s_key in ls_keys]
+
+
+def write_orders(filename, ldt_timestamps, ls_symbols, i_orders, i_shares=100, i_seed=0):
+    """
+    :param filename:        the path of the order csv file to write
+    :param ldt_timestamps:  the trading days to place orders on
+    :param ls_symbols:      the symbols to trade
+    :param i_orders:        number of orders
+    :param i_shares:        the largest order size
+    :param i_seed:          random seed
+    :return:                nothing; orders are in the format eventprofiler writes, in date order
+    """
+    rng = np.random.RandomState(i_seed)
+    dates = pd.DatetimeIndex(ldt_timestamps)[np.sort(rng.randint(0, len(ldt_timestamps), i_orders))]
+    orders = pd.DataFrame({0: dates.year, 1: dates.month, 2: dates.day,
+                           3: np.array(ls_symbols)[rng.randint(0, len(ls_symbols), i_orders)],
+                           4: np.where(rng.rand(i_orders) < 0.5, 'Buy', 'Sell'),
+                           5: rng.randint(1, i_shares + 1, i_orders),
+                           6: ''}, columns=range(7))
+    orders.to_csv(filename, header=False, index=False)
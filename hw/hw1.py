@@ -1,22 +1,29 @@
-import QSTK.qstkutil.qsdateutil as du
 import QSTK.qstkutil.tsutil as tsu
-import QSTK.qstkutil.DataAccess as da
 import datetime as dt
 import matplotlib.pyplot as plt
+import multiprocessing
 import numpy as np
+import os
+import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import datasession
+import tradingcalendar
+
+
+def get_close_prices(start, end, equities):
+    # the shared session keeps the prices already read, within its memory budget
+    ldt_timestamps = tradingcalendar.get_calendar().days(start, end, tradingcalendar.CLOSE)
+    ls_keys = ['close']
+    ldf_data = datasession.get_session().get_data(ldt_timestamps, equities, ls_keys)
+    d_data = dict(zip(ls_keys, ldf_data))
+    return d_data['close'].values
 
 def simulate(start, end, equities, allocs):
     vol, daily_ret, sharpe, cum_ret = 0,0,0,0
     
     # setup, get matrix of normalized closing prices
-    dt_timeofday = dt.timedelta(hours=16)
-    ldt_timestamps = du.getNYSEdays(start, end, dt_timeofday)
-    c_dataobj = da.DataAccess('Yahoo', cachestalltime=0)
-    ls_keys = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
-    ldf_data = c_dataobj.get_data(ldt_timestamps, equities, ls_keys)
-    d_data = dict(zip(ls_keys, ldf_data))
-    na_price = d_data['close'].values
+    na_price = get_close_prices(start, end, equities)
     na_normalized_price = na_price / na_price[0,:]
     
     # first, compute (normalized) daily returns
@@ -38,42 +45,254 @@ def simulate(start, end, equities, allocs):
     
     return vol, daily_ret, sharpe, cum_ret
 
-def find_best_portfolio(start, end, equities):
-    best = [0,0,0,0]
-    best_sharpe = float("-inf")
-    
-    # setup, get matrix of closing prices
-    dt_timeofday = dt.timedelta(hours=16)
-    ldt_timestamps = du.getNYSEdays(start, end, dt_timeofday)
-    c_dataobj = da.DataAccess('Yahoo', cachestalltime=0)
-    ls_keys = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
-    ldf_data = c_dataobj.get_data(ldt_timestamps, equities, ls_keys)
-    d_data = dict(zip(ls_keys, ldf_data))
-    na_price = d_data['close'].values
+# allocation tables already built, keyed by (total, parts)
+d_compositions = {}
+
+def compositions(total, parts):
+    """
+    :return: every row of `parts` non-negative integers summing to `total`, in lexicographic order
+    """
+    key = (total, parts)
+    if key not in d_compositions:
+        if parts == 1:
+            d_compositions[key] = np.array([[total]], dtype=np.int16)
+        else:
+            d_compositions[key] = np.vstack([np.hstack((np.full((len(tail), 1), first, dtype=np.int16), tail))
+                                    for first in range(total + 1)
+                                    for tail in [compositions(total - first, parts - 1)]])
+    return d_compositions[key]
+
+def count_compositions(total, parts):
+    # C(total + parts - 1, parts - 1)
+    count = 1
+    for i in range(1, parts):
+        count = count * (total + i) // i
+    return count
+
+def simplex_grid(num_assets, num_steps, max_rows, max_table_rows=1000000):
+    """
+    :param num_assets: number of assets to allocate between
+    :param num_steps: number of grid steps in 100%, e.g. 10 for 10% steps
+    :param max_rows: largest number of allocations yielded at once
+    :param max_table_rows: size limit of the precomputed allocation tables
+    :return: a generator of integer allocation arrays, every row summing to num_steps, in lexicographic order
+    """
+    # the last `tail` assets come from precomputed tables, only the leading ones are walked in Python
+    tail = 1
+    while tail < num_assets and count_compositions(num_steps, tail + 1) <= max_table_rows:
+        tail += 1
+    head = num_assets - tail
+
+    chunk, chunk_rows = [], 0
+    for prefix in _prefixes(head, num_steps):
+        rest = compositions(num_steps - sum(prefix), tail)
+        for i in range(0, len(rest), max_rows):
+            block = rest[i:i + max_rows]
+            if head > 0:
+                block = np.hstack((np.empty((len(block), head), dtype=np.int16), block))
+                block[:, :head] = prefix
+            if chunk_rows + len(block) > max_rows and chunk:
+                yield np.vstack(chunk)
+                chunk, chunk_rows = [], 0
+            chunk.append(block)
+            chunk_rows += len(block)
+    if chunk:
+        yield np.vstack(chunk)
+
+def _prefixes(length, budget):
+    if length == 0:
+        yield ()
+        return
+    for first in range(budget + 1):
+        for rest in _prefixes(length - 1, budget - first):
+            yield (first,) + rest
+
+def score_allocations(na_normalized_price, na_allocs):
+    """
+    :param na_normalized_price: a days x assets matrix of prices normalized to 1 on the first day
+    :param na_allocs: a candidates x assets matrix of allocations
+    :return: vol, daily_ret, sharpe, cum_ret arrays, one entry per candidate
+    """
+    num_days = len(na_normalized_price)
+
+    # candidates x days matrix of portfolio values, then daily returns with a 0 on the first day
+    na_values = np.dot(na_allocs, na_normalized_price.T)
+    na_rets = na_values[:, 1:] / na_values[:, :-1]
+    na_rets -= 1
+    daily_ret = na_rets.sum(axis=1) / num_days
+    vol = np.sqrt(np.maximum(np.einsum('ij,ij->i', na_rets, na_rets) / num_days - daily_ret ** 2, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.sqrt(252) * daily_ret / vol
+    cum_ret = na_values[:, -1]
+    return vol, daily_ret, sharpe, cum_ret
+
+def grid_steps(step):
+    """
+    :param step: allocation grid step, e.g. 0.05 for 5%
+    :return: the number of grid steps in 100%; a step that does not divide 100% raises ValueError
+    """
+    num_steps = int(round(1.0 / step)) if step > 0 else 0
+    if num_steps < 1 or abs(num_steps * step - 1) > 1e-9:
+        raise ValueError("step %s does not divide 100%% into whole steps" % step)
+    return num_steps
+
+def top_of_grid(na_prices_t, grids, num_steps, top_k, num_seen=0):
+    """
+    :param na_prices_t: an assets x days matrix of normalized prices
+    :param grids: an iterable of integer allocation arrays, in lexicographic order
+    :param num_seen: position of the first allocation in the whole grid, used to break ties
+    :return: the top_k allocations, their Sharpe ratios and grid positions, best first
+    """
+    best_allocs = np.zeros((0, len(na_prices_t)), dtype=np.int16)
+    best_sharpe = np.zeros(0)
+    best_order = np.zeros(0, dtype=np.int64)
+    for na_grid in grids:
+        sharpe = score_allocations(na_prices_t.T, na_grid / float(num_steps))[2]
+        sharpe[np.isnan(sharpe)] = float("-inf")
+
+        # only candidates tied with or above this chunk's top_k-th can make the overall top_k
+        keep = np.arange(len(sharpe))
+        if len(sharpe) > top_k:
+            keep = np.nonzero(sharpe >= np.partition(sharpe, -top_k)[-top_k])[0]
+        best_allocs = np.vstack((best_allocs, na_grid[keep]))
+        best_sharpe = np.concatenate((best_sharpe, sharpe[keep]))
+        best_order = np.concatenate((best_order, num_seen + keep))
+        num_seen += len(sharpe)
+
+        # keep the top_k, earlier candidates first on ties
+        order = np.lexsort((best_order, -best_sharpe))[:top_k]
+        best_allocs, best_sharpe, best_order = best_allocs[order], best_sharpe[order], best_order[order]
+    return best_allocs, best_sharpe, best_order
+
+# what every worker process of find_top_portfolios needs, set once by _init_worker
+d_worker = {}
+
+def _init_worker(na_prices_t, num_steps, top_k, max_rows):
+    d_worker.update(na_prices_t=na_prices_t, num_steps=num_steps, top_k=top_k, max_rows=max_rows)
+
+def _top_of_slice(task):
+    # the allocations starting with `prefix`, which follow the first `num_seen` in the whole grid
+    prefix, num_seen = task
+    num_steps, max_rows = d_worker['num_steps'], d_worker['max_rows']
+    num_tail = len(d_worker['na_prices_t']) - len(prefix)
+    grids = (np.hstack((np.tile(np.array(prefix, dtype=np.int16), (len(block), 1)), block))
+             for block in simplex_grid(num_tail, num_steps - sum(prefix), max_rows))
+    return top_of_grid(d_worker['na_prices_t'], grids, num_steps, d_worker['top_k'], num_seen)
+
+def find_top_portfolios(start, end, equities, step=0.1, top_k=10, max_bytes=2 * 1024 * 1024,
+                        processes=None, min_parallel=500000):
+    """
+    Every allocation on the grid is scored; the work grows with candidates x days and nothing is pruned.
+    A large grid is cut into slices by the leading assets' allocations and the slices are scored by a
+    pool of processes, so the run time falls with the number of cores: 10 assets at a 5% step are about
+    10 million candidates and take 20-30 seconds on one core over a year of prices.
+
+    :param step: allocation grid step, e.g. 0.05 for 5%; it must divide 100%
+    :param top_k: number of allocations to return
+    :param max_bytes: memory budget for scoring one chunk of candidates; a few MB keeps it in cache
+    :param processes: number of worker processes, one per core by default
+    :param min_parallel: smallest grid worth starting the worker processes for
+    :return: a list of (allocs, sharpe) pairs, best Sharpe ratio first
+    """
+    num_steps = grid_steps(step)
+    na_price = get_close_prices(start, end, equities)
     na_normalized_price = na_price / na_price[0,:]
-    
-    steps = np.array(range(0, 11)) / 10.0
-    for a in steps:
-        for b in steps:
-            for c in steps:
-                for d in steps:
-                    if (a + b + c + d == 1.0):
-                        allocs = [a, b, c, d]
-                        na_weighted_cumulative_ret = np.sum(na_normalized_price * allocs, axis=1)
-                        na_normalized_weighted_daily_ret = na_weighted_cumulative_ret.copy()
-                        tsu.returnize0(na_normalized_weighted_daily_ret)    
-                        vol = np.std(na_normalized_weighted_daily_ret)
-                        daily_ret = np.mean(na_normalized_weighted_daily_ret)
-                        sharpe = np.sqrt(252) * daily_ret / vol
-                        
-                        if sharpe > best_sharpe:
-                            best_sharpe = sharpe
-                            best = [a, b, c, d]
-    
-    for alloc in best:
-        best[best.index(alloc)] = round(alloc, 4)
-    
+
+    # each candidate needs two days-long float rows while it is scored
+    max_rows = max(1, max_bytes // (16 * len(na_normalized_price)))
+    # score_allocations multiplies by the transpose, so hand it a view whose transpose is contiguous
+    na_prices_t = np.ascontiguousarray(na_normalized_price.T)
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    num_assets = len(equities)
+    if processes < 2 or num_assets < 3 or count_compositions(num_steps, num_assets) < min_parallel:
+        best_allocs, best_sharpe, best_order = top_of_grid(
+            na_prices_t, simplex_grid(num_assets, num_steps, max_rows), num_steps, top_k)
+    else:
+        # one slice per allocation of the first two assets, in grid order
+        tasks, num_seen = [], 0
+        for prefix in _prefixes(2, num_steps):
+            tasks.append((prefix, num_seen))
+            num_seen += count_compositions(num_steps - sum(prefix), num_assets - 2)
+        pool = multiprocessing.Pool(processes, _init_worker, (na_prices_t, num_steps, top_k, max_rows))
+        try:
+            l_tops = pool.map(_top_of_slice, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        best_allocs = np.vstack([top[0] for top in l_tops])
+        best_sharpe = np.concatenate([top[1] for top in l_tops])
+        best_order = np.concatenate([top[2] for top in l_tops])
+        order = np.lexsort((best_order, -best_sharpe))[:top_k]
+        best_allocs, best_sharpe = best_allocs[order], best_sharpe[order]
+
+    return [([round(a / float(num_steps), 4) for a in allocs], sharpe)
+            for allocs, sharpe in zip(best_allocs, best_sharpe)]
+
+def find_best_portfolio(start, end, equities, step=0.1):
+    best, best_sharpe = find_top_portfolios(start, end, equities, step, top_k=1)[0]
+    # no allocation beats -inf, e.g. when the prices are all NaN: all zeros, as the grid loop gave
+    if best_sharpe == float("-inf"):
+        best = [0.0] * len(equities)
     return best, best_sharpe
+
+def walk_forward(start, end, equities, step=0.1, window=252, every=21):
+    """
+    Re-pick the best allocation every `every` trading days over the trailing `window` days.
+    The per-asset sums of daily returns and of their cross-products slide along with the
+    window, so a rebalance only adds the new days and drops the old ones, and every candidate
+    is scored from those sums, at a cost that does not grow with the window.
+    Unlike simulate, candidates are scored as portfolios rebalanced to their allocation daily:
+    mean w.mu and variance w'Sigma w, as only those follow from the sums. Returns are averaged
+    over all `window` days, the first counting as 0, as simulate does.
+
+    :param step: allocation grid step, e.g. 0.05 for 5%; it must divide 100%
+    :param window: number of trading days each allocation is picked over
+    :param every: number of trading days between rebalances, e.g. 21 for monthly
+    :return: a list of (date, allocs, sharpe) per rebalance, from the first day with a full window
+    """
+    num_steps = grid_steps(step)
+    ldt_timestamps = tradingcalendar.get_calendar().days(start, end, tradingcalendar.CLOSE)
+    na_price = get_close_prices(start, end, equities)
+    # row i is the return into day i + 1
+    na_rets = na_price[1:, :] / na_price[:-1, :] - 1
+    # a missing price counts as no change; a NaN would stay in the sliding sums for good
+    na_rets[np.isnan(na_rets)] = 0
+    na_allocs = np.vstack(list(simplex_grid(len(equities), num_steps, 100000))) / float(num_steps)
+
+    # sums over the returns na_rets[lo:hi] of the current window
+    na_s1 = np.zeros(len(equities))
+    na_s2 = np.zeros((len(equities), len(equities)))
+    lo, hi = 0, 0
+    # rows added or dropped since the sums were last summed afresh
+    i_updates = 0
+    results = []
+    for last in range(window - 1, len(na_price), every):
+        new_lo, new_hi = last - window + 1, last
+        na_drop = na_rets[lo:min(new_lo, hi)]
+        na_add = na_rets[max(hi, new_lo):new_hi]
+        i_updates += len(na_drop) + len(na_add)
+        if i_updates >= 2 * window:
+            # rounding error builds up over many updates; re-summing every couple of windows bounds it
+            na_window = na_rets[new_lo:new_hi]
+            na_s1 = na_window.sum(axis=0)
+            na_s2 = np.dot(na_window.T, na_window)
+            i_updates = 0
+        else:
+            na_s1 += na_add.sum(axis=0) - na_drop.sum(axis=0)
+            na_s2 += np.dot(na_add.T, na_add) - np.dot(na_drop.T, na_drop)
+        lo, hi = new_lo, new_hi
+
+        daily_ret = np.dot(na_allocs, na_s1 / window)
+        mean_sq = np.einsum('ij,jk,ik->i', na_allocs, na_s2 / window, na_allocs)
+        vol = np.sqrt(np.maximum(mean_sq - daily_ret ** 2, 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.sqrt(252) * daily_ret / vol
+        sharpe[np.isnan(sharpe)] = float("-inf")
+        best = np.argmax(sharpe)
+        results.append((ldt_timestamps[last], [round(a, 4) for a in na_allocs[best]], sharpe[best]))
+    return results
     
 def print_results(array):
     vol, daily_ret, sharpe, cum_ret = array[0], array[1], array[2], array[3]
@@ -110,6 +329,13 @@ def main():
     print find_best_portfolio(start, end, equities)
     
     print "---Part 4---"
+
+    print "---Walk-forward---"
+    start = dt.datetime(2002, 1, 1)
+    end = dt.datetime(2011, 12, 31)
+    equities = ['AAPL', 'GOOG', 'IBM', 'MSFT']
+    for date, allocs, sharpe in walk_forward(start, end, equities):
+        print date.date(), allocs, sharpe
     
 
 if __name__ == '__main__':
@@ -2,12 +2,18 @@ import pandas as pd
 import numpy as np
 import math
 import copy
+import os
+import sys
 import QSTK.qstkutil.qsdateutil as du
 import datetime as dt
 import QSTK.qstkutil.DataAccess as da
 import QSTK.qstkutil.tsutil as tsu
 import QSTK.qstkstudy.EventProfiler as ep
 
+# the gap filling shared with the event profiler lives in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import pricefill
+
 
 def find_events(ls_symbols, d_data):
     # use actual close
@@ -47,15 +53,15 @@ def main():
     dataobj = da.DataAccess('Yahoo')
     ls_symbols = dataobj.get_symbols_from_list('sp5002012')
     ls_symbols.append('SPY')
-    ls_keys = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
+    # find_events reads actual_close and the study reads close; nothing else is used
+    ls_keys = ['close', 'actual_close']
     ldf_data = dataobj.get_data(ldt_timestamps, ls_symbols, ls_keys)
     d_data = dict(zip(ls_keys, ldf_data))
     
-    # remove NaN from price data
-    for s_key in ls_keys:
-        d_data[s_key] = d_data[s_key].fillna(method = 'ffill')
-        d_data[s_key] = d_data[s_key].fillna(method = 'bfill')
-        d_data[s_key] = d_data[s_key].fillna(1.0)
+    # remove NaN from price data: forward, then backward, then 1.0, both fields in one pass
+    d_gaps = pricefill.fill_frames(d_data, ls_keys, 1.0)
+    print "Gaps filled:"
+    print pricefill.summarize_gaps(d_gaps)
     
     df_events = find_events(ls_symbols, d_data)
     print "Creating Study"
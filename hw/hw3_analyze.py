@@ -12,7 +12,6 @@ import numpy as np
 import datetime as dt
 import sys
 import os
-import csv
 import matplotlib.pyplot as plt
 import QSTK.qstkutil.DataAccess as da
 import QSTK.qstkutil.tsutil as tsu
@@ -20,23 +19,16 @@ import QSTK.qstkutil.tsutil as tsu
 
 def df_from_portfolio_values(filename):
 
-    dates_arr = []
-    values_arr = []
-
-    # parse the csv file
-    with open(filename, 'rb') as f:
-        reader = csv.reader(f)
-        for row in reader:
-            year = int(row[0])
-            month = int(row[1])
-            day = int(row[2])
-            value = int(row[3])
-            date = dt.datetime(year, month, day) + dt.timedelta(hours=16)
-            dates_arr.append(date)
-            values_arr.append(value)
+    # parse the whole csv file at once
+    rows = pd.read_csv(filename, header=None, names=['year', 'month', 'day', 'value'])
+
+    # Build the dates from their parts with datetime64 arithmetic instead of one datetime per row
+    dates = (rows['year'].values - 1970).astype('M8[Y]') + (rows['month'].values - 1).astype('m8[M]')
+    dates = dates.astype('M8[D]') + (rows['day'].values - 1).astype('m8[D]')
+    dates = pd.DatetimeIndex(dates.astype('M8[ns]')) + dt.timedelta(hours=16)
 
     # Create the data frame
-    df = pd.DataFrame(values_arr, index=dates_arr, columns=['value'])
+    df = pd.DataFrame(rows['value'].values, index=dates, columns=['value'])
 
     return df
 
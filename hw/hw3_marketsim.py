@@ -11,10 +11,15 @@
 import pandas as pd
 import numpy as np
 import datetime as dt
+import os
 import sys
 import QSTK.qstkutil.qsdateutil as du
 import QSTK.qstkutil.DataAccess as da
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import ledger
+import orders as orders_io
+
 
 def portfolio_from_orders(filename, starting_cash):
     """
@@ -22,25 +27,8 @@ def portfolio_from_orders(filename, starting_cash):
     :param starting_cash: starting portfolio capital
     :return: a pandas dataframe containing the value of the portfolio on each trading day
     """
-    # read in the csv file; remove the trailing newline crap from the end of each line
-    csv_headers = ('year', 'month', 'day', 'symbol', 'ordertype', 'amt', 'junk')
-    orders = pd.read_csv(filename, header=None, names=csv_headers)
-    del orders['junk']
-
-    # construct an initial orders dataframe, sorted by date ascending
-    dates_arr = [dt.datetime(s['year'], s['month'], s['day']) for (i, s) in orders.iterrows()]
-    orders_dict = {'date': dates_arr,
-                   'symbol': orders['symbol'],
-                   'ordertype': orders['ordertype'],
-                   'amt': orders['amt']}
-    orders_headers = ('date', 'symbol', 'ordertype', 'amt')
-    orders = pd.DataFrame(orders_dict, columns=orders_headers)
-    orders = orders.sort(columns='date', axis=0, ascending=True)
-
-    # Map each Buy/Sell transaction to a net quantity change
-    orders['ordertype'] = orders['ordertype'].map(lambda x: 1 if x == 'Buy' else -1)
-    orders['amt'] = orders['amt'] * orders['ordertype']
-    del orders['ordertype']
+    # read in the csv file as a date, symbol and signed amt per order
+    orders = orders_io.read_orders_csv(filename)
 
     # Creating an object of the dataaccess class with Yahoo as the source
     dataobj = da.DataAccess('Yahoo')
@@ -50,19 +38,18 @@ def portfolio_from_orders(filename, starting_cash):
     bad_symbols = list(set(orders['symbol']) - set(all_symbols))
     if len(bad_symbols) != 0:
         print "Portfolio contains invalid symbols : ", bad_symbols
-    for bad_symbol in bad_symbols:
-        orders = orders[orders['symbol'] != bad_symbol]
+        orders = orders[orders['symbol'].isin(all_symbols)]
 
     # calculate date boundaries
-    startdate = orders.irow(0)['date']
-    enddate = orders.irow(-1)['date']
+    startdate = orders['date'].min()
+    enddate = orders['date'].max()
 
     # Get a list of trading days between the start and the end
     ldt_timestamps = du.getNYSEdays(startdate, enddate + dt.timedelta(hours=16), dt.timedelta(hours=16))
 
     # Reading the data, now d_data is a dictionary with the keys above
     ls_keys = ['close']
-    symbols = list(set(orders['symbol']))
+    symbols = sorted(set(orders['symbol']))
     ##print "Relevant symbols: %", symbols
 
     ldf_data = dataobj.get_data(ldt_timestamps, symbols, ls_keys)
@@ -76,38 +63,24 @@ def portfolio_from_orders(filename, starting_cash):
     #prices = prices.fillna(method='bfill')
 
     # Subtract 16 hours from each of the dates in the index
-    tmpDates = pd.DataFrame([date - dt.timedelta(hours=16) for date in prices.index], index=prices.index, columns=['date'])
-    prices = prices.join(tmpDates)
-    prices = prices.set_index('date')
-
-    # Create the holdings df from orders
-    timestamps = du.getNYSEdays(startdate, enddate)
-    holdings_change = pd.DataFrame(np.zeros((len(timestamps), len(symbols)), dtype=np.int), columns=symbols, index=timestamps)
-    for (i, s) in orders.iterrows():
-        holdings_change.ix[s['date'], s['symbol']] = s['amt'] + holdings_change.ix[s['date'], s['symbol']]
-    holdings = holdings_change.cumsum(axis=0)
-
-    # Create the equities df from holdings and prices
-    equities = (holdings * prices).sum(axis=1)
-
-    # Create the cash df from orders, holdings_change, prices, and starting cash
-    cash_change = pd.DataFrame(np.zeros((len(timestamps), 1)), columns=['value'], index=timestamps)
-    for (i, s) in orders.iterrows():
-        cash_change.ix[s['date']] += -1 * holdings_change.ix[s['date'], s['symbol']] * prices.ix[s['date'], s['symbol']]
-    cash_change.ix[0] += int(starting_cash)
-    cash = cash_change.cumsum(axis=0)
+    prices.index = pd.DatetimeIndex(prices.index) - dt.timedelta(hours=16)
+
+    # Line the prices up with the trading days and the orders with the price grid
+    timestamps = pd.DatetimeIndex(du.getNYSEdays(startdate, enddate))
+    na_prices = prices.reindex(index=timestamps, columns=symbols).values
+    na_rows = timestamps.get_indexer(orders['date'])
+    na_cols = pd.Index(symbols).get_indexer(orders['symbol'])
+    if (na_rows < 0).any():
+        print "Orders on non-trading days ignored : ", list(orders['date'][na_rows < 0])
+        orders = orders[na_rows >= 0]
+        na_cols = na_cols[na_rows >= 0]
+        na_rows = na_rows[na_rows >= 0]
+
+    # Build the holdings and cash ledgers in bulk, the same way marketsim does
+    holdings, cash = ledger.holdings_and_cash(na_prices, na_rows, na_cols, orders['amt'].values, starting_cash)
 
     # Create the overall portfolio df from equities and cash
-    portfolio = equities + cash
-
-    ##print "timestamps: %", timestamps
-    ##print "orders: %", orders.ix[0:5]
-    ##print "prices: %", prices.ix[0:5]
-    ##print "holdings: %", holdings.ix[0:5]
-    ##print "equities: %", equities.ix[0:5]
-    ##print "cash_change: %", cash_change.ix[0:5]
-    ##print "cash: %", cash.values
-    ##print "total portfolio: %", portfolio
+    portfolio = pd.DataFrame(ledger.portfolio_values(na_prices, holdings, cash), index=timestamps, columns=['value'])
 
     return portfolio
 
@@ -115,12 +88,13 @@ def portfolio_from_orders(filename, starting_cash):
 def write_portfolio_to_file(portfolio, filename):
 
     # Cast all the values to integers
-    portfolio['value'] = [int(v) for v in portfolio['value']]
+    portfolio['value'] = portfolio['value'].values.astype(np.int64)
 
-    # Split the datetime objects to year, month, and day integers
-    portfolio['year'] = [i.date().year for (i, s) in portfolio.iterrows()]
-    portfolio['month'] = [i.date().month for (i, s) in portfolio.iterrows()]
-    portfolio['day'] = [i.date().day for (i, s) in portfolio.iterrows()]
+    # Split the datetime objects to year, month, and day integers, all dates at once
+    dates = pd.DatetimeIndex(portfolio.index)
+    portfolio['year'] = dates.year
+    portfolio['month'] = dates.month
+    portfolio['day'] = dates.day
 
     # Write the columns to a csv file
     portfolio.to_csv(filename, cols=['year', 'month', 'day', 'value'], header=False, index=False)
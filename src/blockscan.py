@@ -0,0 +1,197 @@
+#-------------------------------------------------------------------------------
+# Name:        blockscan.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import sys
+import time
+import datetime as dt
+
+import datasession
+import predicates
+import prefetch
+import profiling
+import tradingcalendar
+from eventset import EventSet
+from pricestore import PriceStore, STORE_PATH
+import compact
+from eventprofiler import remove_nan, remove_nan_compact, transactions_from_eventmatrix
+
+
+# Copies of each loaded field per (day, symbol): the field as read, the copy the session
+# assembles and the copy the predicates work on
+FIELD_COPIES = 3
+# and values per (day, symbol) for the predicates' own intermediates such as returns and masks
+WORK_COPIES = 4
+
+
+def block_symbols(i_dates, i_keys, i_max_bytes, i_item_bytes=8):
+    """
+    :param i_item_bytes:    bytes per price, 4 in compact mode
+    :return:                how many symbols one block can hold within i_max_bytes, at least one
+    """
+    return max(1, i_max_bytes // (i_dates * (i_keys * FIELD_COPIES + WORK_COPIES) * i_item_bytes))
+
+
+def find_events_blocked(ls_names, dataobj, ldt_timestamps, ls_symbols, benchmark, ls_keys,
+                        i_max_bytes=512 * 1024 * 1024, fn_clean=None, b_compact=False):
+    """
+    Scan registered events a block of symbols at a time, so only one block of prices is ever
+    in memory. Every block carries the benchmark column too, for market relative events.
+
+    :param ls_names:        a list of registered event names
+    :param dataobj:         anything with get_data, e.g. DataAccess or a DataSession with a small budget
+    :param ldt_timestamps:  a list of timestamps
+    :param ls_symbols:      a list of symbols to use in the event study, any number of them
+    :param benchmark:       the symbol used for the benchmark equity (e.g. 'SPY')
+    :param ls_keys:         the fields the events may read; only the ones they use are loaded
+    :param i_max_bytes:     memory budget of one block
+    :param fn_clean:        cleans each block's fields once they are read, see LazyData; NaN filling by default
+    :param b_compact:       scan float32 prices, so blocks hold about twice the symbols, see compact.py
+    :return:                a dict mapping each name to an EventSet over ldt_timestamps and ls_symbols,
+                            the same as predicates.find_events with b_sparse on all the symbols at once
+    """
+    if fn_clean is None:
+        fn_clean = remove_nan_compact if b_compact else remove_nan
+    i_item_bytes = np.dtype(compact.price_dtype(b_compact)).itemsize
+    ls_others = [s for s in ls_symbols if s != benchmark]
+    i_benchmark = ls_symbols.index(benchmark) if benchmark in ls_symbols else -1
+    d_positions = dict((s_sym, i) for i, s_sym in enumerate(ls_symbols))
+
+    d_parts = dict((s_name, []) for s_name in ls_names)
+    ls_used = None
+    i_start = 0
+    while i_start < len(ls_others) or i_start == 0:
+        # until the first block shows which fields the events read, assume all of them
+        i_keys = len(ls_used) if ls_used else len(ls_keys)
+        i_block = block_symbols(len(ldt_timestamps), i_keys, i_max_bytes, i_item_bytes)
+        ls_block = ls_others[i_start:i_start + i_block] + [benchmark]
+
+        with profiling.span('block'):
+            d_data = datasession.LazyData(dataobj, ldt_timestamps, ls_block, ls_keys, fn_clean=fn_clean,
+                                          ls_prefetch=ls_used)
+            d_found = predicates.find_events(ls_names, ls_block, d_data, benchmark, b_sparse=True,
+                                             b_compact=b_compact)
+            ls_used = d_data.used_keys()
+            del d_data
+
+        # the benchmark's own events are taken from the first block only
+        na_map = np.array([d_positions[s_sym] for s_sym in ls_block[:-1]] + [i_benchmark if i_start == 0 else -1])
+        _collect(d_parts, d_found, na_map)
+        i_start += i_block
+
+    return dict((s_name, _merge(ldt_timestamps, ls_symbols, l_parts)) for s_name, l_parts in d_parts.items())
+
+
+def find_events_streamed(ls_names, loader, benchmark, fn_clean=None, b_compact=False):
+    """
+    Scan registered events on each block of a prefetch.BlockLoader as soon as it is read, so
+    scanning the first blocks overlaps reading the later ones. Have the loader read the
+    benchmark first (ls_order): blocks wait until its column is in, and if its file cannot
+    be read its error is raised, as nothing can be scanned against a missing benchmark.
+
+    :param ls_names:    a list of registered event names
+    :param loader:      a prefetch.BlockLoader of the fields the events read, not started yet
+    :param benchmark:   the symbol used for the benchmark equity (e.g. 'SPY'), one of the loader's symbols
+    :param fn_clean:    cleans each block's fields, see LazyData; NaN filling by default
+    :param b_compact:   scan float32 prices, see compact.py
+    :return:            a dict mapping each name to an EventSet over the loader's dates and symbols, the
+                        same as predicates.find_events with b_sparse on the whole panel
+    """
+    if fn_clean is None:
+        fn_clean = remove_nan_compact if b_compact else remove_nan
+    i_benchmark = loader.ls_symbols.index(benchmark)
+
+    d_parts = dict((s_name, []) for s_name in ls_names)
+    l_waiting = []
+    for na_cols in loader.iter_blocks():
+        if benchmark in loader.d_errors:
+            raise loader.d_errors[benchmark]
+        l_waiting.append(na_cols)
+        if not loader.is_loaded(i_benchmark):
+            continue
+        for na_ready in l_waiting:
+            with profiling.span('block'):
+                na_block = np.append(na_ready[na_ready != i_benchmark], i_benchmark)
+                ls_block = [loader.ls_symbols[j] for j in na_block]
+                d_data = dict((s_key, loader.frame(s_key, na_block)) for s_key in loader.ls_keys)
+                fn_clean(d_data, loader.ls_keys)
+                d_found = predicates.find_events(ls_names, ls_block, d_data, benchmark, b_sparse=True,
+                                                 b_compact=b_compact)
+            # the benchmark's own events are taken from its own block only
+            na_map = na_block.copy()
+            if i_benchmark not in na_ready:
+                na_map[-1] = -1
+            _collect(d_parts, d_found, na_map)
+        l_waiting = []
+
+    return dict((s_name, _merge(loader.ldt_timestamps, loader.ls_symbols, l_parts))
+                for s_name, l_parts in d_parts.items())
+
+
+def _collect(d_parts, d_found, na_map):
+    # events of one block, their columns mapped back to the whole universe; a column mapped to -1 is dropped
+    for s_name, event_set in d_found.items():
+        na_cols = na_map[event_set.na_symbols]
+        na_keep = na_cols >= 0
+        d_parts[s_name].append((event_set.na_dates[na_keep], na_cols[na_keep]))
+
+
+def _merge(ldt_timestamps, ls_symbols, l_parts):
+    na_dates = np.concatenate([na_part_dates for na_part_dates, na_part_cols in l_parts])
+    na_cols = np.concatenate([na_part_cols for na_part_dates, na_part_cols in l_parts])
+    # back to date then symbol order, as one scan over every symbol gives
+    na_order = np.lexsort((na_cols, na_dates))
+    return EventSet(ldt_timestamps, ls_symbols, na_dates[na_order], na_cols[na_order])
+
+
+def main(b_compact=False, b_stream=False):
+    """
+    :param b_compact:   scan float32 prices, see compact.py
+    :param b_stream:    read every file on a pool of threads, bypassing the price store, and scan
+                        each block as soon as it is in rather than reading block after block
+    """
+    startdate = dt.datetime(1990, 1, 1)
+    enddate = dt.datetime(2012, 12, 31)
+    timestamps = tradingcalendar.get_calendar().days(startdate, enddate, tradingcalendar.CLOSE)
+
+    # a session that keeps next to nothing, so blocks already scanned are not held on to
+    session = datasession.get_session()
+    if session.store is None:
+        session.store = PriceStore(STORE_PATH)
+    dataobj = datasession.DataSession(session.dataobj, session.store, i_max_bytes=0)
+    benchmark = 'SPY'
+    ls_symbols = session.get_all_symbols()
+    if benchmark not in ls_symbols:
+        ls_symbols.append(benchmark)
+    ls_keys = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
+
+    event_name = 'price_cross_below_five'
+    if b_stream:
+        # the files are read straight from the reader behind the session's parallel reads
+        reader = session.dataobj
+        if isinstance(reader, prefetch.ParallelData):
+            reader = reader.dataobj
+        loader = prefetch.BlockLoader(reader, timestamps, ls_symbols, ls_keys, datasession.READ_THREADS,
+                                      ls_order=[benchmark])
+        event_set = find_events_streamed([event_name], loader, benchmark, b_compact=b_compact)[event_name]
+    else:
+        event_set = find_events_blocked([event_name], dataobj, timestamps, ls_symbols, benchmark, ls_keys,
+                                        b_compact=b_compact)[event_name]
+    print "%s events over %s symbols" % (len(event_set), len(ls_symbols))
+
+    transactions = transactions_from_eventmatrix(event_set, b_compact=b_compact)
+    transactions.to_csv('../out/five_dollar_event_all_orders.csv', header=False, index=False)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    profiling.enable_from_env()
+    main(b_compact='--compact' in sys.argv[1:], b_stream='--stream' in sys.argv[1:])
+    print "--------"
+    print "Program execution time: %s seconds" % (time.time() - start_time)
+    if profiling.is_enabled():
+        profiling.print_report()
+        profiling.write_report('../out/blockscan_profile')
@@ -0,0 +1,57 @@
+#-------------------------------------------------------------------------------
+# Name:        compact.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Compact mode, turned on with b_compact=True in the event and ledger stages:
+# prices are float32, holdings int32, events int32 (date, symbol) coordinates
+# instead of a float64 matrix, and symbols categorical codes. Price panels and
+# holdings grids take half the memory. Sums, cash and portfolio values stay
+# float64.
+#
+# Accuracy against the float64 path, with eps = 2**-24 (about 6e-8):
+#
+#   prices              each price is off by at most eps relative
+#   daily returns       off by at most 3 eps (1 + |r|), about 1.8e-7 for small returns
+#   price events        a crossing of f_price can only differ on a day the price
+#                       is within eps relative of f_price
+#   return events       a threshold on returns can only differ on a day the return
+#                       is within 3 eps (1 + |r|) of the threshold
+#   portfolio values    off by at most eps times the gross value held
+#                       (sum of |holdings| x price) plus eps times the gross cash
+#                       ever traded (sum of |amt| x price over the orders)
+#   holdings            exact; a ledger whose positions could leave the int32
+#                       range raises OverflowError instead
+
+import numpy as np
+
+
+PRICE_DTYPE = np.float32
+HOLDINGS_DTYPE = np.int32
+
+
+def price_dtype(b_compact):
+    return PRICE_DTYPE if b_compact else np.float64
+
+
+def holdings_dtype(b_compact):
+    return HOLDINGS_DTYPE if b_compact else np.int64
+
+
+def check_holdings(na_positions, na_cols, na_amt, dtype):
+    """
+    :param na_positions:    the positions carried in, one per symbol
+    :param na_cols:         the symbol position of each order
+    :param na_amt:          the signed share quantity of each order
+    :param dtype:           the holdings dtype
+    :return:                nothing; raises OverflowError unless every position the orders
+                            can reach fits in dtype
+    """
+    if np.dtype(dtype).itemsize >= 8:
+        return
+    na_reach = np.abs(na_positions).astype(np.float64) + np.bincount(na_cols, weights=np.abs(na_amt),
+                                                                     minlength=len(na_positions))
+    if len(na_reach) and na_reach.max() > np.iinfo(dtype).max:
+        raise OverflowError("Positions of up to %d shares do not fit in %s; use the default mode"
+                            % (na_reach.max(), np.dtype(dtype).name))
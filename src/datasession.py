@@ -0,0 +1,253 @@
+#-------------------------------------------------------------------------------
+# Name:        datasession.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import collections
+import os
+import QSTK.qstkutil.DataAccess as da
+
+import prefetch
+import profiling
+
+
+class DataSession:
+    """
+    An in-process cache in front of DataAccess (and optionally a PriceStore),
+    with the same get_data interface. Every (field, symbol) series is cached
+    over the widest timestamp range read so far; requests inside that range are
+    sliced from it instead of being read again. The least recently used series
+    are dropped once the cache holds more than i_max_bytes; series read together
+    share one index, which is counted once.
+    """
+
+    def __init__(self, dataobj=None, store=None, i_max_bytes=1024 * 1024 * 1024):
+        """
+        :param dataobj:     a QSTK DataAccess object; DataAccess('Yahoo') by default
+        :param store:       an optional PriceStore to read through
+        :param i_max_bytes: memory budget of the cache
+        """
+        self.dataobj = dataobj if dataobj is not None else da.DataAccess('Yahoo')
+        self.store = store
+        self.i_max_bytes = i_max_bytes
+        self.i_bytes = 0
+        self.d_cache = collections.OrderedDict()
+        # id of each index in use -> [the index, number of cached series on it]
+        self.d_indexes = {}
+        self.ls_all_symbols = None
+
+    def get_all_symbols(self):
+        if self.ls_all_symbols is None:
+            self.ls_all_symbols = self.dataobj.get_all_symbols()
+        return list(self.ls_all_symbols)
+
+    def get_symbols_from_list(self, s_list):
+        return self.dataobj.get_symbols_from_list(s_list)
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        """
+        :param ldt_timestamps:  a list of timestamps
+        :param ls_symbols:      a list of symbols
+        :param ls_keys:         a list of fields such as 'close'
+        :return:                a list of dataframes, one per key, like DataAccess.get_data
+        """
+        ldt_timestamps = pd.DatetimeIndex(ldt_timestamps)
+
+        # Look everything up first, so entries used by this request cannot be evicted under it
+        d_found = {}
+        d_positions = {}
+        ls_missing_symbols = []
+        ls_missing_keys = []
+        for s_key in ls_keys:
+            for s_sym in ls_symbols:
+                ts_cached = self._get((s_key, s_sym))
+                if ts_cached is not None:
+                    # series read together share an index, so each index is matched only once
+                    i_index = id(ts_cached.index)
+                    if i_index not in d_positions:
+                        d_positions[i_index] = ts_cached.index.get_indexer(ldt_timestamps)
+                    na_pos = d_positions[i_index]
+                    if (na_pos >= 0).all():
+                        d_found[(s_key, s_sym)] = ts_cached.values[na_pos]
+                        continue
+                if s_sym not in ls_missing_symbols:
+                    ls_missing_symbols.append(s_sym)
+                if s_key not in ls_missing_keys:
+                    ls_missing_keys.append(s_key)
+
+        # Read whatever is missing in one call and cache it, merged with any narrower range
+        if ls_missing_symbols:
+            with profiling.span('read'):
+                ldf_data = self._read(ldt_timestamps, ls_missing_symbols, ls_missing_keys)
+            for s_key, df in zip(ls_missing_keys, ldf_data):
+                df.index = ldt_timestamps
+                for s_sym in ls_missing_symbols:
+                    if (s_key, s_sym) not in d_found:
+                        d_found[(s_key, s_sym)] = df[s_sym].values
+                    self._put((s_key, s_sym), df[s_sym])
+
+        ldf_result = []
+        for s_key in ls_keys:
+            na_values = np.empty((len(ldt_timestamps), len(ls_symbols)))
+            for j, s_sym in enumerate(ls_symbols):
+                na_values[:, j] = d_found[(s_key, s_sym)]
+            ldf_result.append(pd.DataFrame(na_values, index=ldt_timestamps, columns=ls_symbols))
+        return ldf_result
+
+    def _read(self, ldt_timestamps, ls_symbols, ls_keys):
+        if self.store is not None:
+            self.store.update(self.dataobj, ldt_timestamps, ls_symbols, ls_keys)
+            return self.store.get_data(ldt_timestamps, ls_symbols, ls_keys)
+        return self.dataobj.get_data(list(ldt_timestamps), ls_symbols, ls_keys)
+
+    def _get(self, key):
+        ts_cached = self.d_cache.pop(key, None)
+        if ts_cached is not None:
+            # most recently used entries live at the end
+            self.d_cache[key] = ts_cached
+        return ts_cached
+
+    def _put(self, key, ts_new):
+        ts_old = self.d_cache.pop(key, None)
+        if ts_old is not None:
+            self._release(ts_old)
+            ts_new = ts_new.combine_first(ts_old)
+        self.d_cache[key] = ts_new
+        self._hold(ts_new)
+        while self.i_bytes > self.i_max_bytes and len(self.d_cache) > 1:
+            old_key, ts_old = self.d_cache.popitem(last=False)
+            self._release(ts_old)
+
+    def _hold(self, ts):
+        # the values are the series' own, the index is counted with the first series on it
+        self.i_bytes += ts.values.nbytes
+        l_index = self.d_indexes.setdefault(id(ts.index), [ts.index, 0])
+        if l_index[1] == 0:
+            self.i_bytes += ts.index.values.nbytes
+        l_index[1] += 1
+
+    def _release(self, ts):
+        self.i_bytes -= ts.values.nbytes
+        l_index = self.d_indexes[id(ts.index)]
+        l_index[1] -= 1
+        if l_index[1] == 0:
+            self.i_bytes -= ts.index.values.nbytes
+            del self.d_indexes[id(ts.index)]
+
+    def clear(self):
+        self.d_cache.clear()
+        self.d_indexes.clear()
+        self.i_bytes = 0
+
+
+class LazyData(collections.Mapping):
+    """
+    A read-only dict of price fields, like d_data, that reads and cleans each
+    field the first time it is used. used_keys() tells which fields a study
+    actually read, so later runs can prefetch just those.
+    """
+
+    def __init__(self, dataobj, ldt_timestamps, ls_symbols, ls_keys, fn_clean=None, ls_prefetch=None):
+        """
+        :param dataobj:         anything with get_data, e.g. a DataSession or DataAccess
+        :param ldt_timestamps:  a list of timestamps
+        :param ls_symbols:      a list of symbols
+        :param ls_keys:         the fields that may be read
+        :param fn_clean:        an optional function fn_clean(d_data, ls_keys) cleaning the fields just
+                                read in d_data in place and returning their gap statistics, as
+                                eventprofiler.remove_nan does
+        :param ls_prefetch:     fields to read up front in one call
+        """
+        self.dataobj = dataobj
+        self.ldt_timestamps = ldt_timestamps
+        self.ls_symbols = ls_symbols
+        self.ls_keys = list(ls_keys)
+        self.fn_clean = fn_clean
+        self.d_loaded = {}
+        self.ls_used = []
+        self.ld_gaps = []
+        ls_prefetch = [k for k in (ls_prefetch or []) if k in self.ls_keys]
+        if ls_prefetch:
+            self._load(ls_prefetch)
+
+    def _load(self, ls_keys):
+        with profiling.span('load'):
+            ldf_data = self.dataobj.get_data(self.ldt_timestamps, self.ls_symbols, ls_keys)
+        d_new = dict(zip(ls_keys, ldf_data))
+        if self.fn_clean is not None:
+            # the fields read together are cleaned together
+            self.ld_gaps.append(self.fn_clean(d_new, ls_keys))
+        self.d_loaded.update(d_new)
+
+    def __getitem__(self, s_key):
+        if s_key not in self.ls_keys:
+            raise KeyError(s_key)
+        if s_key not in self.d_loaded:
+            self._load([s_key])
+        if s_key not in self.ls_used:
+            self.ls_used.append(s_key)
+        return self.d_loaded[s_key]
+
+    def __contains__(self, s_key):
+        # membership must not read the field
+        return s_key in self.ls_keys
+
+    def __iter__(self):
+        return iter(self.ls_keys)
+
+    def __len__(self):
+        return len(self.ls_keys)
+
+    def used_keys(self):
+        """
+        :return: the fields read so far, in the order they were first used
+        """
+        return list(self.ls_used)
+
+    def gap_stats(self):
+        """
+        :return: the gap statistics fn_clean returned, as a dict of symbols x fields dataframes
+                 over every field read so far, or None if nothing was cleaned yet
+        """
+        if not self.ld_gaps:
+            return None
+        return dict((s_stat, pd.concat([d_gaps[s_stat] for d_gaps in self.ld_gaps], axis=1))
+                    for s_stat in self.ld_gaps[0])
+
+    def save_used_keys(self, filename):
+        with open(filename, 'w') as f:
+            f.write('\n'.join(self.ls_used) + '\n')
+
+
+def load_used_keys(filename):
+    """
+    :return: the fields saved by LazyData.save_used_keys, or None if there is no such file
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# The session shared by every entry point in this process
+_session = None
+# number of data files the shared session reads at once
+READ_THREADS = 8
+
+
+def get_session():
+    """
+    :return: the process-wide DataSession, created on first use; it reads READ_THREADS files at once
+    """
+    global _session
+    if _session is None:
+        _session = DataSession(prefetch.ParallelData(da.DataAccess('Yahoo'), READ_THREADS))
+    return _session
+
+
+def set_session(session):
+    global _session
+    _session = session
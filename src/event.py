@@ -8,13 +8,23 @@
 #-------------------------------------------------------------------------------
 
 import eventprofiler as eprofiler # avoid namespace conflict with 'ep'
+import predicates
+import profiling
+
 
 class Event:
 
     def __init__(self, event_name):
         self.event_name = event_name
 
-    def find_events(self, symbols, data, benchmark):
+    def find_events(self, symbols, data, benchmark, b_compact=False):
+        # registered predicates come first, then plain functions in eventprofiler;
+        # compact mode gives an EventSet on float32 prices instead of a float64 event matrix
+        if self.event_name in predicates.d_events:
+            print "Finding events for: " + self.event_name
+            with profiling.span('events'):
+                return predicates.find_events([self.event_name], symbols, data, benchmark, b_sparse=b_compact,
+                                              b_compact=b_compact)[self.event_name]
         try:
             event_func = getattr(eprofiler, self.event_name)
         except AttributeError:
@@ -22,4 +32,18 @@ class Event:
             return
         else:
             print "Finding events for: " + self.event_name
-            return event_func(symbols, data, benchmark)
+            with profiling.span('events'):
+                if b_compact:
+                    return event_func(symbols, data, benchmark, b_sparse=True)
+                return event_func(symbols, data, benchmark)
+
+
+def find_all_events(events, symbols, data, benchmark):
+    """
+    :param events: a list of Event instances whose names are registered in predicates
+    :return: a dict mapping each event name to its event matrix, computed in one pass over the data
+    """
+    ls_names = [event.event_name for event in events]
+    print "Finding events for: " + ", ".join(ls_names)
+    with profiling.span('events'):
+        return predicates.find_events(ls_names, symbols, data, benchmark)
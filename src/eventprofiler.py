@@ -9,114 +9,188 @@
 
 import numpy as np
 import pandas as pd
-import copy
+import sys
 import time
-import os
-import QSTK.qstkutil.qsdateutil as du
 import datetime as dt
-import QSTK.qstkutil.DataAccess as da
-import QSTK.qstkstudy.EventProfiler as ep
 
 from event import *
+from eventset import EventSet
+from pricestore import PriceStore, STORE_PATH
+import compact
+import datasession
+import eventstudy
+import pricefill
+import profiling
+import tradingcalendar
 
 
-def five_dollar_event(ls_symbols, data, benchmark):
+def five_dollar_event(ls_symbols, data, benchmark, b_sparse=False):
     """
     :param ls_symbols: a list of symbols to use in the event study
     :param data: a dict mapping each key such as 'volume' to a pandas dataframe containing all the symbols as columns
     :param benchmark: the symbol used for the benchmark equity (e.g. 'SPY')
+    :param b_sparse: return an EventSet instead of the dense matrix
     :return: an event matrix - dataframe of 1's and NAN's, with 1's indicating dates where the $5 transition occurred
     """
     # use actual close
     df_close = data['actual_close']
-    ts_market = df_close[benchmark]
 
-    # Creating an empty dataframe
-    df_events = copy.deepcopy(df_close)
-    df_events = df_events * np.NAN
-
-    # Time stamps for the event range
-    ldt_timestamps = df_close.index
-
-    for s_sym in ls_symbols:
-        for i in range(1, len(ldt_timestamps)): # use numerical indices because not every day is a trading day
-            # Calculating the returns for this timestamp
-            f_symprice_today = df_close[s_sym].ix[ldt_timestamps[i]]
-            f_symprice_yest = df_close[s_sym].ix[ldt_timestamps[i - 1]]
-            f_marketprice_today = ts_market.ix[ldt_timestamps[i]]
-            f_marketprice_yest = ts_market.ix[ldt_timestamps[i - 1]]
-            f_symreturn_today = (f_symprice_today / f_symprice_yest) - 1
-            f_marketreturn_today = (f_marketprice_today / f_marketprice_yest) - 1
-
-            # Event is price transition at $5
-            if f_symprice_yest >= 5.0 and f_symprice_today < 5.0:
-                df_events[s_sym].ix[ldt_timestamps[i]] = 1
+    # Compare each day against the previous one for the whole frame at once;
+    # comparisons against NaN are False, just like the scalar version
+    na_close = df_close.values
+    with np.errstate(invalid='ignore'):
+        na_mask = (na_close[:-1, :] >= 5.0) & (na_close[1:, :] < 5.0)
+
+    # Only the requested symbols can have events
+    na_cols = df_close.columns.get_indexer(ls_symbols)
+    if (na_cols < 0).any():
+        raise KeyError([s_sym for s_sym, j in zip(ls_symbols, na_cols) if j < 0])
+    na_use = np.zeros(len(df_close.columns), dtype=bool)
+    na_use[na_cols] = True
+    na_mask &= na_use
+
+    if b_sparse:
+        na_rows, na_cols = np.nonzero(na_mask)
+        return EventSet(df_close.index, df_close.columns, na_rows + 1, na_cols)
+
+    # Creating an empty event matrix and marking the event cells
+    na_events = np.empty(na_close.shape)
+    na_events.fill(np.NAN)
+    na_events[1:, :][na_mask] = 1
+    df_events = pd.DataFrame(na_events, index=df_close.index, columns=df_close.columns)
 
     return df_events
 
 
-def transactions_from_eventmatrix(mat):
+def transactions_from_eventmatrix(mat, i_hold=5, i_shares=100, s_side='Buy', b_compact=False):
+    """
+    :param mat: an event matrix - dataframe of 1's and NAN's - or an EventSet
+    :param i_hold: number of trading days each position is held, clamped at the last date
+    :param i_shares: number of shares traded per event
+    :param s_side: 'Buy' to enter long and exit with a Sell, 'Sell' to enter short and exit with a Buy
+    :param b_compact: keep the symbols as categorical codes into the event columns, see compact.py
+    :return: a dataframe of orders, one entry on each event and one exit i_hold trading days later
+    """
+    if not isinstance(mat, EventSet):
+        mat = EventSet.from_matrix(mat)
+
+    num_events = len(mat)
+    s_exit = 'Sell' if s_side == 'Buy' else 'Buy'
+    na_rows, na_cols, na_amt = order_coordinates(mat, i_hold, i_shares, s_side)
+    dates = pd.DatetimeIndex(mat.index[na_rows])
+    if b_compact:
+        symbols = pd.Categorical.from_codes(na_cols, categories=mat.columns)
+    else:
+        symbols = np.asarray(mat.columns)[na_cols]
+
+    transactions = pd.DataFrame({0: dates.year,
+                                 1: dates.month,
+                                 2: dates.day,
+                                 3: symbols,
+                                 4: np.tile([s_side, s_exit], num_events),
+                                 5: i_shares,
+                                 6: ' '},
+                                columns=range(7))
+
+    print transactions
+    return transactions
+
+
+def remove_nan(d_data, ls_keys):
+    """
+    :param d_data:  a dict of price dataframes; the ones under ls_keys are replaced by filled copies
+    :param ls_keys: the fields to fill, all on the same dates and symbols
+    :return:        the gap statistics of pricefill.fill_frames; gaps are filled forward, then
+                    backward, then with 1.0
+    """
+    return pricefill.fill_frames(d_data, ls_keys, 1.0)
+
 
-    transactions = []
+def remove_nan_compact(d_data, ls_keys):
+    """
+    :return: the gap statistics; the fields are filled like remove_nan, as float32
+    """
+    return pricefill.fill_frames(d_data, ls_keys, 1.0, compact.PRICE_DTYPE)
 
-    num_dates = len(mat.index)
-    integer_indices = pd.Series(mat.index)
 
-    for (date, r) in mat.iterrows():
-        for (symbol, ele) in r.iteritems():
-            if ele == 1:
-                transactions.append((date.year, date.month, date.day, symbol, 'Buy', 100, ' '))
-                date_index =  mat.index.get_loc(date)
-                date_index = (date_index + 5) if (date_index + 5 < num_dates) else (num_dates - 1)
-                sell_date = integer_indices[date_index]
-                transactions.append((sell_date.year, sell_date.month, sell_date.day, symbol, 'Sell', 100, ' '))
+def order_coordinates(event_set, i_hold=5, i_shares=100, s_side='Buy'):
+    """
+    :param event_set: an EventSet
+    :return: the date positions, symbol positions and signed share quantities of the orders
+             transactions_from_eventmatrix builds, entries interleaved with their exits
+    """
+    num_dates = len(event_set.index)
+    num_events = len(event_set)
+    i_sign = 1 if s_side == 'Buy' else -1
 
-    print pd.DataFrame.from_records(transactions)
-    return pd.DataFrame.from_records(transactions)
+    # Entry and exit rows of every event, interleaved so each entry is followed by its exit
+    na_rows = np.empty(2 * num_events, dtype=np.int64)
+    na_rows[0::2] = event_set.na_dates
+    na_rows[1::2] = np.minimum(event_set.na_dates + i_hold, num_dates - 1)
+    na_cols = np.repeat(event_set.na_symbols, 2)
+    na_amt = np.tile([i_sign * i_shares, -i_sign * i_shares], num_events)
+    return na_rows, na_cols, na_amt
 
 
-def main():
+def main(b_compact=False, b_study=False):
+    """
+    :param b_compact:   scan float32 prices and keep compact orders, see compact.py
+    :param b_study:     also run the event study on the close and draw it to a pdf; by default only
+                        the orders are written
+    """
     startdate = dt.datetime(2008, 1, 1)
     enddate = dt.datetime(2009, 12, 31)
-    timestamps = du.getNYSEdays(startdate, enddate, dt.timedelta(hours=16))
+    timestamps = tradingcalendar.get_calendar().days(startdate, enddate, tradingcalendar.CLOSE)
 
-    dataobj = da.DataAccess('Yahoo')
-    ls_symbols = dataobj.get_symbols_from_list('sp5002012')
+    # read through the shared session and the local price store; only data neither has yet comes from QSTK
+    session = datasession.get_session()
+    if session.store is None:
+        session.store = PriceStore(STORE_PATH)
+    ls_symbols = session.get_symbols_from_list('sp5002012')
     benchmark = 'SPY'
     ls_symbols.append(benchmark)
     ls_keys = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
-    ldf_data = dataobj.get_data(timestamps, ls_symbols, ls_keys)
-    d_data = dict(zip(ls_keys, ldf_data))
-
-    # remove NaN from price data
-    for k in ls_keys:
-        d_data[k] = d_data[k].fillna(method = 'ffill')
-        d_data[k] = d_data[k].fillna(method = 'bfill')
-        d_data[k] = d_data[k].fillna(1.0)
 
+    # fields are read and cleaned only when the study first uses them; the ones
+    # the last run of this event used are read up front
     event_name = 'five_dollar_event'
-    event = Event(event_name)
-    df_events = event.find_events(ls_symbols, d_data, benchmark)
-
-    transactions = transactions_from_eventmatrix(df_events)
-    transactions.to_csv('../out/' + event_name + '_orders.csv', header=False, index=False)
-    return
-
-    #df_events = find_events(event_func, ls_symbols, d_data, benchmark)
+    fields_file = '../out/' + event_name + '_fields.txt'
+    d_data = datasession.LazyData(session, timestamps, ls_symbols, ls_keys,
+                                  fn_clean=remove_nan_compact if b_compact else remove_nan,
+                                  ls_prefetch=datasession.load_used_keys(fields_file))
 
-    # Create the event study
-    print "Creating study for: " + event.event_name
-    outfile = '../out/' + event.event_name + '.pdf'
-    ep.eventprofiler(df_events, d_data, i_lookback=20, i_lookforward=20,
-                     s_filename=outfile, b_market_neutral=True, b_errorbars=True,
-                     s_market_sym=benchmark)
-
-    # Open the output pdf file
-    os.startfile(outfile.replace('/', '\\'))
+    event = Event(event_name)
+    df_events = event.find_events(ls_symbols, d_data, benchmark, b_compact)
+
+    with profiling.span('orders'):
+        transactions = transactions_from_eventmatrix(df_events, b_compact=b_compact)
+    with profiling.span('write'):
+        transactions.to_csv('../out/' + event_name + '_orders.csv', header=False, index=False)
+
+    if b_study:
+        # Create the event study; the figures are computed headless, the pdf is drawn from them
+        print "Creating study for: " + event.event_name
+        with profiling.span('study'):
+            d_study = eventstudy.study(df_events, d_data['close'], i_lookback=20, i_lookforward=20,
+                                       b_market_neutral=True, s_market_sym=benchmark)
+        print "Events in study: %s, mean return %s days after: %s" % (d_study['count'], d_study['days'][-1],
+                                                                      d_study['mean'][-1])
+        with profiling.span('render'):
+            eventstudy.render(d_study, '../out/' + event.event_name + '.pdf', b_errorbars=True,
+                              b_market_neutral=True)
+
+    d_data.save_used_keys(fields_file)
+    print "Fields used: %s" % d_data.used_keys()
+    print "Gaps filled:"
+    print pricefill.summarize_gaps(d_data.gap_stats())
 
 
 if __name__ == '__main__':
     start_time = time.time()
-    main()
+    profiling.enable_from_env()
+    main(b_compact='--compact' in sys.argv[1:], b_study='--study' in sys.argv[1:])
     print "--------"
     print "Program execution time: %s seconds" % (time.time() - start_time)
+    if profiling.is_enabled():
+        profiling.print_report()
+        profiling.write_report('../out/eventprofiler_profile')
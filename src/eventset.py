@@ -0,0 +1,74 @@
+#-------------------------------------------------------------------------------
+# Name:        eventset.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+class EventSet:
+    """
+    A sparse event matrix: the (date index, symbol index) pair of every event,
+    sorted by date and then by symbol, plus the dates and symbols they refer to.
+    """
+
+    def __init__(self, index, columns, na_dates, na_symbols):
+        """
+        :param index: the timestamps of the event matrix
+        :param columns: the symbols of the event matrix
+        :param na_dates: an integer array of row positions into index
+        :param na_symbols: an integer array of column positions into columns, same length as na_dates
+        """
+        self.index = pd.Index(index)
+        self.columns = pd.Index(columns)
+        self.na_dates = np.asarray(na_dates, dtype=np.int32)
+        self.na_symbols = np.asarray(na_symbols, dtype=np.int32)
+
+    @staticmethod
+    def from_mask(na_mask, index, columns):
+        """
+        :param na_mask: a dates x symbols boolean array, True where an event occurred
+        """
+        na_dates, na_symbols = np.nonzero(na_mask)
+        return EventSet(index, columns, na_dates, na_symbols)
+
+    @staticmethod
+    def from_matrix(df_events):
+        """
+        :param df_events: an event matrix - dataframe of 1's and NAN's
+        """
+        return EventSet.from_mask(df_events.values == 1, df_events.index, df_events.columns)
+
+    def to_matrix(self):
+        """
+        :return: the dense event matrix - dataframe of 1's and NAN's, as ep.eventprofiler expects
+        """
+        na_events = np.empty((len(self.index), len(self.columns)))
+        na_events.fill(np.NAN)
+        na_events[self.na_dates, self.na_symbols] = 1
+        return pd.DataFrame(na_events, index=self.index, columns=self.columns)
+
+    def to_mask(self):
+        na_mask = np.zeros((len(self.index), len(self.columns)), dtype=bool)
+        na_mask[self.na_dates, self.na_symbols] = True
+        return na_mask
+
+    def dates(self):
+        """
+        :return: the timestamp of each event
+        """
+        return self.index[self.na_dates]
+
+    def symbols(self):
+        """
+        :return: the symbol of each event
+        """
+        return self.columns[self.na_symbols]
+
+    def __len__(self):
+        return len(self.na_dates)
+
+    def __repr__(self):
+        return 'EventSet(%d events, %d dates x %d symbols)' % (len(self), len(self.index), len(self.columns))
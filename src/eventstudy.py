@@ -0,0 +1,115 @@
+#-------------------------------------------------------------------------------
+# Name:        eventstudy.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from eventset import EventSet
+
+
+def event_returns(df_close, s_market_sym='SPY', b_market_neutral=True):
+    """
+    :param df_close:            a dates x symbols dataframe of close prices, gaps already filled
+    :param s_market_sym:        the symbol of the market
+    :param b_market_neutral:    subtract the market's daily return from every symbol's
+    :return:                    a dates x symbols array of daily returns, 0 on the first day; compute it
+                                once and hand it to study_from_returns for every event set on these prices
+    """
+    na_close = df_close.values
+    na_rets = np.zeros(na_close.shape)
+    na_rets[1:, :] = na_close[1:, :] / na_close[:-1, :] - 1
+    if b_market_neutral:
+        na_rets -= na_rets[:, df_close.columns.get_loc(s_market_sym)][:, np.newaxis]
+    return na_rets
+
+
+def study_from_returns(na_rets, events, i_lookback=20, i_lookforward=20, i_market_col=None):
+    """
+    :param na_rets:         a dates x symbols array of daily returns from event_returns
+    :param events:          an EventSet, or an event matrix (dataframe of 1's and NAN's), on the same grid
+    :param i_lookback:      number of days before each event
+    :param i_lookforward:   number of days after each event
+    :param i_market_col:    the market's column, whose events are left out as in a market neutral study
+    :return:                a dict with 'days' (-i_lookback to i_lookforward), the 'mean', 'std' and
+                            'stderr' of the cumulative returns relative to the event day, and 'count',
+                            the number of events; events too close to either end are left out
+    """
+    if not isinstance(events, EventSet):
+        events = EventSet.from_matrix(events)
+    i_dates = na_rets.shape[0]
+    i_width = i_lookback + 1 + i_lookforward
+
+    na_use = (events.na_dates >= i_lookback) & (events.na_dates < i_dates - i_lookforward)
+    if i_market_col is not None:
+        na_use &= events.na_symbols != i_market_col
+    na_dates, na_symbols = events.na_dates[na_use], events.na_symbols[na_use]
+    # symbol by symbol, like QSTK's study, so the averages add up in the same order
+    na_order = np.lexsort((na_dates, na_symbols))
+    na_dates, na_symbols = na_dates[na_order], na_symbols[na_order]
+
+    # Every window of i_width days as a view, then one gather of the event windows
+    na_rets = np.ascontiguousarray(na_rets)
+    i_row, i_col = na_rets.strides
+    na_windows = as_strided(na_rets, shape=(max(i_dates - i_width + 1, 0), i_width, na_rets.shape[1]),
+                            strides=(i_row, i_row, i_col))
+    na_event_rets = na_windows[na_dates - i_lookback, :, na_symbols]
+
+    na_cum = np.cumprod(na_event_rets + 1, axis=1)
+    na_cum /= na_cum[:, i_lookback][:, np.newaxis]
+
+    i_count = len(na_dates)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        na_mean = na_cum.mean(axis=0) if i_count else np.repeat(np.NAN, i_width)
+        na_std = na_cum.std(axis=0) if i_count else np.repeat(np.NAN, i_width)
+        na_stderr = na_std / np.sqrt(i_count)
+    return {'days': np.arange(-i_lookback, i_lookforward + 1),
+            'mean': na_mean,
+            'std': na_std,
+            'stderr': na_stderr,
+            'count': i_count}
+
+
+def study(events, df_close, i_lookback=20, i_lookforward=20, b_market_neutral=True, s_market_sym='SPY'):
+    """
+    :param events:          an EventSet, or an event matrix (dataframe of 1's and NAN's)
+    :param df_close:        a dates x symbols dataframe of close prices, gaps already filled
+    :return:                the figures of QSTK's eventprofiler study, see study_from_returns; nothing is drawn
+    """
+    if not isinstance(events, EventSet):
+        events = EventSet.from_matrix(events)
+    df_close = df_close.reindex(columns=events.columns)
+    na_rets = event_returns(df_close, s_market_sym, b_market_neutral)
+    i_market_col = events.columns.get_loc(s_market_sym) if b_market_neutral else None
+    return study_from_returns(na_rets, events, i_lookback, i_lookforward, i_market_col)
+
+
+def render(d_study, s_filename, b_errorbars=True, b_market_neutral=True):
+    """
+    :param d_study:     the result of study or study_from_returns
+    :param s_filename:  the pdf file to write
+    :return:            nothing, just draw the chart QSTK's eventprofiler draws
+    """
+    # only the studies that get drawn need matplotlib
+    import matplotlib.pyplot as plt
+
+    li_time = d_study['days']
+    i_lookback = -li_time[0]
+    na_mean, na_std = d_study['mean'], d_study['std']
+
+    plt.clf()
+    plt.axhline(y=1.0, xmin=li_time[0], xmax=li_time[-1], color='k')
+    if b_errorbars:
+        plt.errorbar(li_time[i_lookback:], na_mean[i_lookback:], yerr=na_std[i_lookback:], ecolor='#AAAAFF',
+                     alpha=0.7)
+    plt.plot(li_time, na_mean, linewidth=3, label='mean', color='b')
+    plt.xlim(li_time[0] - 1, li_time[-1] + 1)
+    if b_market_neutral:
+        plt.title('Market Relative mean return of ' + str(d_study['count']) + ' events')
+    else:
+        plt.title('Mean return of ' + str(d_study['count']) + ' events')
+    plt.xlabel('Days')
+    plt.ylabel('Cumulative Returns')
+    plt.savefig(s_filename, format='pdf')
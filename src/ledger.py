@@ -0,0 +1,268 @@
+#-------------------------------------------------------------------------------
+# Name:        ledger.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pickle
+import os
+
+import compact
+
+
+class LedgerState:
+    """
+    Everything needed to carry a ledger on from the last booked day: the
+    position in each symbol ever traded, the cash and the last day. Extending
+    a state gives the same holdings, cash and values, bit for bit, as booking
+    the whole history at once.
+    """
+
+    def __init__(self, starting_cash, b_compact=False, b_each_order=False):
+        """
+        :param starting_cash: starting portfolio capital, deposited on the first booked day
+        :param b_compact: keep int32 holdings and book float32 prices, see compact.py
+        :param b_each_order: charge every order its own quantity, see extend
+        """
+        self.ls_symbols = []
+        self.b_compact = b_compact
+        self.b_each_order = b_each_order
+        self.na_positions = np.zeros(0, dtype=compact.holdings_dtype(b_compact))
+        self.f_cash = float(int(starting_cash))
+        self.i_days = 0
+        self.dt_last = None
+
+    def add_symbols(self, ls_symbols):
+        """
+        :return: nothing; new symbols join with no position, keeping the symbols sorted
+        """
+        ls_new = sorted(set(ls_symbols) - set(self.ls_symbols))
+        if ls_new:
+            ls_all = sorted(self.ls_symbols + ls_new)
+            na_positions = np.zeros(len(ls_all), dtype=self.na_positions.dtype)
+            na_positions[np.searchsorted(ls_all, self.ls_symbols)] = self.na_positions
+            self.ls_symbols = ls_all
+            self.na_positions = na_positions
+
+    def save(self, filename):
+        s_tmp = filename + '.tmp'
+        with open(s_tmp, 'wb') as f:
+            pickle.dump(self.__dict__, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(s_tmp, filename)
+
+    @staticmethod
+    def load(filename):
+        state = LedgerState(0)
+        with open(filename, 'rb') as f:
+            state.__dict__.update(pickle.load(f))
+        return state
+
+
+def holdings_and_cash(na_prices, na_rows, na_cols, na_amt, starting_cash, b_compact=False, b_each_order=False):
+    """
+    :param na_prices:       a dates x symbols array of prices
+    :param na_rows:         the date position of each order
+    :param na_cols:         the symbol position of each order
+    :param na_amt:          the signed share quantity of each order, positive for Buy
+    :param starting_cash:   starting portfolio capital
+    :param b_compact:       int32 holdings, see compact.py
+    :param b_each_order:    charge every order its own quantity, see extend
+    :return:                a dates x symbols array of holdings and a dates array of cash
+    """
+    state = LedgerState(starting_cash, b_compact, b_each_order)
+    state.na_positions = np.zeros(na_prices.shape[1], dtype=compact.holdings_dtype(b_compact))
+    return extend(state, na_prices, na_rows, na_cols, na_amt)
+
+
+def extend(state, na_prices, na_rows, na_cols, na_amt):
+    """
+    Like the original marketsim loops, every order is charged the day's net change in its symbol
+    at that day's price, so two orders for one symbol on one day are each charged both quantities.
+    A state made with b_each_order charges every order only its own quantity instead.
+
+    :param state:       a LedgerState, moved on to the last of these dates
+    :param na_prices:   a dates x symbols array of prices for the days after the state's last day,
+                        one column per symbol of the state, in the same order
+    :param na_rows:     the date position of each order
+    :param na_cols:     the symbol position of each order
+    :param na_amt:      the signed share quantity of each order, positive for Buy
+    :return:            a dates x symbols array of holdings, of the state's positions' dtype, and a
+                        dates array of cash
+    """
+    i_dates, i_symbols = na_prices.shape
+    dtype = state.na_positions.dtype
+    if i_dates == 0:
+        return np.zeros((0, i_symbols), dtype=dtype), np.zeros(0)
+    na_rows = np.asarray(na_rows, dtype=np.int64)
+    na_cols = np.asarray(na_cols, dtype=np.int64)
+    na_amt = np.asarray(na_amt, dtype=np.float64)
+    compact.check_holdings(state.na_positions, na_cols, na_amt, dtype)
+
+    # Scatter-add the quantity changes into the dates x symbols grid, then cumulate
+    na_cells = na_rows * i_symbols + na_cols
+    na_holdings = _cumulated_changes(na_cells, na_amt, (i_dates, i_symbols), 0, dtype)
+    na_holdings += state.na_positions
+
+    # Every order pays (or receives) its charged quantity at that day's price; the starting
+    # cash is a flow of the first day, later runs carry on from the cash booked so far
+    na_charged = _charged_amounts(na_cells, na_amt, state.b_each_order)
+    na_flows = np.bincount(na_rows, weights=-na_charged * na_prices[na_rows, na_cols], minlength=i_dates)
+    f_carried = 0.0
+    if state.i_days == 0:
+        na_flows[0] += state.f_cash
+    else:
+        f_carried = state.f_cash
+    na_cash, state.f_cash = _cumsum_skipna(na_flows, f_carried)
+
+    state.na_positions = na_holdings[-1].copy()
+    state.i_days += i_dates
+    return na_holdings, na_cash
+
+
+def _charged_amounts(na_cells, na_amt, b_each_order):
+    # the quantity each order is charged for: its own, or the net of all the orders in its cell
+    if b_each_order or len(na_cells) == 0:
+        return na_amt
+    na_of_cell = np.unique(na_cells, return_inverse=True)[1]
+    return np.rint(np.bincount(na_of_cell, weights=na_amt))[na_of_cell]
+
+
+def _cumulated_changes(na_cells, na_amt, t_shape, i_axis, dtype):
+    # the grid of quantity changes at the given flat cells, cumulated along i_axis
+    if dtype == np.int64:
+        na_change = np.bincount(na_cells, weights=na_amt, minlength=t_shape[0] * t_shape[1])
+        return np.rint(na_change).astype(np.int64).reshape(t_shape).cumsum(axis=i_axis)
+    # narrower holdings are added up in their own type, so no float64 grid is ever built
+    na_grid = np.zeros(t_shape[0] * t_shape[1], dtype=dtype)
+    np.add.at(na_grid, na_cells, np.rint(na_amt).astype(dtype))
+    na_grid = na_grid.reshape(t_shape)
+    return np.cumsum(na_grid, axis=i_axis, out=na_grid)
+
+
+def portfolio_values(na_prices, na_holdings, na_cash):
+    """
+    :return: a dates array of portfolio values, holdings at missing prices count as zero
+    """
+    na_equities = na_holdings * na_prices
+    na_equities[np.isnan(na_equities)] = 0
+    # Add the symbols up one at a time: a symbol never held only adds exact zeros, so the
+    # values do not depend on which other symbols the ledger happens to carry
+    na_values = np.zeros(len(na_equities))
+    for j in range(na_equities.shape[1]):
+        na_values += na_equities[:, j]
+    return na_values + na_cash
+
+
+def _cumsum_skipna(na_values, f_start=0.0):
+    # same as pandas' cumsum: NaN stays in its own row and does not poison the rest;
+    # also returns the running sum after the last row
+    na_nan = np.isnan(na_values)
+    na_sums = np.where(na_nan, 0, na_values)
+    na_sums[0] += f_start
+    na_sums = na_sums.cumsum()
+    f_end = na_sums[-1]
+    na_sums[na_nan] = np.NAN
+    return na_sums, f_end
+
+
+def batch_values(na_prices, na_strats, na_rows, na_cols, na_amt, i_strategies, starting_cash,
+                 i_max_bytes=256 * 1024 * 1024, b_compact=False, b_each_order=False):
+    """
+    Value many strategies at once over one price matrix. Each (strategy, symbol) pair that
+    trades gets its own holdings row, so only traded pairs cost memory; strategies are taken
+    in blocks small enough for i_max_bytes.
+
+    :param na_prices:       a dates x symbols array of prices shared by every strategy
+    :param na_strats:       the strategy of each order, 0 to i_strategies - 1
+    :param na_rows:         the date position of each order
+    :param na_cols:         the symbol position of each order
+    :param na_amt:          the signed share quantity of each order, positive for Buy
+    :param i_strategies:    number of strategies
+    :param starting_cash:   starting capital of every strategy, deposited on its first order's day
+    :param i_max_bytes:     memory budget of the holdings and equities of one block
+    :param b_compact:       int32 holdings and float32 prices, see compact.py
+    :param b_each_order:    charge every order its own quantity, see extend
+    :return:                a dates x strategies array of portfolio values, the starting cash before a
+                            strategy's first order; on and after it, each column is the same, bit
+                            for bit, as portfolio_values of that strategy alone
+    """
+    i_dates, i_symbols = na_prices.shape
+    na_values = np.empty((i_dates, i_strategies))
+    na_values.fill(int(starting_cash))
+    if len(na_strats) == 0 or i_dates == 0:
+        return na_values
+
+    # Group the orders by strategy, keeping each strategy's own order
+    na_order = np.argsort(na_strats, kind='mergesort')
+    na_strats = np.asarray(na_strats, dtype=np.int64)[na_order]
+    na_rows = np.asarray(na_rows, dtype=np.int64)[na_order]
+    na_cols = np.asarray(na_cols, dtype=np.int64)[na_order]
+    na_amt = np.asarray(na_amt, dtype=np.float64)[na_order]
+    na_prices_t = np.ascontiguousarray(na_prices.T, dtype=compact.price_dtype(b_compact))
+    dtype = compact.holdings_dtype(b_compact)
+
+    # Number the traded pairs; pairs of one strategy are adjacent and in symbol order
+    na_pairs, na_pair_of = np.unique(na_strats * i_symbols + na_cols, return_inverse=True)
+    na_pair_strat = na_pairs // i_symbols
+    na_pair_col = na_pairs % i_symbols
+    compact.check_holdings(np.zeros(len(na_pairs), dtype=dtype), na_pair_of, na_amt, dtype)
+
+    # Blocks of whole strategies; each pair needs about five days-long rows while its block is
+    # valued (quantity changes, holdings, prices, equities and a NaN mask), fewer and narrower compact
+    i_block_pairs = max(1, i_max_bytes // ((24 if b_compact else 40) * i_dates))
+    na_cum_pairs = np.cumsum(np.bincount(na_pair_strat, minlength=i_strategies))
+    i_first, i_done = 0, 0
+    while i_first < i_strategies:
+        i_last = max(i_first + 1, np.searchsorted(na_cum_pairs, i_done + i_block_pairs, side='right'))
+        i_pair_lo, i_pair_hi = i_done, na_cum_pairs[i_last - 1]
+        i_lo, i_hi = np.searchsorted(na_strats, [i_first, i_last])
+        _value_block(na_values, na_prices_t, i_first, i_last, na_pair_strat[i_pair_lo:i_pair_hi] - i_first,
+                     na_pair_col[i_pair_lo:i_pair_hi], na_strats[i_lo:i_hi] - i_first,
+                     na_pair_of[i_lo:i_hi] - i_pair_lo, na_rows[i_lo:i_hi], na_cols[i_lo:i_hi],
+                     na_amt[i_lo:i_hi], starting_cash, dtype, b_each_order)
+        i_first, i_done = i_last, i_pair_hi
+    return na_values
+
+
+def _value_block(na_values, na_prices_t, i_first, i_last, na_pair_strat, na_pair_col, na_strats, na_pair_of,
+                 na_rows, na_cols, na_amt, starting_cash, dtype, b_each_order):
+    i_dates = na_prices_t.shape[1]
+    i_strategies = i_last - i_first
+    if len(na_rows) == 0:
+        return
+
+    # pairs x dates holdings and equities
+    na_cells = na_pair_of * i_dates + na_rows
+    na_holdings = _cumulated_changes(na_cells, na_amt, (len(na_pair_col), i_dates), 1, dtype)
+    na_equities = na_holdings * na_prices_t[na_pair_col]
+    na_equities[np.isnan(na_equities)] = 0
+
+    # Add every strategy's first pair, then every second pair and so on: each strategy adds its
+    # symbols one at a time in symbol order, exactly as portfolio_values does
+    na_starts = np.searchsorted(na_pair_strat, np.arange(i_strategies))
+    na_rank = np.arange(len(na_pair_strat)) - na_starts[na_pair_strat]
+    na_by_rank = np.argsort(na_rank, kind='mergesort')
+    na_rank_starts = np.searchsorted(na_rank[na_by_rank], np.arange(na_rank.max() + 2))
+    na_equity = np.zeros((i_strategies, i_dates))
+    for i in range(len(na_rank_starts) - 1):
+        na_pairs = na_by_rank[na_rank_starts[i]:na_rank_starts[i + 1]]
+        na_equity[na_pair_strat[na_pairs]] += na_equities[na_pairs]
+
+    # strategies x dates cash flows, with the starting cash on each strategy's first order day
+    na_charged = _charged_amounts(na_cells, na_amt, b_each_order)
+    na_flows = np.bincount(na_strats * i_dates + na_rows, weights=-na_charged * na_prices_t[na_cols, na_rows],
+                           minlength=i_strategies * i_dates).reshape(i_strategies, i_dates)
+    na_first_row = np.empty(i_strategies, dtype=np.int64)
+    na_first_row.fill(i_dates)
+    np.minimum.at(na_first_row, na_strats, na_rows)
+    na_active = np.nonzero(na_first_row < i_dates)[0]
+    na_flows[na_active, na_first_row[na_active]] += int(starting_cash)
+    na_nan = np.isnan(na_flows)
+    na_cash = np.where(na_nan, 0, na_flows).cumsum(axis=1)
+    na_cash[na_nan] = np.NAN
+
+    na_block = na_equity + na_cash
+    na_before = np.arange(i_dates) < na_first_row[:, np.newaxis]
+    na_block[na_before] = int(starting_cash)
+    na_values[:, i_first:i_last] = na_block.T
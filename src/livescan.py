@@ -0,0 +1,271 @@
+#-------------------------------------------------------------------------------
+# Name:        livescan.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import os
+import sys
+import time
+import datetime as dt
+
+import compact
+import datasession
+import predicates
+import profiling
+import tradingcalendar
+from eventset import EventSet
+
+
+STATE_FILE = '../out/livescan_state.npz'
+
+
+class LiveScanner:
+    """
+    Finds registered events one new day of prices at a time. Only the last few
+    days each event needs are kept, already filled the way remove_nan fills the
+    whole history, so each day costs O(symbols) per day of lookback instead of a
+    rescan of every day so far. Entry orders are given on the day of the event
+    and exit orders on the day they fall due; together with flush they are the
+    orders transactions_from_eventmatrix gives for a batch scan of the same days.
+    """
+
+    def __init__(self, ls_names, ls_symbols, benchmark, i_hold=5, i_shares=100, s_side='Buy', b_compact=False):
+        """
+        :param ls_names:    a list of registered event names
+        :param ls_symbols:  a list of symbols to scan, the benchmark among them
+        :param benchmark:   the symbol used for the benchmark equity (e.g. 'SPY')
+        :param i_hold:      number of trading days each position is held
+        :param i_shares:    number of shares traded per event
+        :param s_side:      'Buy' to enter long and exit with a Sell, 'Sell' to enter short and exit with a Buy
+        :param b_compact:   keep float32 prices and categorical order symbols, see compact.py
+        """
+        if benchmark not in ls_symbols:
+            raise ValueError("The benchmark %s is not one of the symbols" % benchmark)
+        self.ls_names = list(ls_names)
+        self.ls_symbols = list(ls_symbols)
+        self.benchmark = benchmark
+        self.i_hold = i_hold
+        self.i_shares = i_shares
+        self.s_side = s_side
+        self.b_compact = b_compact
+        self.dtype = compact.price_dtype(b_compact)
+
+        l_preds = [predicates.d_events[s_name] for s_name in self.ls_names]
+        self.i_lookback = max(pred.i_lookback for pred in l_preds)
+        self.ls_keys = sorted(set().union(*[pred.keys() for pred in l_preds]))
+
+        # the filled prices of the last i_lookback + 1 days, oldest first, and which symbols have had a price
+        i_symbols = len(self.ls_symbols)
+        self.d_ring = dict((s_key, np.empty((self.i_lookback + 1, i_symbols), dtype=self.dtype))
+                           for s_key in self.ls_keys)
+        self.d_seen = dict((s_key, np.zeros(i_symbols, dtype=bool)) for s_key in self.ls_keys)
+        self.i_days = 0
+        self.last = None
+
+        # the exits still to come: the day number each falls due, its symbol position and its event
+        self.na_due = np.zeros(0, dtype=np.int64)
+        self.na_pending_cols = np.zeros(0, dtype=np.int64)
+        self.na_pending_events = np.zeros(0, dtype=np.int64)
+
+    def push(self, timestamp, d_bar):
+        """
+        :param timestamp:   the day of the prices, after the last day pushed
+        :param d_bar:       a dict mapping each key the events read, e.g. 'actual_close', to that day's prices,
+                            a pandas series indexed by symbol or an array in ls_symbols order, NaN where missing
+        :return:            a dict mapping each name to an EventSet of the day's events, and a dict mapping each
+                            name to the day's orders: the exits due, then the entries
+        """
+        timestamp = pd.Timestamp(timestamp)
+        if self.last is not None and timestamp <= self.last:
+            raise ValueError("Prices for %s do not follow the last day pushed, %s" % (timestamp, self.last))
+        for s_key in self.ls_keys:
+            self._append(s_key, d_bar[s_key])
+        i_day = self.i_days
+        self.i_days += 1
+        self.last = timestamp
+
+        # the predicates see the days kept, or every day so far while there are fewer
+        i_rows = min(self.i_days, self.i_lookback + 1)
+        data = predicates.EventData.from_arrays(dict((s_key, na_ring[-i_rows:]) for s_key, na_ring in
+                                                     self.d_ring.items()), self.ls_symbols, self.benchmark)
+        na_due = self.na_due == i_day
+        d_found = {}
+        d_orders = {}
+        l_events = []
+        l_cols = []
+        for k, s_name in enumerate(self.ls_names):
+            na_cols = np.nonzero(predicates.d_events[s_name].evaluate(data)[-1])[0]
+            d_found[s_name] = EventSet([timestamp], self.ls_symbols, np.zeros(len(na_cols)), na_cols)
+            d_orders[s_name] = self._orders(timestamp, self.na_pending_cols[na_due & (self.na_pending_events == k)],
+                                            na_cols)
+            l_events.append(np.repeat(k, len(na_cols)))
+            l_cols.append(na_cols)
+
+        # today's entries exit i_hold days on
+        na_events = np.concatenate(l_events)
+        na_cols = np.concatenate(l_cols)
+        self.na_due = np.concatenate([self.na_due[~na_due], np.repeat(i_day + self.i_hold, len(na_cols))])
+        self.na_pending_cols = np.concatenate([self.na_pending_cols[~na_due], na_cols])
+        self.na_pending_events = np.concatenate([self.na_pending_events[~na_due], na_events])
+        return d_found, d_orders
+
+    def flush(self):
+        """
+        :return: a dict mapping each name to the exits of every position still open, dated the last day
+                 pushed, as a batch scan ending that day clamps them; they are no longer pending
+        """
+        d_orders = {}
+        for k, s_name in enumerate(self.ls_names):
+            d_orders[s_name] = self._orders(self.last, self.na_pending_cols[self.na_pending_events == k],
+                                            np.zeros(0, dtype=np.int64))
+        self.na_due = self.na_due[:0]
+        self.na_pending_cols = self.na_pending_cols[:0]
+        self.na_pending_events = self.na_pending_events[:0]
+        return d_orders
+
+    def _append(self, s_key, bar):
+        if isinstance(bar, pd.Series):
+            bar = bar.reindex(self.ls_symbols).values
+        na_bar = np.array(bar, dtype=self.dtype)
+        if na_bar.shape != (len(self.ls_symbols),):
+            raise ValueError("Expected %d %s prices, got %s" % (len(self.ls_symbols), s_key, na_bar.shape))
+        na_ring = self.d_ring[s_key]
+        na_seen = self.d_seen[s_key]
+        na_ring[:-1] = na_ring[1:]
+
+        # as remove_nan: a gap repeats the last price, a symbol that never had one is 1.0, and
+        # a symbol's first price fills the days before it
+        na_missing = np.isnan(na_bar)
+        na_bar[na_missing] = np.where(na_seen[na_missing], na_ring[-2, na_missing], 1.0)
+        na_first = ~na_missing & ~na_seen
+        na_ring[:, na_first] = na_bar[na_first]
+        na_ring[-1] = na_bar
+        na_seen |= na_first
+
+    def _orders(self, timestamp, na_exit_cols, na_entry_cols):
+        # the same columns as transactions_from_eventmatrix
+        s_exit = 'Sell' if self.s_side == 'Buy' else 'Buy'
+        na_cols = np.concatenate([na_exit_cols, na_entry_cols]).astype(np.int64)
+        if self.b_compact:
+            symbols = pd.Categorical.from_codes(na_cols, categories=self.ls_symbols)
+        else:
+            symbols = np.asarray(self.ls_symbols, dtype=object)[na_cols]
+        i_orders = len(na_cols)
+        return pd.DataFrame({0: np.repeat(timestamp.year, i_orders),
+                             1: np.repeat(timestamp.month, i_orders),
+                             2: np.repeat(timestamp.day, i_orders),
+                             3: symbols,
+                             4: np.array([s_exit] * len(na_exit_cols) + [self.s_side] * len(na_entry_cols),
+                                         dtype=object),
+                             5: np.repeat(self.i_shares, i_orders),
+                             6: np.repeat(' ', i_orders)},
+                            columns=range(7))
+
+    def save(self, filename):
+        """
+        :param filename: the path of the state file, usually ending in .npz
+        """
+        d_arrays = dict(('ring_' + s_key, self.d_ring[s_key]) for s_key in self.ls_keys)
+        d_arrays.update(('seen_' + s_key, self.d_seen[s_key]) for s_key in self.ls_keys)
+        with open(filename, 'wb') as f:
+            np.savez(f, names=np.array(self.ls_names), symbols=np.array(self.ls_symbols),
+                     benchmark=np.array(self.benchmark), side=np.array(self.s_side),
+                     params=np.array([self.i_hold, self.i_shares, self.b_compact, self.i_days]),
+                     last=np.array(self.last.value if self.last is not None else -1),
+                     due=self.na_due, pending_cols=self.na_pending_cols, pending_events=self.na_pending_events,
+                     **d_arrays)
+
+    @staticmethod
+    def load(filename):
+        """
+        :param filename: the path of a state file written by save
+        :return: the LiveScanner as it was saved, ready for the next day
+        """
+        with np.load(filename) as npz:
+            i_hold, i_shares, b_compact, i_days = npz['params'].tolist()
+            scanner = LiveScanner(npz['names'].tolist(), npz['symbols'].tolist(), str(npz['benchmark']), i_hold,
+                                  i_shares, str(npz['side']), bool(b_compact))
+            for s_key in scanner.ls_keys:
+                scanner.d_ring[s_key] = npz['ring_' + s_key]
+                scanner.d_seen[s_key] = npz['seen_' + s_key]
+            scanner.i_days = i_days
+            i_last = int(npz['last'])
+            scanner.last = pd.Timestamp(i_last) if i_last >= 0 else None
+            scanner.na_due = npz['due']
+            scanner.na_pending_cols = npz['pending_cols']
+            scanner.na_pending_events = npz['pending_events']
+        return scanner
+
+
+def main(b_compact=False, enddate=None):
+    """
+    :param enddate: the last day to scan, now by default; a day counts once its close has passed
+    """
+    startdate = dt.datetime(2008, 1, 1)
+    if enddate is None:
+        enddate = dt.datetime.now()
+
+    # only a few new days are read, so there is no price store to keep days whose data is not out yet
+    session = datasession.get_session()
+
+    # a saved scanner carries on from the day after its last one; the first run starts from scratch
+    if os.path.exists(STATE_FILE):
+        scanner = LiveScanner.load(STATE_FILE)
+        startdate = scanner.last + dt.timedelta(days=1)
+    else:
+        ls_symbols = session.get_symbols_from_list('sp5002012')
+        benchmark = 'SPY'
+        ls_symbols.append(benchmark)
+        scanner = LiveScanner(['price_cross_below_five'], ls_symbols, benchmark, b_compact=b_compact)
+    timestamps = tradingcalendar.get_calendar().days(startdate, enddate, tradingcalendar.CLOSE)
+    if len(timestamps) == 0:
+        print "No new days after %s" % scanner.last
+        return
+
+    # only the new days and the keys the events read are fetched
+    with profiling.span('read'):
+        ldf_data = session.get_data(timestamps, scanner.ls_symbols, scanner.ls_keys)
+    d_values = dict((s_key, df.reindex(columns=scanner.ls_symbols).values) for s_key, df in
+                    zip(scanner.ls_keys, ldf_data))
+
+    # days with no prices at all are not out yet; they are left for the next run rather than filled
+    na_priced = np.zeros(len(timestamps), dtype=bool)
+    for na_values in d_values.values():
+        na_priced |= ~np.isnan(na_values).all(axis=1)
+    i_days = np.nonzero(na_priced)[0][-1] + 1 if na_priced.any() else 0
+    if i_days == 0:
+        print "No prices yet after %s" % scanner.last
+        return
+
+    d_new = dict((s_name, []) for s_name in scanner.ls_names)
+    with profiling.span('events'):
+        for i, timestamp in enumerate(timestamps[:i_days]):
+            d_found, d_orders = scanner.push(timestamp, dict((s_key, na_values[i]) for s_key, na_values in
+                                                             d_values.items()))
+            for s_name, orders in d_orders.items():
+                d_new[s_name].append(orders)
+
+    with profiling.span('write'):
+        for s_name, l_orders in d_new.items():
+            transactions = pd.concat(l_orders)
+            print "%s: %d new orders through %s" % (s_name, len(transactions), scanner.last.date())
+            with open('../out/' + s_name + '_live_orders.csv', 'a') as f:
+                transactions.to_csv(f, header=False, index=False)
+        scanner.save(STATE_FILE)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    profiling.enable_from_env()
+    ls_args = [s_arg for s_arg in sys.argv[1:] if s_arg != '--compact']
+    # an optional end date such as 2012-12-31
+    main(b_compact='--compact' in sys.argv[1:],
+         enddate=dt.datetime.strptime(ls_args[0], '%Y-%m-%d') + tradingcalendar.CLOSE if ls_args else None)
+    print "--------"
+    print "Program execution time: %s seconds" % (time.time() - start_time)
+    if profiling.is_enabled():
+        profiling.print_report()
+        profiling.write_report('../out/livescan_profile')
@@ -11,108 +11,198 @@ import pandas as pd
 import numpy as np
 import datetime as dt
 import os
+import sys
 import time
-import QSTK.qstkutil.qsdateutil as du
-import QSTK.qstkutil.DataAccess as da
-import QSTK.qstkutil.tsutil as tsu
 import matplotlib.pyplot as plt
 
+import ledger
+import compact
+import datasession
+import orders as orders_io
+import profiling
+import perfstats
+import tradingcalendar
+import valueio
 
-def portfolio_from_orders(filename, starting_cash):
+
+def portfolio_from_orders(filename, starting_cash, b_compact=False, b_each_order=False):
     """
     :param filename:        the path to a csv file containing a list of orders
     :param starting_cash:   starting portfolio capital
+    :param b_compact:       book float32 prices into int32 holdings, see compact.py
+    :param b_each_order:    charge every order its own quantity rather than the day's net change in
+                            its symbol, see ledger.extend
     :return:                a pandas dataframe containing the value of the portfolio per trading day
     """
+    return extend_portfolio(read_orders(filename), ledger.LedgerState(starting_cash, b_compact, b_each_order))
+
 
-    # read in the csv file; remove the trailing newline crap from the end of each line
-    csv_headers = ('year', 'month', 'day', 'symbol', 'ordertype', 'amt', 'junk')
-    orders = pd.read_csv(filename, header=None, names=csv_headers)
-    del orders['junk']
+def update_portfolio(filename, starting_cash, checkpoint_file, enddate=None, b_compact=False, b_each_order=False):
+    """
+    :param filename:        the path to a csv file of the orders placed since the last update
+    :param starting_cash:   starting portfolio capital, used when there is no checkpoint yet
+    :param checkpoint_file: the path to the saved ledger state; created by the first update
+    :param enddate:         the last day to value, the day of the last order by default
+    :param b_compact:       the mode of a new ledger, see compact.py; a checkpoint keeps its own
+    :param b_each_order:    how a new ledger charges orders, see ledger.extend; a checkpoint keeps its own
+    :return:                a pandas dataframe containing the value of the portfolio on each trading
+                            day since the last update; appended to the earlier ones, it is the same
+                            as portfolio_from_orders on all the orders
+    """
+    if os.path.exists(checkpoint_file):
+        state = ledger.LedgerState.load(checkpoint_file)
+    else:
+        state = ledger.LedgerState(starting_cash, b_compact, b_each_order)
+    portfolio = extend_portfolio(read_orders(filename), state, enddate)
+    state.save(checkpoint_file)
+    return portfolio
 
-    # construct an initial orders dataframe, sorted by date ascending
-    dates_arr = [dt.datetime(s['year'], s['month'], s['day']) for (i, s) in orders.iterrows()]
-    orders_dict = {'date': dates_arr,
-                   'symbol': orders['symbol'],
-                   'ordertype': orders['ordertype'],
-                   'amt': orders['amt']}
-    orders_headers = ('date', 'symbol', 'ordertype', 'amt')
-    orders = pd.DataFrame(orders_dict, columns=orders_headers)
-    orders = orders.sort(columns='date', axis=0, ascending=True)
 
-    # Map each Buy/Sell transaction to a net quantity change
-    orders['ordertype'] = orders['ordertype'].map(lambda x: 1 if x == 'Buy' else -1)
-    orders['amt'] = orders['amt'] * orders['ordertype']
-    del orders['ordertype']
+def read_orders(filename):
+    """
+    :param filename:    the path to a csv file containing a list of orders, or a binary orders file
+                        (see orders.save_orders)
+    :return:            a pandas dataframe of orders with a date, symbol and signed amt per row;
+                        orders for invalid symbols are dropped
+    """
 
-    # Creating an object of the dataaccess class with Yahoo as the source
-    dataobj = da.DataAccess('Yahoo')
+    # stream the file in chunks; trailing commas and several orders per line are fine
+    with profiling.span('read_orders'):
+        orders = orders_io.read_orders(filename)
 
     # Remove all the transactions with invalid symbols
-    all_symbols = dataobj.get_all_symbols()
+    all_symbols = datasession.get_session().get_all_symbols()
     bad_symbols = list(set(orders['symbol']) - set(all_symbols))
     if len(bad_symbols) != 0:
         print "Portfolio contains invalid symbols : ", bad_symbols
-    for bad_symbol in bad_symbols:
-        orders = orders[orders['symbol'] != bad_symbol]
+        orders = orders[orders['symbol'].isin(all_symbols)]
+
+    return orders
+
+
+def extend_portfolio(orders, state, enddate=None):
+    """
+    :param orders:      a pandas dataframe of orders as returned by read_orders, all after the state's last day
+    :param state:       a ledger.LedgerState, moved on to enddate
+    :param enddate:     the last day to value, the day of the last order by default
+    :return:            a pandas dataframe containing the value of the portfolio on each trading day
+                        after the state's last day; only these days are read and booked
+    """
+    if state.dt_last is not None and (orders['date'] <= state.dt_last).any():
+        raise ValueError("Orders on or before %s are already booked; rerun portfolio_from_orders on all the orders"
+                         % state.dt_last)
 
     # calculate date boundaries
-    startdate = orders.irow(0)['date']
-    enddate = orders.irow(-1)['date']
+    if state.dt_last is not None:
+        startdate = state.dt_last + dt.timedelta(days=1)
+    else:
+        startdate = orders['date'].min()
+    if enddate is None:
+        enddate = orders['date'].max() if len(orders) > 0 else state.dt_last
+    if (len(orders) == 0 and state.dt_last is None) or enddate < startdate:
+        return pd.DataFrame(columns=['value'], index=pd.DatetimeIndex([]))
+
+    # every symbol ever traded is kept in the ledger, so one sum order serves the whole history
+    state.add_symbols(orders['symbol'])
+    timestamps, na_prices, na_rows, na_cols, orders = _price_grid(orders, state.ls_symbols, startdate, enddate,
+                                                                  state.b_compact)
+
+    # Build the holdings and cash ledgers in bulk
+    with profiling.span('ledger'):
+        na_holdings, na_cash = ledger.extend(state, na_prices, na_rows, na_cols, orders['amt'].values)
+        state.dt_last = enddate
+
+        # Create the overall portfolio df from equities and cash
+        portfolio = pd.DataFrame(ledger.portfolio_values(na_prices, na_holdings, na_cash),
+                                 index=timestamps, columns=['value'])
+
+    return portfolio
+
+
+def portfolios_from_orders(l_orders, starting_cash, b_compact=False, b_each_order=False):
+    """
+    :param l_orders:        a list of order sets, each a path to an order file or a dataframe of orders
+                            as returned by read_orders
+    :param starting_cash:   starting capital of every order set
+    :param b_compact:       book float32 prices into int32 holdings, see compact.py
+    :param b_each_order:    charge every order its own quantity, see ledger.extend
+    :return:                a pandas dataframe of portfolio values, one column per order set (named by its
+                            path, or its position in the list), over the trading days from the first order
+                            of any set to the last; each column holds the starting cash until its own first
+                            order and from there matches portfolio_from_orders
+    """
+    ldf_orders = [read_orders(orders) if isinstance(orders, basestring) else orders for orders in l_orders]
+    columns = [orders if isinstance(orders, basestring) else i for i, orders in enumerate(l_orders)]
+    na_strats = np.repeat(np.arange(len(ldf_orders)), [len(df) for df in ldf_orders])
+    orders = pd.DataFrame({'date': np.concatenate([df['date'].values for df in ldf_orders]),
+                           'symbol': np.concatenate([np.asarray(df['symbol'], dtype=object) for df in ldf_orders]),
+                           'amt': np.concatenate([df['amt'].values for df in ldf_orders]),
+                           'strat': na_strats}, columns=('date', 'symbol', 'amt', 'strat'))
+    if len(orders) == 0:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([]))
+
+    # One calendar and one price read for the union of every set's symbols and dates
+    symbols = sorted(set(orders['symbol']))
+    timestamps, na_prices, na_rows, na_cols, orders = _price_grid(orders, symbols, orders['date'].min(),
+                                                                 orders['date'].max(), b_compact)
+
+    with profiling.span('ledger'):
+        na_values = ledger.batch_values(na_prices, orders['strat'].values, na_rows, na_cols, orders['amt'].values,
+                                        len(ldf_orders), starting_cash, b_compact=b_compact,
+                                        b_each_order=b_each_order)
+
+    return pd.DataFrame(na_values, index=timestamps, columns=columns)
+
+
+def _price_grid(orders, symbols, startdate, enddate, b_compact=False):
+    """
+    :return: the trading days from startdate to enddate, a days x symbols array of close prices (float32
+             when b_compact), the day and symbol positions of the orders and the orders themselves, less
+             any on non-trading days
+    """
 
-    # Get a list of trading days between the start and the end
-    ldt_timestamps = du.getNYSEdays(startdate, enddate + dt.timedelta(hours=16), dt.timedelta(hours=16))
+    # The trading days between the start and the end, both at midnight and at the close the data is stamped with
+    calendar = tradingcalendar.get_calendar()
+    i_first, i_end = calendar.bounds(startdate, enddate)
+    timestamps = calendar.index[i_first:i_end]
 
     # Reading the data, now d_data is a dictionary with the keys above
     ls_keys = ['close']
-    symbols = list(set(orders['symbol']))
-    ##print "Relevant symbols: %", symbols
 
-    ldf_data = dataobj.get_data(ldt_timestamps, symbols, ls_keys)
+    # Share the data session with the other stages, so prices already read are not read again
+    dataobj = datasession.get_session()
+    with profiling.span('prices'):
+        ldf_data = dataobj.get_data(calendar.close_index[i_first:i_end], symbols, ls_keys)
     d_data = dict(zip(ls_keys, ldf_data))
 
-    # Copying close price into separate dataframe to find rets
-    prices = d_data['close'].copy()
-
     # Filling the data.
     #prices = prices.fillna(method='ffill')
     #prices = prices.fillna(method='bfill')
 
-    # Subtract 16 hours from each of the dates in the index
-    tmpDates = pd.DataFrame([date - dt.timedelta(hours=16) for date in prices.index], index=prices.index, columns=['date'])
-    prices = prices.join(tmpDates)
-    prices = prices.set_index('date')
-
-    # Create the holdings df from orders
-    timestamps = du.getNYSEdays(startdate, enddate)
-    holdings_change = pd.DataFrame(np.zeros((len(timestamps), len(symbols)), dtype=np.int), columns=symbols, index=timestamps)
-    for (i, s) in orders.iterrows():
-        holdings_change.ix[s['date'], s['symbol']] = s['amt'] + holdings_change.ix[s['date'], s['symbol']]
-    holdings = holdings_change.cumsum(axis=0)
-
-    # Create the equities df from holdings and prices
-    equities = (holdings * prices).sum(axis=1)
-
-    # Create the cash df from orders, holdings_change, prices, and starting cash
-    cash_change = pd.DataFrame(np.zeros((len(timestamps), 1)), columns=['value'], index=timestamps)
-    for (i, s) in orders.iterrows():
-        cash_change.ix[s['date']] += -1 * holdings_change.ix[s['date'], s['symbol']] * prices.ix[s['date'], s['symbol']]
-    cash_change.ix[0] += int(starting_cash)
-    cash = cash_change.cumsum(axis=0)
-
-    # Create the overall portfolio df from equities and cash
-    portfolio = equities + cash
-
-    ##print "timestamps: %", timestamps
-    ##print "orders: %", orders.ix[0:5]
-    ##print "prices: %", prices.ix[0:5]
-    ##print "holdings: %", holdings.ix[0:5]
-    ##print "equities: %", equities.ix[0:5]
-    ##print "cash_change: %", cash_change.ix[0:5]
-    ##print "cash: %", cash.values
-    ##print "total portfolio: %", portfolio
+    # The prices come back on the days asked for, so their rows are the trading days; the orders
+    # are lined up with the price grid through the calendar
+    na_prices = d_data['close'].reindex(columns=symbols).values.astype(compact.price_dtype(b_compact), copy=False)
+    na_rows = calendar.positions(orders['date']) - i_first
+    na_rows[(na_rows < 0) | (na_rows >= len(timestamps))] = -1
+    na_cols = pd.Index(symbols).get_indexer(orders['symbol'])
+    if (na_rows < 0).any():
+        print "Orders on non-trading days ignored : ", list(orders['date'][na_rows < 0])
+        orders = orders[na_rows >= 0]
+        na_cols = na_cols[na_rows >= 0]
+        na_rows = na_rows[na_rows >= 0]
 
-    return portfolio
+    return timestamps, na_prices, na_rows, na_cols, orders
+
+
+def portfolio_statistics(portfolio):
+    """
+    :param portfolio:   a pandas dataframe containing the value of the portfolio per trading day
+    :return:            the Sharpe ratio, volatility (sample stdev of daily returns), average daily
+                        return and cumulative return of the portfolio
+    """
+
+    d_stats = perfstats.statistics(portfolio['value'].values)
+    return tuple(d_stats[s_stat][0] for s_stat in ('sharpe', 'volatility', 'avg_daily_ret', 'cum_ret'))
 
 
 def compare_portfolio_to_benchmark(portfolio, benchmark):
@@ -124,29 +214,22 @@ def compare_portfolio_to_benchmark(portfolio, benchmark):
 
     # Compute normalized returns
     portfolio['value_norm'] = portfolio['value'] / float(portfolio.ix[0, 'value'])
-    # Compute daily normalized returns
-    rets_norm = portfolio['value_norm'].copy()
-    tsu.returnize0(rets_norm)
-
-    # Compute the statistics
-    volatility = rets_norm.std()
-    avg_daily_ret = rets_norm.mean()
-    sharpe = np.sqrt(252) * avg_daily_ret / volatility
-    cum_ret = portfolio['value_norm'][-1]
-
-    # Do the same for the benchmark equity
-    c_dataobj = da.DataAccess('Yahoo') ##, cachestalltime=0)
-    ls_keys = ['close']
-    ldf_data = c_dataobj.get_data(list(portfolio.index + dt.timedelta(hours=16)), [benchmark], ls_keys)
-    d_data_b = dict(zip(ls_keys, ldf_data))
-    na_price_b = d_data_b['close'].values
-    na_normalized_price_b = na_price_b / na_price_b[0]
-    rets_norm_b = na_normalized_price_b.copy()
-    tsu.returnize0(rets_norm_b)
-    volatility_b = rets_norm_b.std()
-    avg_daily_ret_b = rets_norm_b.mean()
-    sharpe_b = np.sqrt(252) * avg_daily_ret_b / volatility_b
-    cum_ret_b = na_normalized_price_b[-1][0]
+
+    with profiling.span('statistics'):
+        # Compute the statistics
+        sharpe, volatility, avg_daily_ret, cum_ret = portfolio_statistics(portfolio)
+
+        # Do the same for the benchmark equity
+        c_dataobj = datasession.get_session()
+        ls_keys = ['close']
+        ldf_data = c_dataobj.get_data(list(portfolio.index + dt.timedelta(hours=16)), [benchmark], ls_keys)
+        d_data_b = dict(zip(ls_keys, ldf_data))
+        na_price_b = d_data_b['close'].values
+        na_normalized_price_b = na_price_b / na_price_b[0]
+        # numpy's population stdev, and no skipping of missing days, as this has always been
+        d_stats_b = perfstats.statistics(na_price_b, i_ddof=0, b_skipna=False)
+        sharpe_b, volatility_b, avg_daily_ret_b, cum_ret_b = [d_stats_b[s_stat][0] for s_stat in
+                                                              ('sharpe', 'volatility', 'avg_daily_ret', 'cum_ret')]
 
     print "--------"
     print "Sharpe Ratio of Fund: %s" % sharpe
@@ -161,12 +244,13 @@ def compare_portfolio_to_benchmark(portfolio, benchmark):
     print "Average Daily Return of Fund: %s" % avg_daily_ret
     print "Average Daily Return %s: %s" % (benchmark, avg_daily_ret_b)
 
-    plt.clf()
-    plt.plot(portfolio.index, portfolio['value_norm'], portfolio.index, na_normalized_price_b)
-    plt.legend(['Portfolio', benchmark])
-    plt.ylabel('Adjusted Close')
-    plt.xlabel('Date')
-    plt.show()
+    with profiling.span('plot'):
+        plt.clf()
+        plt.plot(portfolio.index, portfolio['value_norm'], portfolio.index, na_normalized_price_b)
+        plt.legend(['Portfolio', benchmark])
+        plt.ylabel('Adjusted Close')
+        plt.xlabel('Date')
+        plt.show()
 
     return
 
@@ -175,33 +259,22 @@ def write_portfolio_to_csv_file(portfolio, filename):
     """
     :param portfolio:   a pandas dataframe containing the value of the portfolio on each trading day
     :param filename:    a string specifying the output csv filename
-    :return:            nothing, just create a csv file representing the porfolio
+    :return:            nothing, just create a csv file in ../out/ of year,month,day,value rows
     :note:              not currently used
     """
 
-    # Cast all the values to integers
-    portfolio['value'] = portfolio['value'].map(int)
-
-    # Split the datetime objects to year, month, and day integers
-    portfolio['year'] = [i.year for (i, s) in portfolio.iterrows()]
-    portfolio['month'] = [i.month for (i, s) in portfolio.iterrows()]
-    portfolio['day'] = [i.day for (i, s) in portfolio.iterrows()]
-
-    # Write the columns to a csv file
-    os.chdir('../out/')
-    portfolio.to_csv(filename, cols=['year', 'month', 'day', 'value'], header=False, index=False)
-    os.chdir('../src/')
+    valueio.write_values(portfolio[['value']], os.path.join('../out/', filename))
 
     return
 
 
-def main():
+def main(b_compact=False, b_each_order=False):
 
     orders_file = os.path.relpath('../out/five_dollar_event_orders.csv')
     starting_cash = 50000
     benchmark = '$SPX'
 
-    p = portfolio_from_orders(orders_file, starting_cash)
+    p = portfolio_from_orders(orders_file, starting_cash, b_compact, b_each_order)
     compare_portfolio_to_benchmark(p, benchmark)
     #write_portfolio_to_csv_file(p, 'marketsim_portf_results.csv')
 
@@ -210,7 +283,11 @@ def main():
 
 if __name__ == '__main__':
     start_time = time.time()
-    main()
+    profiling.enable_from_env()
+    main(b_compact='--compact' in sys.argv[1:], b_each_order='--each-order' in sys.argv[1:])
     print "--------"
     print "Program execution time: %s seconds" % (time.time() - start_time)
+    if profiling.is_enabled():
+        profiling.print_report()
+        profiling.write_report('../out/marketsim_profile')
 
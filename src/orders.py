@@ -0,0 +1,205 @@
+#-------------------------------------------------------------------------------
+# Name:        orders.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import os
+import re
+import time
+
+
+ORDER_FIELDS = 6
+SIDES = ('Buy', 'Sell')
+# a number field that fromstring reads whole; plain digits need no matching
+INTEGER = re.compile(r'[+-]?\d+\Z')
+NUMBER = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\Z')
+
+
+def iter_order_tokens(filename, i_chunk_bytes=16 * 1024 * 1024):
+    """
+    Stream an order csv file as fields. Commas and line breaks both separate fields and
+    empty fields are dropped, so trailing commas, Mac line endings and several orders on
+    one line are all read the same. Blanks around a field are dropped, blanks inside it are kept.
+    Every line must hold whole orders: a line with an extra or a missing field raises ValueError
+    rather than shifting the fields of the orders after it.
+
+    :param filename:        the path to a csv file of orders
+    :param i_chunk_bytes:   how much of the file to read at a time
+    :return:                a generator of lists of whole orders, six fields each: year, month, day,
+                            symbol, side and amount, in file order
+    """
+    s_carry = ''
+    with open(filename, 'rb') as f:
+        while True:
+            s_data = f.read(i_chunk_bytes)
+            s_text = s_carry + s_data
+            # the last line may be cut in two by the chunk boundary
+            s_carry = ''
+            if s_data:
+                i_cut = max(s_text.rfind('\n'), s_text.rfind('\r')) + 1
+                s_text, s_carry = s_text[:i_cut], s_text[i_cut:]
+            _check_line_fields(filename, s_text)
+            s_text = s_text.replace('\r', ',').replace('\n', ',')
+            ls_tokens = s_text.split(',')
+            if ' ' in s_text or '\t' in s_text:
+                ls_tokens = [s_token.strip(' \t') for s_token in ls_tokens]
+            ls_tokens = filter(None, ls_tokens)
+            if ls_tokens:
+                yield ls_tokens
+            if not s_data:
+                break
+
+
+def _check_line_fields(filename, s_text):
+    # counts the non-blank fields of every line at once, from where the separators are;
+    # with the blanks taken out, a field is empty when two separators touch
+    s_solid = s_text.translate(None, ' \t')
+    if not s_solid:
+        return
+    na_bytes = np.frombuffer(s_solid, dtype=np.uint8)
+    na_break = (na_bytes == ord('\n')) | (na_bytes == ord('\r'))
+    # each field ends at a separator or at the end of the text
+    na_ends = np.append(np.flatnonzero(na_break | (na_bytes == ord(','))), len(na_bytes))
+    na_filled = np.diff(np.append(-1, na_ends)) > 1
+    # a field's line is the number of line breaks before it
+    na_line = np.append(0, np.cumsum(na_break[na_ends[:-1]]))
+    na_fields = np.bincount(na_line, weights=na_filled)
+    na_bad = np.flatnonzero(na_fields % ORDER_FIELDS)
+    if len(na_bad):
+        s_line = s_text.replace('\r', '\n').split('\n')[na_bad[0]]
+        raise ValueError("%s has a line of %d fields, not whole orders of %d: %r"
+                         % (filename, na_fields[na_bad[0]], ORDER_FIELDS, s_line))
+
+
+def read_orders_csv(filename, i_chunk_bytes=16 * 1024 * 1024):
+    """
+    :param filename:        the path to a csv file of orders
+    :param i_chunk_bytes:   how much of the file to parse at a time; only the compact
+                            columns of the chunks already parsed are kept
+    :return:                a pandas dataframe of orders with a date, categorical symbol and
+                            signed amt per row, positive for Buy
+    """
+    ls_dates, ls_codes, ls_amts = [], [], []
+    d_codes = {}
+    for ls_tokens in iter_order_tokens(filename, i_chunk_bytes):
+        # Every sixth field belongs to the same column; numbers are parsed in C a column at a time
+        na_ymd = _parse_column(ls_tokens[0::6], np.int32) * 10000 + \
+                 _parse_column(ls_tokens[1::6], np.int32) * 100 + _parse_column(ls_tokens[2::6], np.int32)
+        ls_dates.append(na_ymd)
+
+        # Give each new symbol the next code, then map the chunk through its distinct symbols
+        na_inverse, ls_symbols = pd.factorize(ls_tokens[3::6])
+        for s_sym in ls_symbols:
+            if s_sym.split() != [s_sym]:
+                raise ValueError("Invalid symbol in the orders: %r" % s_sym)
+        na_map = np.empty(len(ls_symbols), dtype=np.int32)
+        for i, s_sym in enumerate(ls_symbols):
+            na_map[i] = d_codes.setdefault(s_sym, len(d_codes))
+        ls_codes.append(na_map[na_inverse])
+
+        na_amt = np.rint(_parse_column(ls_tokens[5::6], np.float64)).astype(np.int64)
+        na_sides = np.array(ls_tokens[4::6])
+        na_buy = na_sides == SIDES[0]
+        na_bad = ~na_buy & (na_sides != SIDES[1])
+        if na_bad.any():
+            raise ValueError("Invalid side in the orders: %r" % na_sides[na_bad][0])
+        ls_amts.append(np.where(na_buy, na_amt, -na_amt))
+
+    ls_symbols = sorted(d_codes, key=d_codes.get)
+    return _orders_frame(_concat(ls_dates, np.int32), _concat(ls_codes, np.int32), ls_symbols,
+                         _concat(ls_amts, np.int64))
+
+
+def save_orders(orders, filename):
+    """
+    :param orders:      a pandas dataframe of orders as returned by read_orders
+    :param filename:    the path of the binary orders file, usually ending in .npz
+    :return:            nothing; dates are stored as yyyymmdd integers, symbols as codes into a
+                        symbol table and amounts as signed integers
+    """
+    symbols = pd.Categorical(orders['symbol'])
+    dates = pd.DatetimeIndex(orders['date'])
+    na_ymd = (dates.year * 10000 + dates.month * 100 + dates.day).astype(np.int32)
+    with open(filename, 'wb') as f:
+        np.savez(f, date=na_ymd, code=np.asarray(symbols.codes, dtype=np.int32),
+                 symbols=np.array(list(symbols.categories), dtype=str),
+                 amt=np.asarray(orders['amt'], dtype=np.int64))
+
+
+def load_orders(filename):
+    """
+    :param filename:    the path of a binary orders file written by save_orders
+    :return:            a pandas dataframe of orders, the same as read_orders on the original csv
+    """
+    with np.load(filename) as npz:
+        return _orders_frame(npz['date'], npz['code'], list(npz['symbols']), npz['amt'])
+
+
+def read_orders(filename):
+    """
+    :param filename:    the path to a csv file of orders, or a binary orders file ending in .npz
+    :return:            a pandas dataframe of orders with a date, categorical symbol and signed amt per row
+    """
+    if filename.endswith('.npz'):
+        return load_orders(filename)
+    return read_orders_csv(filename)
+
+
+def ymd_to_dates(na_ymd):
+    """
+    :param na_ymd:  an array of yyyymmdd integers
+    :return:        a datetime64 array of the same days, built without parsing strings
+    """
+    na_ymd = np.asarray(na_ymd, dtype=np.int64)
+    na_year, na_month, na_day = na_ymd // 10000, na_ymd // 100 % 100, na_ymd % 100
+    na_dates = (na_year - 1970).astype('M8[Y]').astype('M8[M]') + (na_month - 1).astype('m8[M]')
+    na_dates = na_dates.astype('M8[D]') + (na_day - 1).astype('m8[D]')
+
+    # an impossible day such as Feb 30 rolls over into the next month
+    na_bad = (na_dates.astype('M8[M]') - na_dates.astype('M8[Y]')).astype(np.int64) != na_month - 1
+    na_bad |= (na_month < 1) | (na_month > 12) | (na_day < 1)
+    if na_bad.any():
+        raise ValueError("Invalid order dates: %s" % list(na_ymd[na_bad][:10]))
+    return na_dates
+
+
+def _orders_frame(na_ymd, na_codes, ls_symbols, na_amt):
+    orders_dict = {'date': ymd_to_dates(na_ymd).astype('M8[ns]'),
+                   'symbol': pd.Categorical.from_codes(na_codes, categories=ls_symbols),
+                   'amt': na_amt}
+    orders_headers = ('date', 'symbol', 'amt')
+    return pd.DataFrame(orders_dict, columns=orders_headers)
+
+
+def _parse_column(ls_values, dtype):
+    # fromstring stops quietly at junk such as the x of '1e2x', so anything but digits is matched first
+    s_values = ','.join(ls_values)
+    if s_values.translate(None, '0123456789,'):
+        re_number = INTEGER if np.dtype(dtype).kind == 'i' else NUMBER
+        for s_value in ls_values:
+            if not re_number.match(s_value):
+                raise ValueError("Not a number in the orders: %s" % s_value)
+    return np.fromstring(s_values, dtype=dtype, sep=',')
+
+
+def _concat(ls_arrays, dtype):
+    if not ls_arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(ls_arrays)
+
+
+def main():
+    orders_file = '../out/five_dollar_event_orders.csv'
+    orders = read_orders_csv(orders_file)
+    save_orders(orders, os.path.splitext(orders_file)[0] + '.npz')
+    print "%s orders in %s symbols" % (len(orders), len(orders['symbol'].cat.categories))
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    main()
+    print "--------"
+    print "Program execution time: %s seconds" % (time.time() - start_time)
@@ -0,0 +1,158 @@
+#-------------------------------------------------------------------------------
+# Name:        perfstats.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+
+
+TRADING_DAYS = 252
+
+
+def daily_returns(na_values):
+    """
+    :param na_values:   a dates x portfolios array of values
+    :return:            the daily returns of the normalized values, 0 on the first day, like tsu.returnize0
+    """
+    na_values = _as_matrix(na_values)
+    na_norm = na_values / na_values[0, :]
+    na_rets = np.zeros(na_norm.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        na_rets[1:, :] = na_norm[1:, :] / na_norm[:-1, :] - 1
+    return na_rets
+
+
+def statistics(na_values, i_ddof=1, b_skipna=True):
+    """
+    :param na_values:   a dates x portfolios array of values (a single series is one portfolio)
+    :param i_ddof:      delta degrees of freedom of the volatility: 1 like pandas' std, 0 like numpy's
+    :param b_skipna:    leave NaN returns out, like pandas; otherwise they make the statistics NaN, like numpy
+    :return:            a dict of arrays with one entry per portfolio: 'sharpe', 'volatility' (stdev of
+                        the daily returns), 'avg_daily_ret' and 'cum_ret' (the last normalized value)
+    """
+    na_values = _as_matrix(na_values)
+    na_rets = daily_returns(na_values)
+    if b_skipna:
+        na_valid = ~np.isnan(na_rets)
+        na_rets = np.where(na_valid, na_rets, 0)
+        na_count = na_valid.sum(axis=0)
+    else:
+        na_valid = True
+        na_count = np.repeat(len(na_rets), na_rets.shape[1])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_daily_ret = na_rets.sum(axis=0) / na_count
+        na_dev = np.where(na_valid, na_rets - avg_daily_ret, 0)
+        volatility = np.sqrt(np.einsum('ij,ij->j', na_dev, na_dev) / (na_count - i_ddof))
+        sharpe = np.sqrt(TRADING_DAYS) * avg_daily_ret / volatility
+    cum_ret = na_values[-1, :] / na_values[0, :]
+
+    return {'sharpe': sharpe,
+            'volatility': volatility,
+            'avg_daily_ret': avg_daily_ret,
+            'cum_ret': cum_ret}
+
+
+def rolling_statistics(na_values, i_window, i_ddof=1):
+    """
+    Statistics of the daily returns over a trailing window ending on each day, from running
+    sums of the returns and their squares, so every day costs the same whatever the window.
+    NaN returns are left out. Days with fewer than i_window days behind them are NaN.
+
+    :param na_values:   a dates x portfolios array of values
+    :param i_window:    number of daily returns in each window
+    :param i_ddof:      delta degrees of freedom of the volatility
+    :return:            a dict of dates x portfolios arrays: 'sharpe', 'volatility', 'avg_daily_ret'
+                        and 'cum_ret' (the value over the value i_window days before)
+    """
+    na_values = _as_matrix(na_values)
+    na_rets = daily_returns(na_values)
+    na_valid = ~np.isnan(na_rets)
+    na_rets = np.where(na_valid, na_rets, 0)
+
+    # Sums over (t - i_window, t] are differences of running sums
+    na_s0 = _window_sums(na_valid.astype(np.float64), i_window)
+    na_s1 = _window_sums(na_rets, i_window)
+    na_s2 = _window_sums(na_rets * na_rets, i_window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_daily_ret = na_s1 / na_s0
+        # the one-pass formula can go a hair below zero for a flat window
+        volatility = np.sqrt(np.maximum(na_s2 - na_s1 * avg_daily_ret, 0) / (na_s0 - i_ddof))
+        sharpe = np.sqrt(TRADING_DAYS) * avg_daily_ret / volatility
+        cum_ret = np.empty(na_values.shape)
+        cum_ret.fill(np.NAN)
+        cum_ret[i_window:, :] = na_values[i_window:, :] / na_values[:-i_window, :]
+
+    for na_stat in (avg_daily_ret, volatility, sharpe):
+        na_stat[:i_window - 1, :] = np.NAN
+    return {'sharpe': sharpe,
+            'volatility': volatility,
+            'avg_daily_ret': avg_daily_ret,
+            'cum_ret': cum_ret}
+
+
+class RollingStatistics:
+    """
+    The rolling_statistics of many portfolios, kept up to date one day at a time:
+    each update adds the newest return and drops the oldest from running sums.
+    """
+
+    def __init__(self, i_portfolios, i_window, i_ddof=1):
+        self.i_window = i_window
+        self.i_ddof = i_ddof
+        self.na_rets = np.zeros((i_window, i_portfolios))
+        self.na_valid = np.zeros((i_window, i_portfolios), dtype=bool)
+        self.na_s0 = np.zeros(i_portfolios)
+        self.na_s1 = np.zeros(i_portfolios)
+        self.na_s2 = np.zeros(i_portfolios)
+        self.na_last = None
+        self.i_days = 0
+
+    def update(self, na_values):
+        """
+        :param na_values:   the value of every portfolio on the next day
+        :return:            a dict of the current 'sharpe', 'volatility' and 'avg_daily_ret' arrays,
+                            NaN until the window is full
+        """
+        na_values = np.asarray(na_values, dtype=np.float64)
+        na_ret = np.zeros(len(na_values))
+        if self.na_last is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                na_ret = na_values / self.na_last - 1
+        na_valid = ~np.isnan(na_ret)
+        na_ret[~na_valid] = 0
+
+        # the slot of the return falling out of the window takes the new one
+        i_slot = self.i_days % self.i_window
+        self.na_s0 += na_valid.astype(np.float64) - self.na_valid[i_slot]
+        self.na_s1 += na_ret - self.na_rets[i_slot]
+        self.na_s2 += na_ret * na_ret - self.na_rets[i_slot] * self.na_rets[i_slot]
+        self.na_rets[i_slot] = na_ret
+        self.na_valid[i_slot] = na_valid
+        self.na_last = na_values
+        self.i_days += 1
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_daily_ret = self.na_s1 / self.na_s0
+            volatility = np.sqrt(np.maximum(self.na_s2 - self.na_s1 * avg_daily_ret, 0) / (self.na_s0 - self.i_ddof))
+            sharpe = np.sqrt(TRADING_DAYS) * avg_daily_ret / volatility
+        if self.i_days < self.i_window:
+            avg_daily_ret[:], volatility[:], sharpe[:] = np.NAN, np.NAN, np.NAN
+        return {'sharpe': sharpe,
+                'volatility': volatility,
+                'avg_daily_ret': avg_daily_ret}
+
+
+def _window_sums(na_values, i_window):
+    na_sums = np.cumsum(na_values, axis=0)
+    na_sums[i_window:, :] = na_sums[i_window:, :] - na_sums[:-i_window, :]
+    return na_sums
+
+
+def _as_matrix(na_values):
+    na_values = np.asarray(na_values, dtype=np.float64)
+    if na_values.ndim == 1:
+        na_values = na_values[:, np.newaxis]
+    return na_values
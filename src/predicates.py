@@ -0,0 +1,323 @@
+#-------------------------------------------------------------------------------
+# Name:        predicates.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+import compact
+from eventset import EventSet
+
+
+class EventData:
+    """
+    The price data shared by every predicate in one pass. Intermediates such as
+    daily returns and market returns are computed once and reused.
+    """
+
+    def __init__(self, ls_symbols, d_data, benchmark, b_compact=False):
+        """
+        :param ls_symbols: a list of symbols to use in the event study
+        :param d_data: a dict mapping each key such as 'volume' to a pandas dataframe containing all the symbols as columns
+        :param benchmark: the symbol used for the benchmark equity (e.g. 'SPY')
+        :param b_compact: work on float32 prices and returns, see compact.py
+        """
+        self.ls_symbols = ls_symbols
+        self.d_data = d_data
+        self.benchmark = benchmark
+        self.dtype = compact.price_dtype(b_compact)
+        self.d_cache = {}
+
+    @staticmethod
+    def from_arrays(d_values, ls_symbols, benchmark):
+        """
+        :param d_values: a dict mapping each key to a days x symbols array, columns in ls_symbols order
+        :return: an EventData reading those arrays without copying them
+        """
+        data = EventData(ls_symbols, None, benchmark)
+        i_market = list(ls_symbols).index(benchmark)
+        for s_key, na_values in d_values.items():
+            data.d_cache[('values', s_key)] = na_values
+            data.d_cache[('market', s_key)] = na_values[:, i_market:i_market + 1]
+        return data
+
+    def cached(self, key, func):
+        if key not in self.d_cache:
+            self.d_cache[key] = func()
+        return self.d_cache[key]
+
+    def values(self, s_key):
+        """
+        :return: a days x symbols array of the given key
+        """
+        return self.cached(('values', s_key),
+                           lambda: self.d_data[s_key][self.ls_symbols].values.astype(self.dtype))
+
+    def market(self, s_key):
+        """
+        :return: a days x 1 array of the given key for the benchmark
+        """
+        return self.cached(('market', s_key),
+                           lambda: self.d_data[s_key][[self.benchmark]].values.astype(self.dtype))
+
+    def returns(self, s_key):
+        """
+        :return: daily returns of every symbol, NaN on the first day
+        """
+        return self.cached(('returns', s_key), lambda: _daily_returns(self.values(s_key)))
+
+    def market_returns(self, s_key):
+        """
+        :return: daily returns of the benchmark as a days x 1 array, NaN on the first day
+        """
+        return self.cached(('market_returns', s_key), lambda: _daily_returns(self.market(s_key)))
+
+
+def _daily_returns(na_price):
+    na_rets = np.empty(na_price.shape, dtype=na_price.dtype)
+    na_rets[0, :] = np.NAN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        na_rets[1:, :] = (na_price[1:, :] / na_price[:-1, :]) - 1
+    return na_rets
+
+
+class Predicate:
+    """
+    A parameterized event definition. Predicates are combined with &, | and ~,
+    and evaluate to a days x symbols boolean mask.
+    """
+
+    # number of previous days a predicate needs to decide on a day
+    i_lookback = 1
+
+    def key(self):
+        return (self.__class__.__name__,)
+
+    def keys(self):
+        """
+        :return: the set of keys such as 'volume' the predicate reads
+        """
+        return set([self.s_key])
+
+    def evaluate(self, data):
+        """
+        :param data: an EventData instance
+        :return: a days x symbols boolean array, True where the event occurred
+        """
+        return data.cached(('predicate',) + self.key(), lambda: self._evaluate(data))
+
+    def _evaluate(self, data):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def __repr__(self):
+        return '%s%r' % (self.key()[0], self.key()[1:])
+
+
+class And(Predicate):
+
+    def __init__(self, *l_preds):
+        self.l_preds = l_preds
+        self.i_lookback = max(p.i_lookback for p in l_preds)
+
+    def key(self):
+        return ('And',) + tuple(p.key() for p in self.l_preds)
+
+    def keys(self):
+        return set().union(*[p.keys() for p in self.l_preds])
+
+    def _evaluate(self, data):
+        na_mask = self.l_preds[0].evaluate(data).copy()
+        for pred in self.l_preds[1:]:
+            na_mask &= pred.evaluate(data)
+        return na_mask
+
+
+class Or(Predicate):
+
+    def __init__(self, *l_preds):
+        self.l_preds = l_preds
+        self.i_lookback = max(p.i_lookback for p in l_preds)
+
+    def key(self):
+        return ('Or',) + tuple(p.key() for p in self.l_preds)
+
+    def keys(self):
+        return set().union(*[p.keys() for p in self.l_preds])
+
+    def _evaluate(self, data):
+        na_mask = self.l_preds[0].evaluate(data).copy()
+        for pred in self.l_preds[1:]:
+            na_mask |= pred.evaluate(data)
+        return na_mask
+
+
+class Not(Predicate):
+
+    def __init__(self, pred):
+        self.pred = pred
+        self.i_lookback = pred.i_lookback
+
+    def key(self):
+        return ('Not', self.pred.key())
+
+    def keys(self):
+        return self.pred.keys()
+
+    def _evaluate(self, data):
+        na_mask = ~self.pred.evaluate(data)
+        # a day without enough history can never be an event
+        na_mask[:self.i_lookback, :] = False
+        return na_mask
+
+
+class PriceCrossBelow(Predicate):
+    """
+    Price closes below f_price after closing at or above it the day before.
+    """
+
+    def __init__(self, f_price, s_key='actual_close'):
+        self.f_price = f_price
+        self.s_key = s_key
+
+    def key(self):
+        return ('PriceCrossBelow', self.f_price, self.s_key)
+
+    def _evaluate(self, data):
+        na_price = data.values(self.s_key)
+        na_mask = np.zeros(na_price.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            na_mask[1:, :] = (na_price[:-1, :] >= self.f_price) & (na_price[1:, :] < self.f_price)
+        return na_mask
+
+
+class PriceCrossAbove(Predicate):
+    """
+    Price closes at or above f_price after closing below it the day before.
+    """
+
+    def __init__(self, f_price, s_key='actual_close'):
+        self.f_price = f_price
+        self.s_key = s_key
+
+    def key(self):
+        return ('PriceCrossAbove', self.f_price, self.s_key)
+
+    def _evaluate(self, data):
+        na_price = data.values(self.s_key)
+        na_mask = np.zeros(na_price.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            na_mask[1:, :] = (na_price[:-1, :] < self.f_price) & (na_price[1:, :] >= self.f_price)
+        return na_mask
+
+
+class RelativeDrop(Predicate):
+    """
+    The symbol returns f_sym_ret or worse on a day the benchmark returns
+    f_market_ret or better, e.g. RelativeDrop(-0.05, 0.02).
+    """
+
+    def __init__(self, f_sym_ret, f_market_ret=0.0, s_key='actual_close'):
+        self.f_sym_ret = f_sym_ret
+        self.f_market_ret = f_market_ret
+        self.s_key = s_key
+
+    def key(self):
+        return ('RelativeDrop', self.f_sym_ret, self.f_market_ret, self.s_key)
+
+    def _evaluate(self, data):
+        with np.errstate(invalid='ignore'):
+            return (data.returns(self.s_key) <= self.f_sym_ret) & \
+                   (data.market_returns(self.s_key) >= self.f_market_ret)
+
+
+class VolumeSpike(Predicate):
+    """
+    Volume is at least f_ratio times its average over the previous i_window days.
+    """
+
+    def __init__(self, f_ratio, i_window=20, s_key='volume'):
+        self.f_ratio = f_ratio
+        self.i_window = i_window
+        self.i_lookback = i_window
+        self.s_key = s_key
+
+    def key(self):
+        return ('VolumeSpike', self.f_ratio, self.i_window, self.s_key)
+
+    def _evaluate(self, data):
+        na_volume = data.values(self.s_key)
+        i_window = self.i_window
+        na_mask = np.zeros(na_volume.shape, dtype=bool)
+        if len(na_volume) <= i_window:
+            return na_mask
+
+        # trailing window sums from a running total
+        na_cum = np.zeros((len(na_volume) + 1, na_volume.shape[1]))
+        np.cumsum(na_volume, axis=0, out=na_cum[1:, :])
+        na_avg = (na_cum[i_window:-1, :] - na_cum[:-i_window - 1, :]) / i_window
+        with np.errstate(invalid='ignore'):
+            na_mask[i_window:, :] = na_volume[i_window:, :] >= self.f_ratio * na_avg
+        return na_mask
+
+
+# Registered event definitions, by name
+d_events = {}
+
+
+def register(s_name, pred):
+    """
+    :param s_name: the name used to look up the event, e.g. from an Event
+    :param pred: a Predicate instance
+    """
+    d_events[s_name] = pred
+    return pred
+
+
+def evaluate_masks(ls_names, ls_symbols, d_data, benchmark, b_compact=False):
+    """
+    :param ls_names: a list of registered event names
+    :param ls_symbols: a list of symbols to use in the event study
+    :param d_data: a dict mapping each key such as 'volume' to a pandas dataframe containing all the symbols as columns
+    :param benchmark: the symbol used for the benchmark equity (e.g. 'SPY')
+    :param b_compact: evaluate on float32 prices, see compact.py
+    :return: a dict mapping each name to a days x symbols boolean array; intermediates are shared by all of them
+    """
+    data = EventData(ls_symbols, d_data, benchmark, b_compact)
+    return dict((s_name, d_events[s_name].evaluate(data)) for s_name in ls_names)
+
+
+def find_events(ls_names, ls_symbols, d_data, benchmark, b_sparse=False, b_compact=False):
+    """
+    :param b_sparse: return EventSets instead of dense matrices
+    :param b_compact: evaluate on float32 prices, see compact.py
+    :return: a dict mapping each name to an event matrix - dataframe of 1's and NAN's, with symbols as columns
+    """
+    d_masks = evaluate_masks(ls_names, ls_symbols, d_data, benchmark, b_compact)
+    if not d_masks:
+        return {}
+    # the dates come from a field the events have read already, so no other field is loaded
+    index = d_data[sorted(set().union(*[d_events[s_name].keys() for s_name in ls_names]))[0]].index
+    d_events_found = {}
+    for s_name, na_mask in d_masks.iteritems():
+        event_set = EventSet.from_mask(na_mask, index, ls_symbols)
+        d_events_found[s_name] = event_set if b_sparse else event_set.to_matrix()
+    return d_events_found
+
+
+# the registered twin of eventprofiler.five_dollar_event, under a name of its own so Event still
+# finds that function
+register('price_cross_below_five', PriceCrossBelow(5.0))
+register('price_cross_above_five', PriceCrossAbove(5.0))
+register('relative_drop', RelativeDrop(-0.05, 0.02))
+register('volume_spike', VolumeSpike(3.0, 20))
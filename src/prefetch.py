@@ -0,0 +1,172 @@
+#-------------------------------------------------------------------------------
+# Name:        prefetch.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import time
+import multiprocessing.pool
+
+import profiling
+
+
+class BlockLoader:
+    """
+    Reads a dates x symbols panel one symbol (one data file) at a time on a
+    pool of threads, so the files' I/O latency overlaps. Each symbol is copied
+    into one preallocated fields x dates x symbols panel as it arrives. Symbols
+    are read in a configurable order and grouped, in that order, into blocks
+    that can be used as soon as all their symbols are in.
+    """
+
+    def __init__(self, dataobj, ldt_timestamps, ls_symbols, ls_keys, i_threads=8, i_block=32, ls_order=None,
+                 i_retries=2):
+        """
+        :param dataobj:         anything with get_data, e.g. DataAccess
+        :param ldt_timestamps:  a list of timestamps
+        :param ls_symbols:      a list of symbols, the columns of the panel
+        :param ls_keys:         a list of fields such as 'close'
+        :param i_threads:       number of files read at once
+        :param i_block:         number of symbols per block
+        :param ls_order:        the order to read the symbols in, e.g. the benchmark first; any
+                                symbols left out follow in panel order
+        :param i_retries:       further attempts at a file that fails before it is skipped; the
+                                columns of a skipped symbol stay NaN
+        """
+        self.dataobj = dataobj
+        self.ldt_timestamps = ldt_timestamps
+        self.ls_symbols = list(ls_symbols)
+        self.ls_keys = list(ls_keys)
+        self.i_threads = i_threads
+        self.i_retries = i_retries
+        self.na_panel = np.empty((len(self.ls_keys), len(ldt_timestamps), len(self.ls_symbols)))
+        self.na_panel.fill(np.NAN)
+        self.na_loaded = np.zeros(len(self.ls_symbols), dtype=bool)
+        # symbol -> seconds its file took, including retries, and the error of every symbol skipped
+        self.d_seconds = {}
+        self.d_errors = {}
+
+        d_positions = dict((s_sym, j) for j, s_sym in enumerate(self.ls_symbols))
+        li_order = [d_positions[s_sym] for s_sym in (ls_order or []) if s_sym in d_positions]
+        na_first = np.zeros(len(self.ls_symbols), dtype=bool)
+        na_first[li_order] = True
+        na_order = np.concatenate([np.array(li_order, dtype=np.int64), np.nonzero(~na_first)[0]])
+        self.l_blocks = [na_order[i:i + i_block] for i in range(0, len(na_order), i_block)]
+
+    def _read(self, j):
+        s_sym = self.ls_symbols[j]
+        f_start = time.time()
+        for i_attempt in range(self.i_retries + 1):
+            try:
+                ldf_data = self.dataobj.get_data(self.ldt_timestamps, [s_sym], self.ls_keys)
+                return j, [df[s_sym].values for df in ldf_data], time.time() - f_start, None
+            except Exception as e:
+                error = e
+                # a file on a busy network volume often reads fine a moment later
+                if i_attempt < self.i_retries:
+                    time.sleep(0.1 * 2 ** i_attempt)
+        return j, None, time.time() - f_start, error
+
+    def iter_blocks(self):
+        """
+        :return: an iterator over the blocks in the order they complete, each an array of
+                 the block's column positions in the panel; the panel is full once it ends
+        """
+        na_block_of = np.empty(len(self.ls_symbols), dtype=np.int64)
+        for k, na_cols in enumerate(self.l_blocks):
+            na_block_of[na_cols] = k
+        li_left = [len(na_cols) for na_cols in self.l_blocks]
+
+        pool = multiprocessing.pool.ThreadPool(max(1, self.i_threads))
+        try:
+            # the order the files are handed out in is the read order
+            for j, l_values, f_seconds, error in pool.imap_unordered(self._read, np.concatenate(self.l_blocks)
+                                                                      if self.l_blocks else []):
+                s_sym = self.ls_symbols[j]
+                self.d_seconds[s_sym] = f_seconds
+                if error is not None:
+                    print "Skipped %s after %d attempts: %s" % (s_sym, self.i_retries + 1, error)
+                    self.d_errors[s_sym] = error
+                else:
+                    for k, na_values in enumerate(l_values):
+                        self.na_panel[k, :, j] = na_values
+                    self.na_loaded[j] = True
+                i_block = na_block_of[j]
+                li_left[i_block] -= 1
+                if li_left[i_block] == 0:
+                    yield self.l_blocks[i_block]
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def load(self):
+        """
+        :return: a list of dataframes, one per key, like DataAccess.get_data, once every file is read
+        """
+        with profiling.span('prefetch'):
+            for na_cols in self.iter_blocks():
+                pass
+        return [self.frame(s_key) for s_key in self.ls_keys]
+
+    def frame(self, s_key, na_cols=None):
+        """
+        :param na_cols: column positions, all of them by default
+        :return:        a dates x symbols dataframe of the key; a view of the panel for all the columns,
+                        a copy for some
+        """
+        na_values = self.na_panel[self.ls_keys.index(s_key)]
+        ls_columns = self.ls_symbols
+        if na_cols is not None:
+            na_values = na_values[:, na_cols]
+            ls_columns = [self.ls_symbols[j] for j in na_cols]
+        return pd.DataFrame(na_values, index=pd.DatetimeIndex(self.ldt_timestamps), columns=ls_columns, copy=False)
+
+    def is_loaded(self, j):
+        return self.na_loaded[j]
+
+    def timings(self):
+        """
+        :return: a series of the seconds each symbol's file took, slowest first
+        """
+        ls_slowest = sorted(self.d_seconds, key=self.d_seconds.get, reverse=True)
+        return pd.Series([self.d_seconds[s_sym] for s_sym in ls_slowest], index=ls_slowest)
+
+
+class ParallelData:
+    """
+    A DataAccess look-alike whose get_data reads the symbols' files concurrently
+    with a BlockLoader. Everything else is passed on to the wrapped object.
+    Unlike the loader it does not skip a file that keeps failing: like
+    DataAccess it raises, so a session or price store in front of it never
+    caches a failed read as missing prices.
+    """
+
+    def __init__(self, dataobj, i_threads=8, i_retries=2):
+        """
+        :param dataobj:     a QSTK DataAccess object
+        :param i_threads:   number of files read at once
+        :param i_retries:   further attempts at a file that fails before it is skipped
+        """
+        self.dataobj = dataobj
+        self.i_threads = i_threads
+        self.i_retries = i_retries
+        self.loader = None
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        """
+        :return: a list of dataframes, one per key, like DataAccess.get_data; the loader of the
+                 last call is kept in self.loader for its timings and errors
+        """
+        self.loader = BlockLoader(self.dataobj, ldt_timestamps, ls_symbols, ls_keys, self.i_threads,
+                                  i_retries=self.i_retries)
+        ldf_data = self.loader.load()
+        # the error of the first symbol that failed every attempt, as a single DataAccess call would raise it
+        for s_sym in self.loader.ls_symbols:
+            if s_sym in self.loader.d_errors:
+                raise self.loader.d_errors[s_sym]
+        return ldf_data
+
+    def __getattr__(self, s_name):
+        return getattr(self.dataobj, s_name)
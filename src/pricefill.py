@@ -0,0 +1,93 @@
+#-------------------------------------------------------------------------------
+# Name:        pricefill.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+import profiling
+
+
+def fill_panel(na_panel, f_fill=1.0):
+    """
+    Fill NaN in place, the same as fillna ffill, then bfill, then f_fill on each field.
+
+    :param na_panel:    a fields x dates x symbols float array, modified in place
+    :param f_fill:      the value for symbols with no data at all
+    :return:            a dict of fields x symbols gap statistics: 'missing' (NaN cells before
+                        filling), 'leading' (NaN cells before the first price) and 'empty'
+                        (True when a symbol had no price at all)
+    """
+    i_dates = na_panel.shape[1]
+    na_missing = np.zeros((na_panel.shape[0], na_panel.shape[2]), dtype=np.int64)
+    if i_dates == 0:
+        return {'missing': na_missing, 'leading': na_missing.copy(), 'empty': na_missing > 0}
+
+    # Forward sweep, one day at a time across every field and symbol
+    na_prev = na_panel[:, 0, :]
+    na_missing += np.isnan(na_prev)
+    for i in range(1, i_dates):
+        na_today = na_panel[:, i, :]
+        na_mask = np.isnan(na_today)
+        na_missing += na_mask
+        na_today[na_mask] = na_prev[na_mask]
+        na_prev = na_today
+
+    # After the forward sweep only leading gaps are left; a NaN on the last day means no data at all
+    na_empty = np.isnan(na_panel[:, -1, :])
+    na_lead = np.isnan(na_panel[:, 0, :]) & ~na_empty
+    na_leading = np.zeros(na_missing.shape, dtype=np.int64)
+
+    # Backward sweep, only over the series that start with a gap
+    na_f, na_s = np.nonzero(na_lead)
+    if len(na_f) > 0:
+        na_series = na_panel[na_f, :, na_s]
+        na_first = np.argmax(~np.isnan(na_series), axis=1)
+        na_gap = np.arange(i_dates) < na_first[:, np.newaxis]
+        na_series[na_gap] = np.repeat(na_series[np.arange(len(na_f)), na_first], na_first)
+        na_panel[na_f, :, na_s] = na_series
+        na_leading[na_f, na_s] = na_first
+
+    na_f, na_s = np.nonzero(na_empty)
+    na_panel[na_f, :, na_s] = f_fill
+    na_leading[na_empty] = i_dates
+
+    return {'missing': na_missing, 'leading': na_leading, 'empty': na_empty}
+
+
+def fill_frames(d_data, ls_keys, f_fill=1.0, dtype=np.float64):
+    """
+    Stack the given fields into one panel, fill it in place and put views of it back in d_data.
+
+    :param d_data:  a dict mapping each key such as 'volume' to a pandas dataframe containing all the symbols as columns
+    :param ls_keys: the keys to fill; their dataframes must share index and columns
+    :param dtype:   the float type of the filled dataframes, np.float32 in compact mode
+    :return:        a dict of symbols x fields dataframes of gap statistics, see fill_panel
+    """
+    df_first = d_data[ls_keys[0]]
+    index, columns = df_first.index, df_first.columns
+    na_panel = np.empty((len(ls_keys), len(index), len(columns)), dtype=dtype)
+    for k, s_key in enumerate(ls_keys):
+        # release each frame as soon as it is copied, so the panel is the only full copy
+        na_panel[k] = d_data.pop(s_key).values
+    with profiling.span('fill'):
+        d_stats = fill_panel(na_panel, f_fill)
+    for k, s_key in enumerate(ls_keys):
+        d_data[s_key] = pd.DataFrame(na_panel[k], index=index, columns=columns, copy=False)
+    return dict((s_stat, pd.DataFrame(na_stat.T, index=columns, columns=ls_keys))
+                for s_stat, na_stat in d_stats.items())
+
+
+def summarize_gaps(d_stats):
+    """
+    :param d_stats: gap statistics from fill_frames
+    :return:        a fields x counts dataframe: the symbols with any gap, the NaN cells filled, those
+                    of them before a symbol's first price, and the symbols with no price at all
+    """
+    return pd.DataFrame({'symbols': (d_stats['missing'] > 0).sum(),
+                         'missing': d_stats['missing'].sum(),
+                         'leading': d_stats['leading'].sum(),
+                         'empty': d_stats['empty'].sum()},
+                        columns=['symbols', 'missing', 'leading', 'empty'])
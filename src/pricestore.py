@@ -0,0 +1,181 @@
+#-------------------------------------------------------------------------------
+# Name:        pricestore.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import pickle
+import os
+import time
+import datetime as dt
+import QSTK.qstkutil.DataAccess as da
+
+import tradingcalendar
+
+
+ALL_KEYS = ['open', 'high', 'low', 'close', 'volume', 'actual_close']
+STORE_PATH = '../out/pricestore/'
+
+
+class PriceStore:
+    """
+    A local columnar copy of the QSTK price data. Each field is one contiguous
+    float64 file of trading days x symbols, stored symbol by symbol (Fortran
+    order) so new symbols are appended without rewriting, and opened with mmap.
+    """
+
+    def __init__(self, s_path):
+        """
+        :param s_path: the directory holding the store; created on the first update
+        """
+        self.s_path = s_path
+        self.dates = pd.DatetimeIndex([])
+        self.symbols = pd.Index([])
+        self.ls_keys = []
+        self.d_arrays = {}
+        if os.path.exists(self._meta_file()):
+            self._load_meta()
+
+    def _meta_file(self):
+        return os.path.join(self.s_path, 'meta.pkl')
+
+    def _field_file(self, s_key):
+        return os.path.join(self.s_path, s_key + '.f64')
+
+    def _load_meta(self):
+        with open(self._meta_file(), 'rb') as f:
+            d_meta = pickle.load(f)
+        self.dates = pd.DatetimeIndex(d_meta['dates'])
+        self.symbols = pd.Index(d_meta['symbols'])
+        self.ls_keys = d_meta['keys']
+        self.d_arrays = {}
+
+    def _save_meta(self):
+        d_meta = {'dates': np.asarray(self.dates.asi8),
+                  'symbols': list(self.symbols),
+                  'keys': list(self.ls_keys)}
+        s_tmp = self._meta_file() + '.tmp'
+        with open(s_tmp, 'wb') as f:
+            pickle.dump(d_meta, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(s_tmp, self._meta_file())
+        self.d_arrays = {}
+
+    def array(self, s_key):
+        """
+        :return: the read-only memory-mapped trading days x symbols array of a field
+        """
+        if s_key not in self.d_arrays:
+            shape = (len(self.dates), len(self.symbols))
+            if shape[0] * shape[1] == 0:
+                self.d_arrays[s_key] = np.empty(shape)
+            else:
+                self.d_arrays[s_key] = np.memmap(self._field_file(s_key), dtype=np.float64, mode='r',
+                                                 shape=shape, order='F')
+        return self.d_arrays[s_key]
+
+    def update(self, dataobj, ldt_timestamps, ls_symbols, ls_keys):
+        """
+        :param dataobj:         a QSTK DataAccess object to read missing data from
+        :param ldt_timestamps:  a list of timestamps that must be in the store
+        :param ls_symbols:      a list of symbols that must be in the store
+        :param ls_keys:         a list of fields that must be in the store
+        :return:                nothing; only missing symbols, fields or dates are read
+        """
+        ldt_timestamps = pd.DatetimeIndex(ldt_timestamps)
+        if not os.path.exists(self.s_path):
+            os.makedirs(self.s_path)
+
+        # New dates change the shape of every field, so the store is rebuilt over the union
+        if len(self.dates) == 0 or (self.dates.get_indexer(ldt_timestamps) < 0).any():
+            ls_all_symbols = list(self.symbols) + [s for s in ls_symbols if s not in self.symbols]
+            ls_all_keys = list(self.ls_keys) + [k for k in ls_keys if k not in self.ls_keys]
+            self._rebuild(dataobj, self.dates.union(ldt_timestamps), ls_all_symbols, ls_all_keys)
+            return
+
+        # New fields are read for every stored symbol
+        ls_new_keys = [k for k in ls_keys if k not in self.ls_keys]
+        if ls_new_keys:
+            ldf_data = dataobj.get_data(list(self.dates), list(self.symbols), ls_new_keys)
+            for s_key, df in zip(ls_new_keys, ldf_data):
+                self._write_field(s_key, df.values)
+            self.ls_keys = self.ls_keys + ls_new_keys
+            self._save_meta()
+
+        # New symbols are appended column by column to every field
+        ls_new_symbols = [s for s in pd.unique(ls_symbols) if s not in self.symbols]
+        if ls_new_symbols:
+            ldf_data = dataobj.get_data(list(self.dates), ls_new_symbols, self.ls_keys)
+            i_bytes = len(self.dates) * len(self.symbols) * 8
+            for s_key, df in zip(self.ls_keys, ldf_data):
+                with open(self._field_file(s_key), 'r+b') as f:
+                    # drop anything left over by an interrupted append
+                    f.truncate(i_bytes)
+                    f.seek(i_bytes)
+                    np.asarray(df.values, dtype=np.float64).T.tofile(f)
+            self.symbols = self.symbols.append(pd.Index(ls_new_symbols))
+            self._save_meta()
+
+    def _rebuild(self, dataobj, dates, ls_symbols, ls_keys):
+        ldf_data = dataobj.get_data(list(dates), ls_symbols, ls_keys)
+        for s_key, df in zip(ls_keys, ldf_data):
+            self._write_field(s_key, df.values)
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = pd.Index(ls_symbols)
+        self.ls_keys = list(ls_keys)
+        self._save_meta()
+
+    def _write_field(self, s_key, na_values):
+        s_tmp = self._field_file(s_key) + '.tmp'
+        np.asarray(na_values, dtype=np.float64).T.tofile(s_tmp)
+        os.rename(s_tmp, self._field_file(s_key))
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        """
+        :param ldt_timestamps:  a list of timestamps, all of them in the store
+        :param ls_symbols:      a list of symbols, all of them in the store
+        :param ls_keys:         a list of fields such as 'close'
+        :return:                a list of dataframes, one per key, like DataAccess.get_data;
+                                a contiguous run of dates and symbols is served without copying
+        """
+        ldt_timestamps = pd.DatetimeIndex(ldt_timestamps)
+        rows = _as_slice(self.dates.get_indexer(ldt_timestamps))
+        cols = _as_slice(self.symbols.get_indexer(ls_symbols))
+        ldf_data = []
+        for s_key in ls_keys:
+            na_values = self.array(s_key)[rows, :][:, cols]
+            ldf_data.append(pd.DataFrame(na_values, index=ldt_timestamps, columns=ls_symbols, copy=False))
+        return ldf_data
+
+
+def _as_slice(na_positions):
+    """
+    :return: a slice when the positions are one increasing run, else the positions themselves
+    """
+    if (na_positions < 0).any():
+        raise KeyError('not in the price store; call update() first')
+    if len(na_positions) > 0 and (np.diff(na_positions) == 1).all():
+        return slice(na_positions[0], na_positions[-1] + 1)
+    return na_positions
+
+
+def main():
+    startdate = dt.datetime(2008, 1, 1)
+    enddate = dt.datetime(2009, 12, 31)
+    timestamps = tradingcalendar.get_calendar().days(startdate, enddate, tradingcalendar.CLOSE)
+
+    dataobj = da.DataAccess('Yahoo')
+    ls_symbols = dataobj.get_symbols_from_list('sp5002012')
+    ls_symbols.append('SPY')
+
+    store = PriceStore(STORE_PATH)
+    store.update(dataobj, timestamps, ls_symbols, ALL_KEYS)
+    print "Price store: %s dates x %s symbols, fields %s" % (len(store.dates), len(store.symbols), store.ls_keys)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    main()
+    print "--------"
+    print "Program execution time: %s seconds" % (time.time() - start_time)
@@ -0,0 +1,216 @@
+#-------------------------------------------------------------------------------
+# Name:        profiling.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Stage timers. Wrap a stage in a span:
+#
+#   with profiling.span('ledger'):
+#       ...
+#
+# Spans nest, and each one is reported under its full path, e.g. 'main;events'.
+# Each thread has its own stack, so a span opened on a worker thread, e.g. in a
+# prefetch pool, nests under that thread's spans only and starts a path of its own.
+# Until enable() is called, span() hands back one shared do-nothing object, so
+# the timers can stay in the code for good.
+#
+# Memory figures come from ru_maxrss, the high-water mark of the whole process,
+# not what a stage itself allocated: a stage shows growth only when it takes the
+# process to a new peak. Without the resource module (Windows) there are none.
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# PROFILE=1 in the environment turns the timers on, PROFILE=memory adds the process peak memory
+ENV_VAR = 'PROFILE'
+
+_b_enabled = False
+_b_memory = False
+# the open spans of each thread, innermost last
+_local = threading.local()
+# span path -> [calls, seconds, seconds in child spans, process peak rss so far (KB),
+#                growth of the process peak rss (KB)]
+_d_stats = collections.OrderedDict()
+_stats_lock = threading.Lock()
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    def __init__(self, s_name):
+        self.s_name = s_name
+
+    def __enter__(self):
+        _stack().append(self)
+        self.f_child = 0.0
+        self.i_rss = _max_rss() if _b_memory else 0
+        self.f_start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        f_seconds = time.time() - self.f_start
+        l_stack = _stack()
+        s_path = ';'.join(span.s_name for span in l_stack)
+        l_stack.pop()
+        if l_stack:
+            l_stack[-1].f_child += f_seconds
+        i_rss = _max_rss() if _b_memory else 0
+
+        with _stats_lock:
+            l_stat = _d_stats.get(s_path)
+            if l_stat is None:
+                l_stat = _d_stats[s_path] = [0, 0.0, 0.0, 0, 0]
+            l_stat[0] += 1
+            l_stat[1] += f_seconds
+            l_stat[2] += self.f_child
+            if _b_memory:
+                l_stat[3] = max(l_stat[3], i_rss)
+                l_stat[4] += i_rss - self.i_rss
+        return False
+
+
+def _stack():
+    l_stack = getattr(_local, 'l_stack', None)
+    if l_stack is None:
+        l_stack = _local.l_stack = []
+    return l_stack
+
+
+def span(s_name):
+    """
+    :param s_name:  the name of the stage, without ';'
+    :return:        a context manager timing the stage, or a shared do-nothing one when disabled
+    """
+    if not _b_enabled:
+        return _NULL_SPAN
+    return _Span(s_name)
+
+
+def timed(s_name=None):
+    """
+    :return: a decorator running the whole function in a span, named after the function by default
+    """
+    def decorator(func):
+        s_span = s_name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _b_enabled:
+                return func(*args, **kwargs)
+            with _Span(s_span):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(b_memory=False):
+    """
+    :param b_memory: also record the process peak RSS so far at the end of each span and how much
+                     the span raised it; ignored where the resource module is missing
+    :return:         nothing; the stats recorded so far are dropped
+    """
+    global _b_enabled, _b_memory
+    _b_enabled = True
+    _b_memory = b_memory and resource is not None
+    reset()
+
+
+def enable_from_env():
+    """
+    :return: True if the PROFILE environment variable turned the timers on
+    """
+    s_value = os.environ.get(ENV_VAR, '')
+    if s_value and s_value != '0':
+        enable(b_memory=(s_value == 'memory'))
+    return _b_enabled
+
+
+def disable():
+    global _b_enabled
+    _b_enabled = False
+
+
+def is_enabled():
+    return _b_enabled
+
+
+def reset():
+    with _stats_lock:
+        _d_stats.clear()
+
+
+def report():
+    """
+    :return: a list of dicts, one per span path in the order they first finished, with the number of
+             calls, total and self seconds, and when memory is on the process peak rss so far and
+             how much the span raised it, in KB
+    """
+    ld_report = []
+    with _stats_lock:
+        l_items = [(s_path, list(l_stat)) for s_path, l_stat in _d_stats.items()]
+    for s_path, (i_calls, f_seconds, f_child, i_peak, i_growth) in l_items:
+        d_span = {'span': s_path,
+                  'calls': i_calls,
+                  'seconds': f_seconds,
+                  'self_seconds': f_seconds - f_child}
+        if _b_memory:
+            d_span['process_peak_rss_kb'] = i_peak
+            d_span['process_peak_growth_kb'] = i_growth
+        ld_report.append(d_span)
+    return ld_report
+
+
+def over_budget(d_budgets):
+    """
+    :param d_budgets:   a dict mapping span paths to the most seconds they may take in all
+    :return:            a list of (span, seconds, budget) for the spans that took longer
+    """
+    return [(d_span['span'], d_span['seconds'], d_budgets[d_span['span']]) for d_span in report()
+            if d_span['span'] in d_budgets and d_span['seconds'] > d_budgets[d_span['span']]]
+
+
+def write_report(s_prefix):
+    """
+    :param s_prefix:    the output path without extension
+    :return:            nothing; writes <s_prefix>.json and <s_prefix>.folded, the collapsed
+                        stack format flamegraph.pl and speedscope read, in microseconds of self time
+    """
+    ld_report = report()
+    with open(s_prefix + '.json', 'w') as f:
+        json.dump(ld_report, f, indent=1)
+    with open(s_prefix + '.folded', 'w') as f:
+        for d_span in ld_report:
+            f.write("%s %d\n" % (d_span['span'], max(0, int(round(d_span['self_seconds'] * 1e6)))))
+
+
+def print_report():
+    print "%-50s %8s %12s %12s" % ('span', 'calls', 'seconds', 'self')
+    for d_span in report():
+        print "%-50s %8d %12.4f %12.4f" % (d_span['span'], d_span['calls'], d_span['seconds'],
+                                           d_span['self_seconds'])
+
+
+def _max_rss():
+    # the process high-water mark, in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,135 @@
+#-------------------------------------------------------------------------------
+# Name:        sweep.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import itertools
+import multiprocessing
+import multiprocessing.sharedctypes
+import time
+import datetime as dt
+
+import datasession
+import ledger
+import perfstats
+import pricefill
+import predicates
+import tradingcalendar
+from eventset import EventSet
+from eventprofiler import order_coordinates
+
+
+# the price panel of this worker process, set up by _init_worker
+_d_worker = {}
+
+
+def sweep(d_data, ls_symbols, benchmark, d_grid, starting_cash=50000, i_processes=None):
+    """
+    :param d_data:          a dict with 'actual_close' (gaps filled, for events) and 'close' (for the ledger) dataframes
+    :param ls_symbols:      a list of symbols, including the benchmark
+    :param benchmark:       the symbol used for the benchmark equity (e.g. 'SPY')
+    :param d_grid:          a dict mapping each parameter to a list of values: 'f_price' (the event
+                            threshold), 'i_hold', 'i_shares' and optionally 's_side'
+    :param starting_cash:   starting portfolio capital of every backtest
+    :param i_processes:     number of worker processes, all cores by default
+    :return:                a dataframe with one row per grid point: its parameters, the number of
+                            events, and the Sharpe ratio, volatility, average daily and total return
+    """
+    ls_params = sorted(d_grid)
+    ld_points = [dict(zip(ls_params, values)) for values in itertools.product(*[d_grid[k] for k in ls_params])]
+
+    # Put both fields in one shared block; the workers map it instead of getting a copy each
+    num_dates = len(d_data['close'].index)
+    shape = (2, num_dates, len(ls_symbols))
+    raw = multiprocessing.sharedctypes.RawArray('d', shape[0] * shape[1] * shape[2])
+    na_panel = np.frombuffer(raw, dtype=np.float64).reshape(shape)
+    na_panel[0] = d_data['actual_close'][ls_symbols].values
+    na_panel[1] = d_data['close'][ls_symbols].values
+
+    pool = multiprocessing.Pool(i_processes, _init_worker, (raw, shape, ls_symbols, benchmark, starting_cash))
+    try:
+        ld_results = pool.map(_run_point, ld_points, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    return pd.DataFrame(ld_results, columns=ls_params + ['events', 'sharpe', 'volatility', 'avg_daily_ret',
+                                                        'total_return'])
+
+
+def _init_worker(raw, shape, ls_symbols, benchmark, starting_cash):
+    na_panel = np.frombuffer(raw, dtype=np.float64).reshape(shape)
+    _d_worker['data'] = predicates.EventData.from_arrays({'actual_close': na_panel[0]}, ls_symbols, benchmark)
+    _d_worker['close'] = na_panel[1]
+    _d_worker['starting_cash'] = starting_cash
+
+
+def _run_point(d_point):
+    """
+    :return: the event -> orders -> portfolio -> statistics chain for one grid point
+    """
+    data = _d_worker['data']
+    na_close = _d_worker['close']
+
+    na_mask = predicates.PriceCrossBelow(d_point['f_price']).evaluate(data)
+    event_set = EventSet(np.arange(len(na_close)), data.ls_symbols, *np.nonzero(na_mask))
+    d_result = dict(d_point)
+    d_result['events'] = len(event_set)
+    if len(event_set) == 0:
+        return d_result
+
+    na_rows, na_cols, na_amt = order_coordinates(event_set, d_point['i_hold'], d_point['i_shares'],
+                                                 d_point.get('s_side', 'Buy'))
+
+    # Like portfolio_from_orders: only the traded symbols, from the first to the last order
+    i_first, i_last = na_rows.min(), na_rows.max()
+    na_symbols, na_cols = np.unique(na_cols, return_inverse=True)
+    na_prices = na_close[i_first:i_last + 1][:, na_symbols]
+    na_holdings, na_cash = ledger.holdings_and_cash(na_prices, na_rows - i_first, na_cols, na_amt,
+                                                    _d_worker['starting_cash'])
+    na_values = ledger.portfolio_values(na_prices, na_holdings, na_cash)
+
+    d_result.update(_value_statistics(na_values))
+    return d_result
+
+
+def _value_statistics(na_values):
+    # the same statistics compare_portfolio_to_benchmark prints for the fund
+    d_stats = perfstats.statistics(na_values)
+    return {'sharpe': d_stats['sharpe'][0],
+            'volatility': d_stats['volatility'][0],
+            'avg_daily_ret': d_stats['avg_daily_ret'][0],
+            'total_return': d_stats['cum_ret'][0]}
+
+
+def main():
+    startdate = dt.datetime(2008, 1, 1)
+    enddate = dt.datetime(2009, 12, 31)
+    timestamps = tradingcalendar.get_calendar().days(startdate, enddate, tradingcalendar.CLOSE)
+
+    session = datasession.get_session()
+    ls_symbols = session.get_symbols_from_list('sp5002012')
+    benchmark = 'SPY'
+    ls_symbols.append(benchmark)
+    ls_keys = ['actual_close', 'close']
+    d_data = dict(zip(ls_keys, session.get_data(timestamps, ls_symbols, ls_keys)))
+    d_gaps = pricefill.fill_frames(d_data, ['actual_close'], 1.0)
+    print "Gaps filled:"
+    print pricefill.summarize_gaps(d_gaps)
+
+    d_grid = {'f_price': [5.0, 7.5, 10.0],
+              'i_hold': [5, 10, 20],
+              'i_shares': [100]}
+    results = sweep(d_data, ls_symbols, benchmark, d_grid)
+    print results
+    results.to_csv('../out/sweep_results.csv', index=False)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    main()
+    print "--------"
+    print "Program execution time: %s seconds" % (time.time() - start_time)
@@ -0,0 +1,119 @@
+#-------------------------------------------------------------------------------
+# Name:        tradingcalendar.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import QSTK.qstkutil.qsdateutil as du
+
+
+# QSTK stamps daily data with the close
+CLOSE = dt.timedelta(hours=16)
+# Wide enough for any data QSTK has; getNYSEdays clips it to its own dates
+FIRST_DAY = dt.datetime(1900, 1, 1)
+LAST_DAY = dt.datetime(2100, 1, 1)
+
+NS_PER_DAY = 24 * 3600 * 10 ** 9
+
+
+class TradingCalendar:
+    """
+    The NYSE trading days, numbered from 0. A table with one entry per calendar
+    day maps any date to its trading day number in O(1), one at a time or a
+    whole array at once; numbers map back by indexing. The days are kept both
+    at midnight and at the 16:00 close, so neither is rebuilt per call.
+    """
+
+    def __init__(self, ldt_days):
+        """
+        :param ldt_days: the trading days at midnight, in order
+        """
+        self.index = pd.DatetimeIndex(ldt_days)
+        self.close_index = self.index + CLOSE
+        self.na_ns = self.index.asi8
+        na_days = self.na_ns // NS_PER_DAY
+        self.i_first = na_days[0] if len(na_days) else 0
+        self.na_table = np.empty(na_days[-1] - self.i_first + 1 if len(na_days) else 0, dtype=np.int32)
+        self.na_table.fill(-1)
+        self.na_table[na_days - self.i_first] = np.arange(len(na_days))
+
+    def __len__(self):
+        return len(self.index)
+
+    def position(self, date):
+        """
+        :param date:    a datetime or timestamp; the time of day is ignored
+        :return:        the trading day number of the date, -1 if the market was closed
+        """
+        i_day = pd.Timestamp(date).value // NS_PER_DAY - self.i_first
+        if 0 <= i_day < len(self.na_table):
+            return int(self.na_table[i_day])
+        return -1
+
+    def positions(self, dates):
+        """
+        :param dates:   a list or array of datetimes, timestamps or datetime64; the time of day is ignored
+        :return:        an int64 array of the trading day number of each date, -1 where the market was closed
+        """
+        na_days = pd.DatetimeIndex(dates).asi8 // NS_PER_DAY - self.i_first
+        na_positions = np.empty(len(na_days), dtype=np.int64)
+        na_positions.fill(-1)
+        na_in = (na_days >= 0) & (na_days < len(self.na_table))
+        na_positions[na_in] = self.na_table[na_days[na_in]]
+        return na_positions
+
+    def stamps(self, timeofday=dt.timedelta(0)):
+        """
+        :return: a DatetimeIndex of every trading day at timeofday
+        """
+        if timeofday == dt.timedelta(0):
+            return self.index
+        if timeofday == CLOSE:
+            return self.close_index
+        return self.index + timeofday
+
+    def dates(self, na_positions, timeofday=dt.timedelta(0)):
+        """
+        :param na_positions:    trading day numbers
+        :return:                a DatetimeIndex of those days at timeofday
+        """
+        return self.stamps(timeofday)[np.asarray(na_positions)]
+
+    def bounds(self, startdate, enddate, timeofday=dt.timedelta(0)):
+        """
+        :return: the first trading day number whose stamp at timeofday is on or after startdate, and
+                 one past the last whose stamp is on or before enddate
+        """
+        i_lo = np.searchsorted(self.na_ns, pd.Timestamp(startdate - timeofday).value, side='left')
+        i_hi = np.searchsorted(self.na_ns, pd.Timestamp(enddate - timeofday).value, side='right')
+        return int(i_lo), int(max(i_lo, i_hi))
+
+    def days(self, startdate, enddate, timeofday=dt.timedelta(0)):
+        """
+        :return: the same days as du.getNYSEdays(startdate, enddate, timeofday), as a DatetimeIndex
+                 sliced from the calendar's own
+        """
+        i_lo, i_hi = self.bounds(startdate, enddate, timeofday)
+        return self.stamps(timeofday)[i_lo:i_hi]
+
+
+# The calendar shared by every entry point in this process
+_calendar = None
+
+
+def get_calendar():
+    """
+    :return: the process-wide TradingCalendar, read from QSTK on first use
+    """
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar(du.getNYSEdays(FIRST_DAY, LAST_DAY))
+    return _calendar
+
+
+def set_calendar(calendar):
+    global _calendar
+    _calendar = calendar
@@ -0,0 +1,127 @@
+#-------------------------------------------------------------------------------
+# Name:        valueio.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+import tradingcalendar
+from orders import INTEGER, ymd_to_dates
+
+
+def split_dates(dates):
+    """
+    :param dates:   datetimes, timestamps or a datetime64 array; the time of day is ignored
+    :return:        int64 arrays of the year, month and day of each date, without a loop over the dates
+    """
+    na_days = pd.DatetimeIndex(dates).values.astype('M8[D]')
+    na_months = na_days.astype('M8[M]')
+    na_years = na_days.astype('M8[Y]')
+    return (na_years.astype(np.int64) + 1970,
+            (na_months - na_years.astype('M8[M]')).astype(np.int64) + 1,
+            (na_days - na_months.astype('M8[D]')).astype(np.int64) + 1)
+
+
+def write_values(portfolio, filename, i_chunk_rows=64 * 1024):
+    """
+    :param portfolio:       a pandas dataframe of values per trading day, one column per portfolio
+    :param filename:        the path of the csv file to write
+    :param i_chunk_rows:    number of rows formatted and written at a time
+    :return:                nothing; each row is year,month,day and then every value, cut to an integer
+    """
+    na_values = np.asarray(portfolio.values, dtype=np.float64)
+    if np.isnan(na_values).any():
+        raise ValueError("Cannot write NaN values to %s" % filename)
+    na_year, na_month, na_day = split_dates(portfolio.index)
+    na_rows = np.column_stack([na_year, na_month, na_day, na_values.astype(np.int64)])
+
+    # one format operation per chunk, so no Python code runs per row
+    s_row = ','.join(['%d'] * na_rows.shape[1]) + '\n'
+    with open(filename, 'w') as f:
+        for i in range(0, len(na_rows), i_chunk_rows):
+            na_chunk = na_rows[i:i + i_chunk_rows]
+            f.write((s_row * len(na_chunk)) % tuple(na_chunk.ravel().tolist()))
+
+
+def read_values_csv(filename, timeofday=tradingcalendar.CLOSE, i_chunk_bytes=16 * 1024 * 1024):
+    """
+    :param filename:        the path of a csv file of year,month,day,value rows, as write_values writes
+    :param timeofday:       added to every date; data is stamped with the 16:00 close
+    :param i_chunk_bytes:   number of bytes parsed at a time
+    :return:                a pandas dataframe of int64 values, one column 'value', or columns 0, 1, ...
+                            when the rows hold several values
+    """
+    l_chunks = []
+    i_fields = None
+    s_carry = ''
+    with open(filename, 'r') as f:
+        while True:
+            s_chunk = f.read(i_chunk_bytes)
+            s_text = s_carry + s_chunk
+            # only whole lines are parsed; the partial last line waits for the next chunk
+            i_end = len(s_text) if not s_chunk else s_text.rfind('\n') + 1
+            s_text, s_carry = s_text[:i_end], s_text[i_end:]
+            if s_text.strip():
+                if i_fields is None:
+                    i_fields = s_text.strip().split('\n', 1)[0].count(',') + 1
+                l_chunks.append(_parse_rows(s_text, i_fields))
+            if not s_chunk:
+                break
+
+    if not l_chunks:
+        return pd.DataFrame(columns=['value'], index=pd.DatetimeIndex([]))
+    na_rows = np.concatenate(l_chunks)
+    dates = pd.DatetimeIndex(ymd_to_dates(na_rows[:, 0] * 10000 + na_rows[:, 1] * 100 + na_rows[:, 2])
+                             .astype('M8[ns]')) + timeofday
+    columns = ['value'] if i_fields == 4 else range(i_fields - 3)
+    return pd.DataFrame(na_rows[:, 3:], index=dates, columns=columns)
+
+
+def save_values(portfolio, filename):
+    """
+    :param portfolio:   a pandas dataframe of values per day, one column per portfolio
+    :param filename:    the path of the binary values file, usually ending in .npz
+    :return:            nothing; the dates, values and column labels are stored as they are, so
+                        load_values gives back the same dataframe, bit for bit
+    """
+    na_columns = np.asarray(list(portfolio.columns))
+    if na_columns.dtype.kind == 'O':
+        na_columns = na_columns.astype(str)
+    with open(filename, 'wb') as f:
+        np.savez(f, dates=pd.DatetimeIndex(portfolio.index).values, values=portfolio.values, columns=na_columns)
+
+
+def load_values(filename):
+    """
+    :param filename:    the path of a binary values file written by save_values
+    :return:            a pandas dataframe of values per day
+    """
+    with np.load(filename) as npz:
+        return pd.DataFrame(npz['values'], index=pd.DatetimeIndex(npz['dates']), columns=npz['columns'].tolist())
+
+
+def read_values(filename):
+    """
+    :param filename:    the path to a csv file of values, or a binary values file ending in .npz
+    :return:            a pandas dataframe of values per day, dated at the close for a csv file
+    """
+    if filename.endswith('.npz'):
+        return load_values(filename)
+    return read_values_csv(filename)
+
+
+def _parse_rows(s_text, i_fields):
+    # rows joined by commas and parsed in C in one go; blank lines and \r drop out in the split
+    ls_lines = s_text.split()
+    s_values = ','.join(ls_lines)
+    # fromstring stops quietly at junk such as the x of '12x', so anything but digits is matched first
+    if s_values.translate(None, '0123456789,'):
+        for s_value in s_values.split(','):
+            if not INTEGER.match(s_value):
+                raise ValueError("Not an integer in the values: %r" % s_value)
+    na_values = np.fromstring(s_values, dtype=np.int64, sep=',')
+    if len(na_values) != len(ls_lines) * i_fields:
+        raise ValueError("Not a row of %d integers in the values" % i_fields)
+    return na_values.reshape(-1, i_fields)
@@ -0,0 +1,84 @@
+#-------------------------------------------------------------------------------
+# Name:        test_blockscan.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that scanning events a block of symbols at a time, read in one go or
+# streamed from a thread pool, finds exactly what one scan over every symbol does:
+#
+#   python test_blockscan.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import blockscan
+import datasession
+import eventprofiler
+import predicates
+import prefetch
+from test_predicates import random_data
+from test_sweep import FrameData
+
+
+class BlockScanTest(unittest.TestCase):
+
+    ls_names = sorted(predicates.d_events)
+    ls_keys = ['actual_close', 'volume']
+
+    def setUp(self):
+        self.dataobj = FrameData(random_data(i_dates=250, i_symbols=45))
+        self.ldt_timestamps = list(self.dataobj.d_frames['actual_close'].index)
+        # the benchmark in the middle of the list
+        ls_symbols = list(self.dataobj.d_frames['actual_close'].columns)
+        self.ls_symbols = ls_symbols[:20] + ['SPY'] + ls_symbols[20:-1]
+
+    def full_scan(self):
+        d_data = datasession.LazyData(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys,
+                                      fn_clean=eventprofiler.remove_nan)
+        return predicates.find_events(self.ls_names, self.ls_symbols, d_data, 'SPY', b_sparse=True)
+
+    def assert_same_events(self, d_found, d_expected):
+        for s_name in self.ls_names:
+            np.testing.assert_array_equal(d_found[s_name].na_dates, d_expected[s_name].na_dates, s_name)
+            np.testing.assert_array_equal(d_found[s_name].na_symbols, d_expected[s_name].na_symbols, s_name)
+
+    def test_blocked_matches_full_scan(self):
+        d_expected = self.full_scan()
+        self.assertTrue(sum(len(event_set) for event_set in d_expected.values()) > 0)
+        for i_symbols in [1, 7, 100]:
+            i_max_bytes = len(self.ldt_timestamps) * i_symbols * 8 * (len(self.ls_keys) * blockscan.FIELD_COPIES +
+                                                                      blockscan.WORK_COPIES)
+            self.assertEqual(blockscan.block_symbols(len(self.ldt_timestamps), len(self.ls_keys), i_max_bytes),
+                             i_symbols)
+            d_found = blockscan.find_events_blocked(self.ls_names, self.dataobj, self.ldt_timestamps,
+                                                    self.ls_symbols, 'SPY', self.ls_keys, i_max_bytes)
+            self.assert_same_events(d_found, d_expected)
+
+    def test_streamed_matches_full_scan(self):
+        d_expected = self.full_scan()
+        for ls_order in [['SPY'], None]:
+            loader = prefetch.BlockLoader(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys,
+                                          i_threads=4, i_block=7, ls_order=ls_order)
+            self.assert_same_events(blockscan.find_events_streamed(self.ls_names, loader, 'SPY'), d_expected)
+
+    def test_streamed_raises_without_benchmark(self):
+        class NoBenchmark(FrameData):
+            def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+                if 'SPY' in ls_symbols:
+                    raise IOError('cannot read SPY')
+                return FrameData.get_data(self, ldt_timestamps, ls_symbols, ls_keys)
+
+        for ls_order in [['SPY'], None]:
+            loader = prefetch.BlockLoader(NoBenchmark(self.dataobj.d_frames), self.ldt_timestamps, self.ls_symbols,
+                                          self.ls_keys, i_threads=4, i_block=7, ls_order=ls_order, i_retries=0)
+            self.assertRaises(IOError, blockscan.find_events_streamed, self.ls_names, loader, 'SPY')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#-------------------------------------------------------------------------------
+# Name:        test_compact.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks compact mode against the float64 path, within the bounds compact.py
+# documents:
+#
+#   python test_compact.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import compact
+import datasession
+import eventprofiler
+import ledger
+import marketsim
+import predicates
+from test_ledger import random_orders
+from test_predicates import random_data
+from test_sweep import FrameData
+
+
+EPS = 2.0 ** -24
+
+
+class CompactTest(unittest.TestCase):
+
+    def setUp(self):
+        self.d_data = random_data()
+        self.ls_symbols = list(self.d_data['actual_close'].columns)
+
+    def test_events_match(self):
+        d_compact = dict(self.d_data)
+        eventprofiler.remove_nan_compact(d_compact, list(d_compact))
+        d_default = dict(self.d_data)
+        eventprofiler.remove_nan(d_default, list(d_default))
+        self.assertEqual(d_compact['actual_close'].values.dtype, np.float32)
+        ls_names = sorted(predicates.d_events)
+        d_expected = predicates.find_events(ls_names, self.ls_symbols, d_default, 'SPY', b_sparse=True)
+        d_found = predicates.find_events(ls_names, self.ls_symbols, d_compact, 'SPY', b_sparse=True,
+                                         b_compact=True)
+        for s_name in ls_names:
+            np.testing.assert_array_equal(d_found[s_name].na_dates, d_expected[s_name].na_dates, s_name)
+            np.testing.assert_array_equal(d_found[s_name].na_symbols, d_expected[s_name].na_symbols, s_name)
+
+    def test_orders_match(self):
+        df_events = eventprofiler.five_dollar_event(self.ls_symbols, self.d_data, 'SPY')
+        orders = eventprofiler.transactions_from_eventmatrix(df_events, b_compact=True)
+        expected = eventprofiler.transactions_from_eventmatrix(df_events)
+        self.assertEqual(list(orders[3].astype(str)), list(expected[3]))
+        self.assertEqual(orders.drop(3, axis=1).values.tolist(), expected.drop(3, axis=1).values.tolist())
+
+    def test_ledger_within_bound(self):
+        na_prices, na_rows, na_cols, na_amt = random_orders()
+        na_holdings, na_cash = ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt, 1000000)
+        na_values = ledger.portfolio_values(na_prices, na_holdings, na_cash)
+
+        na_prices32 = na_prices.astype(np.float32)
+        na_holdings32, na_cash32 = ledger.holdings_and_cash(na_prices32, na_rows, na_cols, na_amt, 1000000,
+                                                            b_compact=True)
+        self.assertEqual(na_holdings32.dtype, np.int32)
+        np.testing.assert_array_equal(na_holdings32, na_holdings)
+        na_values32 = ledger.portfolio_values(na_prices32, na_holdings32, na_cash32)
+        self.assertEqual(na_values32.dtype, np.float64)
+
+        # eps times the gross value held plus eps times the gross cash traded up to each day
+        na_gross = np.nansum(np.abs(na_holdings) * na_prices, axis=1)
+        na_traded = np.bincount(na_rows, weights=np.nan_to_num(np.abs(na_amt) * na_prices[na_rows, na_cols]),
+                                minlength=len(na_prices)).cumsum()
+        na_ok = ~np.isnan(na_values)
+        self.assertTrue((np.abs(na_values32 - na_values)[na_ok] <= EPS * (na_gross + na_traded)[na_ok]).all())
+
+    def test_portfolio_within_bound(self):
+        d_data = {'close': self.d_data['actual_close']}
+        old_session = datasession._session
+        s_dir = tempfile.mkdtemp()
+        try:
+            datasession.set_session(datasession.DataSession(FrameData(d_data)))
+            df_events = eventprofiler.five_dollar_event(self.ls_symbols, self.d_data, 'SPY')
+            s_orders = os.path.join(s_dir, 'orders.csv')
+            eventprofiler.transactions_from_eventmatrix(df_events).to_csv(s_orders, header=False, index=False)
+            expected = marketsim.portfolio_from_orders(s_orders, 50000)
+            found = marketsim.portfolio_from_orders(s_orders, 50000, b_compact=True)
+            self.assertTrue(found.index.equals(expected.index))
+            np.testing.assert_allclose(found['value'].values, expected['value'].values, rtol=1e-6)
+        finally:
+            datasession.set_session(old_session)
+            shutil.rmtree(s_dir)
+
+    def test_overflow_raises(self):
+        na_prices = np.ones((5, 2))
+        self.assertRaises(OverflowError, ledger.holdings_and_cash, na_prices, [0, 1], [0, 0], [2 ** 30, 2 ** 30],
+                          1000, True)
+        ledger.holdings_and_cash(na_prices, [0, 1], [0, 0], [2 ** 30, 2 ** 30], 1000)
+        compact.check_holdings(np.zeros(2, dtype=np.int32), np.array([0, 1]), np.array([2 ** 30, 2 ** 30]),
+                               np.int32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#-------------------------------------------------------------------------------
+# Name:        test_datasession.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that the session cache serves what DataAccess would, and reads and
+# evicts only what it has to:
+#
+#   python test_datasession.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import eventprofiler
+from datasession import DataSession, LazyData, load_used_keys
+from test_pricestore import FakeData, days
+
+
+class DataSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataobj = FakeData()
+        self.session = DataSession(self.dataobj)
+
+    def check(self, ldf_data, ldt_timestamps, ls_symbols, ls_keys):
+        for s_key, df in zip(ls_keys, ldf_data):
+            df_expected = self.dataobj.value(ldt_timestamps, ls_symbols, s_key)
+            self.assertTrue(df.index.equals(df_expected.index))
+            self.assertEqual(list(df.columns), ls_symbols)
+            np.testing.assert_array_equal(df.values, df_expected.values)
+
+    def test_matches_dataaccess(self):
+        ldt_timestamps = days('2008-01-01', 100)
+        for ls_symbols, ls_keys in [(['AAA', 'BBB'], ['close']),
+                                    (['BBB', 'CCC', 'AAA'], ['volume', 'close']),
+                                    (['CCC'], ['close', 'volume'])]:
+            ldf_data = self.session.get_data(ldt_timestamps, ls_symbols, ls_keys)
+            self.check(ldf_data, ldt_timestamps, ls_symbols, ls_keys)
+
+    def test_reads_only_what_is_missing(self):
+        ldt_timestamps = days('2008-01-01', 100)
+        self.session.get_data(ldt_timestamps, ['AAA', 'BBB'], ['close'])
+        self.session.get_data(ldt_timestamps[20:60], ['BBB', 'AAA'], ['close'])
+        self.assertEqual(len(self.dataobj.l_calls), 1)
+        self.session.get_data(ldt_timestamps[20:60], ['AAA', 'CCC'], ['close'])
+        self.assertEqual(self.dataobj.l_calls[-1], (40, ['CCC'], ['close']))
+
+    def test_wider_range_is_merged(self):
+        ldt_all = days('2008-01-01', 100)
+        self.session.get_data(ldt_all[:60], ['AAA'], ['close'])
+        self.session.get_data(ldt_all[40:], ['AAA'], ['close'])
+        ldf_data = self.session.get_data(ldt_all, ['AAA'], ['close'])
+        self.assertEqual(len(self.dataobj.l_calls), 2)
+        self.check(ldf_data, ldt_all, ['AAA'], ['close'])
+
+    def test_least_recently_used_is_evicted(self):
+        ldt_timestamps = days('2008-01-01', 50)
+        self.session.get_data(ldt_timestamps, ['AAA'], ['close'])
+        i_one = self.session.i_bytes
+        self.session.i_max_bytes = 2 * i_one
+        self.session.get_data(ldt_timestamps, ['BBB'], ['close'])
+        self.session.get_data(ldt_timestamps, ['AAA'], ['close'])
+        self.session.get_data(ldt_timestamps, ['CCC'], ['close'])
+        self.assertEqual(list(self.session.d_cache), [('close', 'AAA'), ('close', 'CCC')])
+        self.assertTrue(self.session.i_bytes <= self.session.i_max_bytes)
+        i_calls = len(self.dataobj.l_calls)
+        self.session.get_data(ldt_timestamps, ['AAA'], ['close'])
+        self.assertEqual(len(self.dataobj.l_calls), i_calls)
+        self.session.get_data(ldt_timestamps, ['BBB'], ['close'])
+        self.assertEqual(len(self.dataobj.l_calls), i_calls + 1)
+
+    def test_shared_index_counted_once(self):
+        ldt_timestamps = days('2008-01-01', 50)
+        ls_symbols = ['AAA', 'BBB', 'CCC']
+        self.session.get_data(ldt_timestamps, ls_symbols, ['close', 'volume'])
+        i_values = 8 * len(ldt_timestamps)
+        self.assertEqual(self.session.i_bytes, 6 * i_values + i_values)
+        # a wider range gives the merged series an index of their own
+        self.session.get_data(days('2008-01-01', 60), ['AAA'], ['close'])
+        self.assertEqual(self.session.i_bytes, 5 * i_values + i_values + 2 * 8 * 60)
+        self.session.clear()
+        self.assertEqual((self.session.i_bytes, self.session.d_indexes), (0, {}))
+
+
+class LazyDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataobj = FakeData()
+        self.ldt_timestamps = days('2008-01-01', 80)
+        self.ls_symbols = ['AAA', 'BBB', 'CCC']
+        self.ls_keys = ['open', 'close', 'volume', 'actual_close']
+
+    def test_reads_a_field_once_when_used(self):
+        d_data = LazyData(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys)
+        self.assertTrue('volume' in d_data)
+        self.assertEqual(sorted(d_data), sorted(self.ls_keys))
+        self.assertEqual(self.dataobj.l_calls, [])
+        for i in range(2):
+            df = d_data['close']
+            np.testing.assert_array_equal(df.values,
+                                          self.dataobj.value(self.ldt_timestamps, self.ls_symbols, 'close').values)
+        d_data['actual_close']
+        self.assertEqual([l[2] for l in self.dataobj.l_calls], [['close'], ['actual_close']])
+        self.assertEqual(d_data.used_keys(), ['close', 'actual_close'])
+        self.assertRaises(KeyError, d_data.__getitem__, 'adjusted')
+
+    def test_cleaned_like_the_eager_load(self):
+        d_data = LazyData(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys, eventprofiler.remove_nan,
+                          ls_prefetch=['close', 'volume'])
+        self.assertEqual(d_data.gap_stats()['missing'].columns.tolist(), ['close', 'volume'])
+        for s_key in self.ls_keys:
+            df_raw = self.dataobj.value(self.ldt_timestamps, self.ls_symbols, s_key)
+            df_expected = df_raw.fillna(method='ffill').fillna(method='bfill').fillna(1.0)
+            np.testing.assert_array_equal(d_data[s_key].values, df_expected.values)
+            # the gaps of every field read so far
+            np.testing.assert_array_equal(d_data.gap_stats()['missing'][s_key].values,
+                                          np.isnan(df_raw.values).sum(axis=0))
+
+    def test_prefetch_reads_used_fields_together(self):
+        s_dir = tempfile.mkdtemp()
+        try:
+            s_file = os.path.join(s_dir, 'fields.txt')
+            self.assertEqual(load_used_keys(s_file), None)
+            d_data = LazyData(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys)
+            d_data['volume']
+            d_data['close']
+            d_data.save_used_keys(s_file)
+            self.assertEqual(load_used_keys(s_file), ['volume', 'close'])
+
+            self.dataobj.l_calls = []
+            d_data = LazyData(self.dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys,
+                              ls_prefetch=load_used_keys(s_file))
+            d_data['close']
+            d_data['volume']
+            self.assertEqual([l[2] for l in self.dataobj.l_calls], [['volume', 'close']])
+        finally:
+            shutil.rmtree(s_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
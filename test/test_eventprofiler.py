@@ -0,0 +1,104 @@
+#-------------------------------------------------------------------------------
+# Name:        test_eventprofiler.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the vectorized event and order stages against the loops they replaced:
+#
+#   python test_eventprofiler.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import eventprofiler
+
+
+def random_close(i_dates=300, i_symbols=40, i_seed=0):
+    """
+    :return: a dates x symbols dataframe of actual closes wandering across $5, with a few gaps,
+             the benchmark 'SPY' last
+    """
+    rng = np.random.RandomState(i_seed)
+    na_close = 5.0 * np.exp(np.cumsum(rng.normal(0, 0.05, (i_dates, i_symbols)), axis=0))
+    na_close[rng.rand(i_dates, i_symbols) < 0.02] = np.NAN
+    ls_symbols = ['S%03d' % j for j in range(i_symbols - 1)] + ['SPY']
+    index = pd.bdate_range('2008-01-01', periods=i_dates) + dt.timedelta(hours=16)
+    return pd.DataFrame(na_close, index=index, columns=ls_symbols)
+
+
+def loop_five_dollar_event(ls_symbols, df_close):
+    # the scalar scan five_dollar_event replaced, one symbol and one day at a time
+    na_events = np.empty(df_close.shape)
+    na_events.fill(np.NAN)
+    for s_sym in ls_symbols:
+        j = df_close.columns.get_loc(s_sym)
+        na_close = df_close[s_sym].values
+        for i in range(1, len(na_close)):
+            if na_close[i - 1] >= 5.0 and na_close[i] < 5.0:
+                na_events[i, j] = 1
+    return na_events
+
+
+def loop_transactions(df_events, i_hold=5, i_shares=100, s_side='Buy'):
+    # the iterrows scan transactions_from_eventmatrix replaced, which always bought 100 shares for 5 days
+    transactions = []
+    num_dates = len(df_events.index)
+    s_exit = 'Sell' if s_side == 'Buy' else 'Buy'
+    for i, date in enumerate(df_events.index):
+        for s_sym, ele in zip(df_events.columns, df_events.values[i]):
+            if ele == 1:
+                transactions.append((date.year, date.month, date.day, s_sym, s_side, i_shares, ' '))
+                exit_date = df_events.index[min(i + i_hold, num_dates - 1)]
+                transactions.append((exit_date.year, exit_date.month, exit_date.day, s_sym, s_exit, i_shares, ' '))
+    return transactions
+
+
+class FiveDollarEventTest(unittest.TestCase):
+
+    def setUp(self):
+        self.df_close = random_close()
+        self.ls_symbols = list(self.df_close.columns)
+
+    def test_matches_loop(self):
+        df_events = eventprofiler.five_dollar_event(self.ls_symbols, {'actual_close': self.df_close}, 'SPY')
+        self.assertTrue(df_events.index.equals(self.df_close.index))
+        self.assertTrue(df_events.columns.equals(self.df_close.columns))
+        na_expected = loop_five_dollar_event(self.ls_symbols, self.df_close)
+        self.assertTrue((na_expected == 1).any())
+        np.testing.assert_array_equal(df_events.values, na_expected)
+
+    def test_only_requested_symbols(self):
+        ls_some = self.ls_symbols[::3]
+        df_events = eventprofiler.five_dollar_event(ls_some, {'actual_close': self.df_close}, 'SPY')
+        np.testing.assert_array_equal(df_events.values, loop_five_dollar_event(ls_some, self.df_close))
+
+
+class TransactionsTest(unittest.TestCase):
+
+    def setUp(self):
+        df_close = random_close()
+        self.df_events = eventprofiler.five_dollar_event(list(df_close.columns), {'actual_close': df_close}, 'SPY')
+
+    def test_matches_loop(self):
+        # an event in the last days is sold on the last day
+        self.df_events.iloc[-2, 3] = 1
+        orders = eventprofiler.transactions_from_eventmatrix(self.df_events)
+        self.assertEqual(orders.values.tolist(), [list(t) for t in loop_transactions(self.df_events)])
+
+    def test_holding_rules(self):
+        for i_hold, i_shares, s_side in [(1, 10, 'Buy'), (20, 250, 'Sell'), (1000, 100, 'Buy')]:
+            orders = eventprofiler.transactions_from_eventmatrix(self.df_events, i_hold, i_shares, s_side)
+            self.assertEqual(orders.values.tolist(),
+                             [list(t) for t in loop_transactions(self.df_events, i_hold, i_shares, s_side)])
+
+
+if __name__ == '__main__':
+    unittest.main()
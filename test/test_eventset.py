@@ -0,0 +1,67 @@
+#-------------------------------------------------------------------------------
+# Name:        test_eventset.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that sparse event sets carry exactly what the dense event matrices do:
+#
+#   python test_eventset.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import eventprofiler
+import predicates
+from eventset import EventSet
+from test_predicates import random_data
+
+
+class EventSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.d_data = random_data()
+        self.ls_symbols = list(self.d_data['actual_close'].columns)
+        self.df_events = eventprofiler.five_dollar_event(self.ls_symbols, self.d_data, 'SPY')
+
+    def test_matrix_round_trip(self):
+        event_set = EventSet.from_matrix(self.df_events)
+        self.assertEqual(len(event_set), (self.df_events.values == 1).sum())
+        df_back = event_set.to_matrix()
+        self.assertTrue(df_back.index.equals(self.df_events.index))
+        self.assertTrue(df_back.columns.equals(self.df_events.columns))
+        np.testing.assert_array_equal(df_back.values, self.df_events.values)
+        np.testing.assert_array_equal(event_set.to_mask(), self.df_events.values == 1)
+
+    def test_sorted_by_date_then_symbol(self):
+        event_set = EventSet.from_matrix(self.df_events)
+        na_order = np.lexsort((event_set.na_symbols, event_set.na_dates))
+        np.testing.assert_array_equal(na_order, np.arange(len(event_set)))
+
+    def test_sparse_five_dollar_event(self):
+        event_set = eventprofiler.five_dollar_event(self.ls_symbols, self.d_data, 'SPY', b_sparse=True)
+        expected = EventSet.from_matrix(self.df_events)
+        np.testing.assert_array_equal(event_set.na_dates, expected.na_dates)
+        np.testing.assert_array_equal(event_set.na_symbols, expected.na_symbols)
+        self.assertTrue(event_set.dates().equals(expected.dates()))
+
+    def test_sparse_predicates(self):
+        ls_names = sorted(predicates.d_events)
+        d_dense = predicates.find_events(ls_names, self.ls_symbols, self.d_data, 'SPY')
+        d_sparse = predicates.find_events(ls_names, self.ls_symbols, self.d_data, 'SPY', b_sparse=True)
+        for s_name in ls_names:
+            np.testing.assert_array_equal(d_sparse[s_name].to_matrix().values, d_dense[s_name].values)
+
+    def test_orders_from_sparse_events(self):
+        orders = eventprofiler.transactions_from_eventmatrix(EventSet.from_matrix(self.df_events))
+        expected = eventprofiler.transactions_from_eventmatrix(self.df_events)
+        self.assertEqual(orders.values.tolist(), expected.values.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
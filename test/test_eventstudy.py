@@ -0,0 +1,88 @@
+#-------------------------------------------------------------------------------
+# Name:        test_eventstudy.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the native event study against the event by event loop of QSTK's
+# eventprofiler:
+#
+#   python test_eventstudy.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import eventprofiler
+import eventstudy
+from eventset import EventSet
+from test_eventprofiler import random_close
+
+
+def loop_study(df_events, df_close, i_lookback=20, i_lookforward=20, b_market_neutral=True, s_market_sym='SPY'):
+    # the figures QSTK's eventprofiler works out before drawing, one event at a time
+    df_events = df_events.copy()
+    df_rets = df_close.copy()
+    na_rets = df_rets.values
+    na_rets[1:, :] = na_rets[1:, :] / na_rets[:-1, :] - 1
+    na_rets[0, :] = 0
+    if b_market_neutral:
+        df_rets = df_rets.sub(df_rets[s_market_sym], axis=0)
+        del df_rets[s_market_sym]
+        del df_events[s_market_sym]
+    df_events.values[0:i_lookback, :] = np.NAN
+    df_events.values[-i_lookforward:, :] = np.NAN
+
+    l_event_rets = []
+    for s_sym in df_events.columns:
+        for j in range(len(df_events.index)):
+            if df_events[s_sym].values[j] == 1:
+                l_event_rets.append(df_rets[s_sym].values[j - i_lookback:j + 1 + i_lookforward])
+    na_event_rets = np.cumprod(np.array(l_event_rets) + 1, axis=1)
+    na_event_rets = (na_event_rets.T / na_event_rets[:, i_lookback]).T
+    return np.mean(na_event_rets, axis=0), np.std(na_event_rets, axis=0), len(l_event_rets)
+
+
+class EventStudyTest(unittest.TestCase):
+
+    def setUp(self):
+        d_data = {'close': random_close()}
+        eventprofiler.remove_nan(d_data, ['close'])
+        self.df_close = d_data['close']
+        self.ls_symbols = list(self.df_close.columns)
+        self.df_events = eventprofiler.five_dollar_event(self.ls_symbols, {'actual_close': self.df_close}, 'SPY')
+        # events too close to either end, and one on the market, are left out
+        self.df_events.iloc[3, 0] = 1
+        self.df_events.iloc[-4, 1] = 1
+        self.df_events.iloc[100, -1] = 1
+
+    def test_matches_loop(self):
+        for i_lookback, i_lookforward, b_market_neutral in [(20, 20, True), (5, 30, True), (10, 10, False)]:
+            d_study = eventstudy.study(self.df_events, self.df_close, i_lookback, i_lookforward, b_market_neutral)
+            na_mean, na_std, i_count = loop_study(self.df_events, self.df_close, i_lookback, i_lookforward,
+                                                  b_market_neutral)
+            self.assertEqual(d_study['count'], i_count)
+            np.testing.assert_allclose(d_study['mean'], na_mean, rtol=1e-12)
+            np.testing.assert_allclose(d_study['std'], na_std, rtol=1e-9, atol=1e-15)
+            np.testing.assert_array_equal(d_study['days'], np.arange(-i_lookback, i_lookforward + 1))
+
+    def test_shared_returns(self):
+        na_rets = eventstudy.event_returns(self.df_close)
+        i_market_col = self.df_close.columns.get_loc('SPY')
+        d_study = eventstudy.study_from_returns(na_rets, EventSet.from_matrix(self.df_events), i_market_col=i_market_col)
+        d_expected = eventstudy.study(self.df_events, self.df_close)
+        np.testing.assert_array_equal(d_study['mean'], d_expected['mean'])
+
+    def test_no_events(self):
+        self.df_events.values[:] = np.NAN
+        d_study = eventstudy.study(self.df_events, self.df_close)
+        self.assertEqual(d_study['count'], 0)
+        self.assertTrue(np.isnan(d_study['mean']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
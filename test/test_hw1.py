@@ -0,0 +1,156 @@
+#-------------------------------------------------------------------------------
+# Name:        test_hw1.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the batched allocation search in hw/hw1.py against scoring every
+# allocation with simulate, one at a time, and the sliding walk-forward sums
+# against summing every window afresh:
+#
+#   python test_hw1.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import itertools
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'hw'))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import datasession
+import hw1
+import tradingcalendar
+from test_sweep import FrameData
+
+
+START = dt.datetime(2011, 1, 1)
+END = dt.datetime(2011, 12, 31)
+
+
+def random_prices(i_days=300, i_assets=4, i_seed=0):
+    rng = np.random.RandomState(i_seed)
+    return 50 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, (i_days, i_assets)), axis=0))
+
+
+def use_prices(equities, na_price, start=START, end=END):
+    """
+    :return: nothing; installs a session whose closes of equities are the rows of na_price, one
+             per trading day from start to end
+    """
+    ldt_timestamps = tradingcalendar.get_calendar().days(start, end, tradingcalendar.CLOSE)
+    df_close = pd.DataFrame(na_price[:len(ldt_timestamps)], index=ldt_timestamps, columns=equities)
+    datasession.set_session(datasession.DataSession(FrameData({'close': df_close})))
+
+
+def brute_force(equities, num_steps):
+    """
+    :return: every allocation on the grid with its Sharpe ratio from simulate, best first
+    """
+    l_scored = []
+    for allocs in itertools.product(range(num_steps + 1), repeat=len(equities)):
+        if sum(allocs) == num_steps:
+            allocs = [a / float(num_steps) for a in allocs]
+            l_scored.append((allocs, hw1.simulate(START, END, equities, allocs)[2]))
+    l_scored.sort(key=lambda pair: -pair[1])
+    return l_scored
+
+
+class AllocationSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.old_session = datasession._session
+
+    def tearDown(self):
+        datasession.set_session(self.old_session)
+
+    def test_grid_is_complete_and_ordered(self):
+        for num_assets, num_steps in [(1, 5), (3, 4), (4, 10), (6, 5)]:
+            na_grid = np.vstack(list(hw1.simplex_grid(num_assets, num_steps, max_rows=7, max_table_rows=20)))
+            na_expected = np.array([a for a in itertools.product(range(num_steps + 1), repeat=num_assets)
+                                    if sum(a) == num_steps])
+            np.testing.assert_array_equal(na_grid, na_expected)
+            self.assertEqual(len(na_grid), hw1.count_compositions(num_steps, num_assets))
+
+    def test_scores_match_simulate(self):
+        equities = ['A', 'B', 'C', 'D']
+        use_prices(equities, random_prices())
+        na_price = hw1.get_close_prices(START, END, equities)
+        na_allocs = np.vstack(list(hw1.simplex_grid(4, 5, max_rows=100))) / 5.0
+        l_scores = hw1.score_allocations(na_price / na_price[0, :], na_allocs)
+        for i, allocs in enumerate(na_allocs):
+            np.testing.assert_allclose([s[i] for s in l_scores], hw1.simulate(START, END, equities, allocs),
+                                       rtol=1e-9)
+
+    def test_top_portfolios_match_brute_force(self):
+        for i_seed, i_assets, step in [(0, 4, 0.1), (1, 4, 0.1), (2, 5, 0.2)]:
+            equities = ['E%d' % j for j in range(i_assets)]
+            use_prices(equities, random_prices(i_assets=i_assets, i_seed=i_seed))
+            l_expected = brute_force(equities, int(round(1 / step)))[:10]
+            # a small memory budget forces many chunks
+            l_top = hw1.find_top_portfolios(START, END, equities, step, top_k=10, max_bytes=50000)
+            self.assertEqual([allocs for allocs, sharpe in l_top], [allocs for allocs, sharpe in l_expected])
+            np.testing.assert_allclose([s for a, s in l_top], [s for a, s in l_expected], rtol=1e-9)
+            self.assertEqual(hw1.find_best_portfolio(START, END, equities, step)[0], l_expected[0][0])
+
+    def test_worker_processes_match_one_process(self):
+        equities = ['E%d' % j for j in range(6)]
+        use_prices(equities, random_prices(i_assets=6, i_seed=3))
+        l_one = hw1.find_top_portfolios(START, END, equities, 0.1, top_k=15, processes=1)
+        l_pool = hw1.find_top_portfolios(START, END, equities, 0.1, top_k=15, max_bytes=50000,
+                                         processes=3, min_parallel=0)
+        self.assertEqual(l_pool, l_one)
+
+    def test_step_must_divide_one(self):
+        equities = ['A', 'B', 'C']
+        use_prices(equities, random_prices(i_assets=3))
+        for step in [0.3, 0.15, 0.0, 1.5]:
+            self.assertRaises(ValueError, hw1.find_top_portfolios, START, END, equities, step)
+            self.assertRaises(ValueError, hw1.walk_forward, START, END, equities, step)
+        self.assertEqual(hw1.grid_steps(0.05), 20)
+
+
+def fresh_walk_forward(na_price, ldt_timestamps, num_steps, window, every):
+    # every window's returns summed from scratch
+    na_rets = na_price[1:, :] / na_price[:-1, :] - 1
+    na_rets[np.isnan(na_rets)] = 0
+    na_allocs = np.vstack(list(hw1.simplex_grid(na_price.shape[1], num_steps, 100000))) / float(num_steps)
+    results = []
+    for last in range(window - 1, len(na_price), every):
+        na_window = na_rets[last - window + 1:last]
+        daily_ret = np.dot(na_allocs, na_window.sum(axis=0)) / window
+        mean_sq = np.array([np.dot(w, np.dot(np.dot(na_window.T, na_window), w)) for w in na_allocs]) / window
+        sharpe = np.sqrt(252) * daily_ret / np.sqrt(np.maximum(mean_sq - daily_ret ** 2, 0))
+        best = np.argmax(sharpe)
+        results.append((ldt_timestamps[last], [round(a, 4) for a in na_allocs[best]], sharpe[best]))
+    return results
+
+
+class WalkForwardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.old_session = datasession._session
+
+    def tearDown(self):
+        datasession.set_session(self.old_session)
+
+    def test_matches_fresh_sums(self):
+        start, end = dt.datetime(2004, 1, 1), dt.datetime(2011, 12, 31)
+        equities = ['W1', 'W2', 'W3', 'W4']
+        ldt_timestamps = tradingcalendar.get_calendar().days(start, end, tradingcalendar.CLOSE)
+        na_price = random_prices(i_days=len(ldt_timestamps), i_seed=3)
+        na_price[100:103, 1] = np.NAN
+        use_prices(equities, na_price, start, end)
+        for window, every in [(252, 21), (60, 5), (30, 45)]:
+            results = hw1.walk_forward(start, end, equities, 0.1, window, every)
+            expected = fresh_walk_forward(na_price, ldt_timestamps, 10, window, every)
+            self.assertEqual([(d, a) for d, a, s in results], [(d, a) for d, a, s in expected])
+            np.testing.assert_allclose([s for d, a, s in results], [s for d, a, s in expected], rtol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#-------------------------------------------------------------------------------
+# Name:        test_ledger.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the bulk ledger against the order by order loop it replaced:
+#
+#   python test_ledger.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import ledger
+
+
+STARTING_CASH = 1000000
+
+
+def random_orders(i_dates=250, i_symbols=12, i_orders=400, i_seed=0):
+    """
+    :return: a dates x symbols array of prices with a few gaps, and the date position, symbol
+             position and signed quantity of each order; many days have several orders
+    """
+    rng = np.random.RandomState(i_seed)
+    na_prices = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (i_dates, i_symbols)), axis=0))
+    na_prices[rng.rand(i_dates, i_symbols) < 0.01] = np.NAN
+    na_rows = np.sort(rng.randint(0, i_dates, i_orders))
+    na_cols = rng.randint(0, i_symbols, i_orders)
+    na_amt = rng.randint(1, 500, i_orders) * np.where(rng.rand(i_orders) < 0.5, 1, -1)
+    return na_prices, na_rows, na_cols, na_amt
+
+
+def loop_values(na_prices, na_rows, na_cols, na_amt, starting_cash, b_each_order=False):
+    """
+    :return: the portfolio values booked one order at a time with pandas' NaN handling; as in the
+             original marketsim, each order is charged the day's net change in its symbol once all
+             the orders are booked, or only its own quantity with b_each_order
+    """
+    na_holdings_change = np.zeros(na_prices.shape, dtype=np.int64)
+    for i_row, j, i_amt in zip(na_rows, na_cols, na_amt):
+        na_holdings_change[i_row, j] += i_amt
+    na_cash_change = np.zeros(len(na_prices))
+    for i_row, j, i_amt in zip(na_rows, na_cols, na_amt):
+        i_charged = i_amt if b_each_order else na_holdings_change[i_row, j]
+        na_cash_change[i_row] -= i_charged * na_prices[i_row, j]
+    na_cash_change[0] += starting_cash
+
+    equities = pd.DataFrame(na_holdings_change.cumsum(axis=0) * na_prices).sum(axis=1)
+    cash = pd.Series(na_cash_change).cumsum()
+    return (equities + cash).values
+
+
+class LedgerTest(unittest.TestCase):
+
+    def test_matches_loop(self):
+        for i_seed in range(3):
+            na_prices, na_rows, na_cols, na_amt = random_orders(i_seed=i_seed)
+            na_holdings, na_cash = ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt, STARTING_CASH)
+            np.testing.assert_allclose(ledger.portfolio_values(na_prices, na_holdings, na_cash),
+                                       loop_values(na_prices, na_rows, na_cols, na_amt, STARTING_CASH), rtol=1e-12)
+
+    def test_each_order_matches_loop(self):
+        na_prices, na_rows, na_cols, na_amt = random_orders()
+        # several orders for one symbol on one day is where the two ways of charging differ
+        self.assertTrue(len(set(zip(na_rows, na_cols))) < len(na_rows))
+        na_holdings, na_cash = ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt, STARTING_CASH,
+                                                        b_each_order=True)
+        na_values = ledger.portfolio_values(na_prices, na_holdings, na_cash)
+        np.testing.assert_allclose(na_values, loop_values(na_prices, na_rows, na_cols, na_amt, STARTING_CASH,
+                                                          b_each_order=True), rtol=1e-12)
+        na_net = ledger.portfolio_values(na_prices, *ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt,
+                                                                               STARTING_CASH))
+        self.assertFalse(np.allclose(na_values, na_net, equal_nan=True))
+
+    def test_holdings(self):
+        na_prices, na_rows, na_cols, na_amt = random_orders()
+        na_holdings = ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt, STARTING_CASH)[0]
+        na_expected = np.zeros(na_prices.shape, dtype=np.int64)
+        np.add.at(na_expected, (na_rows, na_cols), na_amt)
+        np.testing.assert_array_equal(na_holdings, na_expected.cumsum(axis=0))
+
+    def test_missing_price_only_affects_its_day(self):
+        na_prices, na_rows, na_cols, na_amt = random_orders()
+        na_prices[:, :] = np.where(np.isnan(na_prices), 10.0, na_prices)
+        na_prices[na_rows[5], na_cols[5]] = np.NAN
+        na_holdings, na_cash = ledger.holdings_and_cash(na_prices, na_rows, na_cols, na_amt, STARTING_CASH)
+        na_nan = np.isnan(na_cash)
+        self.assertEqual(list(np.nonzero(na_nan)[0]), [na_rows[5]])
+        self.assertFalse(np.isnan(na_cash[na_rows[5] + 1:]).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
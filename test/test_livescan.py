@@ -0,0 +1,85 @@
+#-------------------------------------------------------------------------------
+# Name:        test_livescan.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that pushing one day at a time through the live scanner finds the
+# events and orders of one batch scan over the whole history:
+#
+#   python test_livescan.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import datasession
+import eventprofiler
+import livescan
+import predicates
+from test_predicates import random_data
+from test_sweep import FrameData
+
+
+class LiveScanTest(unittest.TestCase):
+
+    ls_names = sorted(predicates.d_events)
+    ls_keys = ['actual_close', 'volume']
+
+    def setUp(self):
+        self.d_frames = random_data(i_dates=200, i_symbols=25)
+        # a symbol that lists late and one that stops trading
+        self.d_frames['actual_close'].iloc[:30, 2] = np.NAN
+        self.d_frames['actual_close'].iloc[150:, 4] = np.NAN
+        self.index = self.d_frames['actual_close'].index
+        self.ls_symbols = list(self.d_frames['actual_close'].columns)
+
+    def full_scan(self):
+        d_data = datasession.LazyData(FrameData(self.d_frames), self.index, self.ls_symbols, self.ls_keys,
+                                      fn_clean=eventprofiler.remove_nan)
+        return predicates.find_events(self.ls_names, self.ls_symbols, d_data, 'SPY', b_sparse=True)
+
+    def test_live_matches_full_scan(self):
+        d_expected = self.full_scan()
+        self.assertTrue(sum(len(event_set) for event_set in d_expected.values()) > 0)
+        d_values = dict((s_key, self.d_frames[s_key].values) for s_key in self.ls_keys)
+        scanner = livescan.LiveScanner(self.ls_names, self.ls_symbols, 'SPY')
+        d_events = dict((s_name, []) for s_name in self.ls_names)
+        d_orders = dict((s_name, []) for s_name in self.ls_names)
+        for i, timestamp in enumerate(self.index):
+            if i == len(self.index) // 2:
+                # carry on from a saved state halfway
+                s_dir = tempfile.mkdtemp()
+                scanner.save(os.path.join(s_dir, 'state.npz'))
+                scanner = livescan.LiveScanner.load(os.path.join(s_dir, 'state.npz'))
+                shutil.rmtree(s_dir)
+            d_found, d_day_orders = scanner.push(timestamp, dict((s_key, na_values[i]) for s_key, na_values in
+                                                                 d_values.items()))
+            for s_name in self.ls_names:
+                d_events[s_name].extend((i, j) for j in d_found[s_name].na_symbols)
+                d_orders[s_name].append(d_day_orders[s_name])
+        for s_name, orders in scanner.flush().items():
+            d_orders[s_name].append(orders)
+
+        for s_name in self.ls_names:
+            event_set = d_expected[s_name]
+            self.assertEqual(d_events[s_name], zip(event_set.na_dates, event_set.na_symbols), s_name)
+            na_rows, na_cols, na_amt = eventprofiler.order_coordinates(event_set)
+            l_expected = sorted(zip(self.index[na_rows].date, np.asarray(self.ls_symbols)[na_cols], na_amt))
+            orders = pd.concat(d_orders[s_name])
+            l_found = sorted((dt.date(i_year, i_month, i_day), s_sym, i_shares if s_side == 'Buy' else -i_shares)
+                             for i_year, i_month, i_day, s_sym, s_side, i_shares in
+                             orders[range(6)].itertuples(index=False))
+            self.assertEqual(l_found, l_expected, s_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
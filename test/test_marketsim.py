@@ -0,0 +1,89 @@
+#-------------------------------------------------------------------------------
+# Name:        test_marketsim.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that portfolios updated from a saved ledger state, and many order sets
+# backtested in one pass, match full recomputes of each set:
+#
+#   python test_marketsim.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import datasession
+import eventprofiler
+import marketsim
+from test_predicates import random_data
+from test_sweep import FrameData
+
+
+class MarketsimTest(unittest.TestCase):
+
+    def setUp(self):
+        d_random = random_data(i_dates=250, i_symbols=20)
+        self.d_data = {'actual_close': d_random['actual_close'], 'close': d_random['actual_close'] * 1.1}
+        self.s_dir = tempfile.mkdtemp()
+        self.old_session = datasession._session
+        datasession.set_session(datasession.DataSession(FrameData(self.d_data)))
+
+        self.df_events = eventprofiler.five_dollar_event(list(self.d_data['close'].columns), self.d_data, 'SPY')
+        self.orders = eventprofiler.transactions_from_eventmatrix(self.df_events, 7, 100)
+        self.orders_file = self.write_orders(self.orders, 'orders.csv')
+
+    def tearDown(self):
+        datasession.set_session(self.old_session)
+        shutil.rmtree(self.s_dir)
+
+    def write_orders(self, orders, s_name):
+        s_file = os.path.join(self.s_dir, s_name)
+        orders.to_csv(s_file, header=False, index=False)
+        return s_file
+
+    def test_updates_match_full_recompute(self):
+        portfolio = marketsim.portfolio_from_orders(self.orders_file, 50000)
+        na_dates = pd.to_datetime(self.orders[0] * 10000 + self.orders[1] * 100 + self.orders[2], format='%Y%m%d')
+        s_checkpoint = os.path.join(self.s_dir, 'ledger.pkl')
+        l_parts = []
+        dt_from = na_dates.min()
+        for dt_to in [pd.Timestamp('2008-04-15'), pd.Timestamp('2008-09-01'), na_dates.max()]:
+            na_part = (na_dates >= dt_from) & (na_dates <= dt_to)
+            s_file = self.write_orders(self.orders[na_part.values], 'part.csv')
+            l_parts.append(marketsim.update_portfolio(s_file, 50000, s_checkpoint))
+            dt_from = dt_to + pd.Timedelta(days=1)
+        updated = pd.concat(l_parts)
+        self.assertTrue(updated.index.equals(portfolio.index))
+        np.testing.assert_array_equal(updated['value'].values, portfolio['value'].values)
+
+    def test_orders_already_booked_raise(self):
+        s_checkpoint = os.path.join(self.s_dir, 'ledger.pkl')
+        marketsim.update_portfolio(self.orders_file, 50000, s_checkpoint)
+        self.assertRaises(ValueError, marketsim.update_portfolio, self.orders_file, 50000, s_checkpoint)
+
+    def test_batch_matches_single_runs(self):
+        l_files = [self.orders_file]
+        for i, (i_hold, s_side, i_from) in enumerate([(3, 'Sell', 40), (15, 'Buy', 100)]):
+            # sets that start later than the others
+            orders = eventprofiler.transactions_from_eventmatrix(self.df_events.iloc[i_from:], i_hold, 50, s_side)
+            l_files.append(self.write_orders(orders, 'set%d.csv' % i))
+        for b_each_order in [False, True]:
+            values = marketsim.portfolios_from_orders(l_files, 50000, b_each_order=b_each_order)
+            for s_file in l_files:
+                expected = marketsim.portfolio_from_orders(s_file, 50000, b_each_order=b_each_order)
+                np.testing.assert_array_equal(values[s_file].reindex(expected.index).values,
+                                              expected['value'].values)
+                # the starting cash until the set's first order
+                self.assertTrue((values[s_file][values.index < expected.index[0]] == 50000).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#-------------------------------------------------------------------------------
+# Name:        test_orders.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the streaming order reader and the binary orders format against the
+# pandas read_csv path marketsim used before:
+#
+#   python test_orders.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import orders
+
+
+def read_csv_orders(filename):
+    # the read marketsim.portfolio_from_orders used to do, for one order per line
+    csv_headers = ('year', 'month', 'day', 'symbol', 'ordertype', 'amt', 'junk')
+    df = pd.read_csv(filename, header=None, names=csv_headers)
+    dates = pd.to_datetime((df['year'] * 10000 + df['month'] * 100 + df['day']).astype(str), format='%Y%m%d')
+    return pd.DataFrame({'date': dates, 'symbol': df['symbol'],
+                         'amt': df['amt'] * np.where(df['ordertype'] == 'Buy', 1, -1)},
+                        columns=('date', 'symbol', 'amt'))
+
+
+def random_order_lines(i_orders=3000, i_seed=0):
+    rng = np.random.RandomState(i_seed)
+    na_days = pd.bdate_range('2008-01-01', periods=500)[rng.randint(0, 500, i_orders)]
+    ls_symbols = ['S%03d' % j for j in rng.randint(0, 80, i_orders)]
+    ls_sides = np.where(rng.rand(i_orders) < 0.5, 'Buy', 'Sell')
+    na_amt = rng.randint(1, 5000, i_orders)
+    return ['%d,%d,%d,%s,%s,%d,' % (d.year, d.month, d.day, s, side, a)
+            for d, s, side, a in zip(na_days, ls_symbols, ls_sides, na_amt)]
+
+
+class OrdersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.s_dir)
+
+    def write(self, s_text, s_name='orders.csv'):
+        s_file = os.path.join(self.s_dir, s_name)
+        with open(s_file, 'wb') as f:
+            f.write(s_text)
+        return s_file
+
+    def check(self, df, df_expected):
+        self.assertEqual(list(df.columns), ['date', 'symbol', 'amt'])
+        np.testing.assert_array_equal(df['date'].values, df_expected['date'].values)
+        self.assertEqual(list(df['symbol'].astype(str)), list(df_expected['symbol']))
+        np.testing.assert_array_equal(df['amt'].values, df_expected['amt'].values)
+
+    def test_matches_read_csv(self):
+        s_file = self.write('\n'.join(random_order_lines()) + '\n')
+        df_expected = read_csv_orders(s_file)
+        # tiny chunks cut fields and orders at every possible place
+        for i_chunk_bytes in [7, 64, 1000, 16 * 1024 * 1024]:
+            self.check(orders.read_orders_csv(s_file, i_chunk_bytes), df_expected)
+
+    def test_separators(self):
+        ls_lines = random_order_lines(200)
+        df_expected = read_csv_orders(self.write('\n'.join(ls_lines) + '\n'))
+        s_mixed = ''.join(s + ('\r' if i % 3 == 0 else ',\n' if i % 3 == 1 else '\r\n')
+                          for i, s in enumerate(l.rstrip(',') for l in ls_lines))
+        self.check(orders.read_orders_csv(self.write(s_mixed), 50), df_expected)
+
+    def test_several_orders_per_line(self):
+        df = orders.read_orders_csv(os.path.join(TEST_DIR, 'orders.csv'))
+        self.assertEqual(len(df), 14)
+        self.assertEqual(list(df['symbol'][:3].astype(str)), ['AAPL', 'AAPL', 'IBM'])
+        self.assertEqual(list(df['amt'][:3]), [1500, -1500, 4000])
+        self.assertEqual(df['date'][0], pd.Timestamp('2011-01-10'))
+
+    def test_binary_round_trip(self):
+        s_file = self.write('\n'.join(random_order_lines()) + '\n')
+        df = orders.read_orders_csv(s_file)
+        s_npz = os.path.join(self.s_dir, 'orders.npz')
+        orders.save_orders(df, s_npz)
+        self.check(orders.read_orders(s_npz), read_csv_orders(s_file))
+
+    def test_bad_input_raises(self):
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,30,AAPL,Buy,100,\n'))
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,3,AAPL,Buy,1x0,\n2011,2,4,IBM,Buy,5,\n'))
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,3,AAPL,Buy,100,\n2011,2,4\n'))
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,4,IBM,Buy,5,\n2011,2,3,AAPL,Buy,1x0\n'))
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,3,AAPL,Hold,100,\n'))
+        self.assertRaises(ValueError, orders.read_orders_csv, self.write('2011,2,3,AAPL,buy,100,\n'))
+
+    def test_misaligned_line_raises(self):
+        ls_lines = random_order_lines(300)
+        # a note in the seventh column, or a missing field made up by the next line, would shift every later field
+        for s_bad in ['2011,2,3,AAPL,Buy,100,filled late', '2011,2,3,AAPL,100,', '2011,2,3,AAPL,Buy,100,\t,x']:
+            s_file = self.write('\n'.join(ls_lines[:150] + [s_bad] + ls_lines[150:]) + '\n')
+            for i_chunk_bytes in [7, 1000, 16 * 1024 * 1024]:
+                self.assertRaises(ValueError, orders.read_orders_csv, s_file, i_chunk_bytes)
+        s_blank = self.write('\n'.join(ls_lines[:150] + ['2011,2,3,AAPL,Buy,100, \t ', '', ' , '] + ls_lines[150:]))
+        self.assertEqual(len(orders.read_orders_csv(s_blank, 64)), 301)
+
+
+if __name__ == '__main__':
+    unittest.main()
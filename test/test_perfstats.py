@@ -0,0 +1,100 @@
+#-------------------------------------------------------------------------------
+# Name:        test_perfstats.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the portfolio statistics against the pandas and numpy blocks of
+# compare_portfolio_to_benchmark, one portfolio and one window at a time:
+#
+#   python test_perfstats.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import QSTK.qstkutil.tsutil as tsu
+import perfstats
+
+
+def random_values(i_dates=300, i_portfolios=8, i_seed=0, f_missing=0.02):
+    rng = np.random.RandomState(i_seed)
+    na_values = 1e5 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (i_dates, i_portfolios)), axis=0))
+    na_values[1:][rng.rand(i_dates - 1, i_portfolios) < f_missing] = np.NAN
+    return na_values
+
+
+def fund_statistics(na_value):
+    # the pandas block compare_portfolio_to_benchmark ran on the fund
+    value_norm = pd.Series(na_value / float(na_value[0]))
+    rets_norm = value_norm.copy()
+    tsu.returnize0(rets_norm)
+    volatility = rets_norm.std()
+    avg_daily_ret = rets_norm.mean()
+    return [np.sqrt(252) * avg_daily_ret / volatility, volatility, avg_daily_ret, value_norm.iloc[-1]]
+
+
+def benchmark_statistics(na_price):
+    # the numpy block it ran on the benchmark
+    na_normalized_price_b = na_price / na_price[0]
+    rets_norm_b = na_normalized_price_b.copy()
+    tsu.returnize0(rets_norm_b)
+    volatility_b = rets_norm_b.std()
+    avg_daily_ret_b = rets_norm_b.mean()
+    return [np.sqrt(252) * avg_daily_ret_b / volatility_b, volatility_b, avg_daily_ret_b, na_normalized_price_b[-1]]
+
+
+STATS = ['sharpe', 'volatility', 'avg_daily_ret', 'cum_ret']
+
+
+class StatisticsTest(unittest.TestCase):
+
+    def test_fund_matches_pandas(self):
+        na_values = random_values()
+        d_stats = perfstats.statistics(na_values)
+        for j in range(na_values.shape[1]):
+            np.testing.assert_allclose([d_stats[s][j] for s in STATS], fund_statistics(na_values[:, j]),
+                                       rtol=1e-12)
+
+    def test_benchmark_matches_numpy(self):
+        na_values = random_values(f_missing=0.0)
+        na_values[50, 3] = np.NAN
+        d_stats = perfstats.statistics(na_values, i_ddof=0, b_skipna=False)
+        for j in range(na_values.shape[1]):
+            np.testing.assert_allclose([d_stats[s][j] for s in STATS], benchmark_statistics(na_values[:, j]),
+                                       rtol=1e-12)
+        self.assertTrue(np.isnan(d_stats['sharpe'][3]))
+
+    def test_rolling_matches_each_window(self):
+        na_values = random_values(i_dates=120, i_portfolios=4)
+        na_values[1:] = np.where(np.isnan(na_values[1:]), na_values[:-1], na_values[1:])
+        i_window = 20
+        d_rolling = perfstats.rolling_statistics(na_values, i_window)
+        na_rets = perfstats.daily_returns(na_values)
+        for i in range(len(na_values)):
+            for j in range(na_values.shape[1]):
+                if i < i_window - 1:
+                    self.assertTrue(np.isnan(d_rolling['sharpe'][i, j]))
+                    continue
+                rets = pd.Series(na_rets[i - i_window + 1:i + 1, j])
+                np.testing.assert_allclose([d_rolling['avg_daily_ret'][i, j], d_rolling['volatility'][i, j]],
+                                           [rets.mean(), rets.std()], rtol=1e-7)
+
+    def test_running_update_matches_rolling(self):
+        na_values = random_values(i_dates=150)
+        i_window = 30
+        d_rolling = perfstats.rolling_statistics(na_values, i_window)
+        running = perfstats.RollingStatistics(na_values.shape[1], i_window)
+        for i in range(len(na_values)):
+            d_now = running.update(na_values[i])
+            for s_stat in ['sharpe', 'volatility', 'avg_daily_ret']:
+                np.testing.assert_allclose(d_now[s_stat], d_rolling[s_stat][i], rtol=1e-7, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
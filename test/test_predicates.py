@@ -0,0 +1,139 @@
+#-------------------------------------------------------------------------------
+# Name:        test_predicates.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the registered event predicates against scalar scans, one symbol and
+# one day at a time, and the batched pass against one pass per event:
+#
+#   python test_predicates.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import event
+import eventprofiler
+import predicates
+
+
+def random_data(i_dates=300, i_symbols=30, i_seed=0):
+    """
+    :return: a dict with 'actual_close' (wandering across $5, with a few gaps) and 'volume'
+             (whole shares, no gaps) dataframes, the benchmark 'SPY' last
+    """
+    rng = np.random.RandomState(i_seed)
+    na_close = 5.0 * np.exp(np.cumsum(rng.normal(0, 0.04, (i_dates, i_symbols)), axis=0))
+    na_close[rng.rand(i_dates, i_symbols) < 0.02] = np.NAN
+    na_volume = np.rint(rng.lognormal(10, 0.6, (i_dates, i_symbols)))
+    ls_symbols = ['S%03d' % j for j in range(i_symbols - 1)] + ['SPY']
+    index = pd.bdate_range('2008-01-01', periods=i_dates) + dt.timedelta(hours=16)
+    return {'actual_close': pd.DataFrame(na_close, index=index, columns=ls_symbols),
+            'volume': pd.DataFrame(na_volume, index=index, columns=ls_symbols)}
+
+
+def loop_mask(df, fn_event, i_start=1):
+    # fn_event(na_series, na_market, i) decides one symbol on one day
+    na_mask = np.zeros(df.shape, dtype=bool)
+    na_market = df['SPY'].values
+    for j, s_sym in enumerate(df.columns):
+        na_series = df[s_sym].values
+        for i in range(i_start, len(na_series)):
+            na_mask[i, j] = fn_event(na_series, na_market, i)
+    return na_mask
+
+
+def cross_below(f_price):
+    return lambda na_p, na_m, i: na_p[i - 1] >= f_price and na_p[i] < f_price
+
+
+def cross_above(f_price):
+    return lambda na_p, na_m, i: na_p[i - 1] < f_price and na_p[i] >= f_price
+
+
+def relative_drop(f_sym_ret, f_market_ret):
+    return lambda na_p, na_m, i: (na_p[i] / na_p[i - 1] - 1 <= f_sym_ret and
+                                  na_m[i] / na_m[i - 1] - 1 >= f_market_ret)
+
+
+def volume_spike(f_ratio, i_window):
+    return lambda na_v, na_m, i: na_v[i] >= f_ratio * (np.sum(na_v[i - i_window:i]) / i_window)
+
+
+class PredicateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.d_data = random_data()
+        self.ls_symbols = list(self.d_data['actual_close'].columns)
+
+    def evaluate(self, pred):
+        return pred.evaluate(predicates.EventData(self.ls_symbols, self.d_data, 'SPY'))
+
+    def test_price_crosses_match_loop(self):
+        df_close = self.d_data['actual_close']
+        for f_price in [4.0, 5.0, 6.5]:
+            na_below = loop_mask(df_close, cross_below(f_price))
+            self.assertTrue(na_below.any())
+            np.testing.assert_array_equal(self.evaluate(predicates.PriceCrossBelow(f_price)), na_below)
+            np.testing.assert_array_equal(self.evaluate(predicates.PriceCrossAbove(f_price)),
+                                          loop_mask(df_close, cross_above(f_price)))
+
+    def test_relative_drop_matches_loop(self):
+        na_expected = loop_mask(self.d_data['actual_close'], relative_drop(-0.05, 0.02))
+        self.assertTrue(na_expected.any())
+        np.testing.assert_array_equal(self.evaluate(predicates.RelativeDrop(-0.05, 0.02)), na_expected)
+
+    def test_volume_spike_matches_loop(self):
+        na_expected = loop_mask(self.d_data['volume'], volume_spike(2.0, 10), i_start=10)
+        self.assertTrue(na_expected.any())
+        np.testing.assert_array_equal(self.evaluate(predicates.VolumeSpike(2.0, 10)), na_expected)
+
+    def test_combinations(self):
+        below = predicates.PriceCrossBelow(5.0)
+        drop = predicates.RelativeDrop(-0.03, 0.0)
+        spike = predicates.VolumeSpike(1.5, 5)
+        na_below, na_drop, na_spike = self.evaluate(below), self.evaluate(drop), self.evaluate(spike)
+        np.testing.assert_array_equal(self.evaluate(below & drop), na_below & na_drop)
+        np.testing.assert_array_equal(self.evaluate(below | spike), na_below | na_spike)
+        # a day without the spike's 5 days of history can be neither a spike nor its negation
+        na_history = (np.arange(len(na_spike)) >= 5)[:, np.newaxis]
+        np.testing.assert_array_equal(self.evaluate(drop & ~spike), na_drop & ~na_spike & na_history)
+        self.assertEqual(((below | drop) & spike).i_lookback, 5)
+
+    def test_one_pass_matches_one_pass_per_event(self):
+        ls_names = sorted(predicates.d_events)
+        d_all = predicates.find_events(ls_names, self.ls_symbols, self.d_data, 'SPY')
+        for s_name in ls_names:
+            df_one = predicates.find_events([s_name], self.ls_symbols, self.d_data, 'SPY')[s_name]
+            np.testing.assert_array_equal(d_all[s_name].values, df_one.values)
+            self.assertTrue(d_all[s_name].index.equals(self.d_data['actual_close'].index))
+
+    def test_registered_twin_does_not_drift_from_eventprofiler(self):
+        # price_cross_below_five and eventprofiler.five_dollar_event are two definitions of one event
+        for i_seed in range(4):
+            d_data = random_data(i_seed=i_seed)
+            d_data['actual_close'].iloc[:5, 2] = np.NAN
+            d_data['actual_close'].iloc[40:, 4] = 5.0
+            for d_event_data in [d_data, {'actual_close': d_data['actual_close'].astype(np.float32)}]:
+                df_expected = eventprofiler.five_dollar_event(self.ls_symbols, d_event_data, 'SPY')
+                df_events = predicates.find_events(['price_cross_below_five'], self.ls_symbols, d_event_data, 'SPY')
+                self.assertTrue(df_events['price_cross_below_five'].index.equals(df_expected.index))
+                np.testing.assert_array_equal(df_events['price_cross_below_five'].values, df_expected.values)
+
+    def test_registered_names_do_not_shadow_eventprofiler(self):
+        # Event looks a name up in the registry first, so a registered name would hide the function
+        for s_name in predicates.d_events:
+            self.assertFalse(hasattr(eventprofiler, s_name), s_name)
+        self.assertTrue(event.Event('five_dollar_event').find_events(self.ls_symbols, self.d_data, 'SPY')
+                        .equals(eventprofiler.five_dollar_event(self.ls_symbols, self.d_data, 'SPY')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#-------------------------------------------------------------------------------
+# Name:        test_prefetch.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that reading symbol files on a thread pool gives the panel one
+# get_data call gives, and how failing files are retried and skipped:
+#
+#   python test_prefetch.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import prefetch
+from test_pricestore import FakeData, days
+
+
+class FlakyData(FakeData):
+    """
+    FakeData whose files for some symbols fail a given number of times before they read.
+    """
+
+    def __init__(self, d_failures):
+        FakeData.__init__(self)
+        self.d_failures = dict(d_failures)
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        for s_sym in ls_symbols:
+            if self.d_failures.get(s_sym, 0) > 0:
+                self.d_failures[s_sym] -= 1
+                raise IOError('cannot read ' + s_sym)
+        return FakeData.get_data(self, ldt_timestamps, ls_symbols, ls_keys)
+
+
+class BlockLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ldt_timestamps = days('2008-01-01', 120)
+        self.ls_symbols = ['S%02d' % j for j in range(23)]
+        self.ls_keys = ['close', 'volume']
+
+    def test_matches_get_data(self):
+        dataobj = FakeData()
+        loader = prefetch.BlockLoader(dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys, i_threads=4,
+                                      i_block=5, ls_order=['S20', 'S03'])
+        l_blocks = list(loader.iter_blocks())
+        self.assertEqual(sorted(np.concatenate(l_blocks)), range(23))
+        self.assertEqual(list(loader.l_blocks[0][:2]), [20, 3])
+        for s_key in self.ls_keys:
+            df_expected = dataobj.value(self.ldt_timestamps, self.ls_symbols, s_key)
+            np.testing.assert_array_equal(loader.frame(s_key).values, df_expected.values)
+            na_cols = l_blocks[-1]
+            np.testing.assert_array_equal(loader.frame(s_key, na_cols).values, df_expected.values[:, na_cols])
+        self.assertEqual(len(loader.timings()), 23)
+
+    def test_parallel_data_matches_get_data(self):
+        dataobj = FakeData()
+        ldf_data = prefetch.ParallelData(dataobj, i_threads=3).get_data(self.ldt_timestamps, self.ls_symbols,
+                                                                         self.ls_keys)
+        for s_key, df in zip(self.ls_keys, ldf_data):
+            np.testing.assert_array_equal(df.values, dataobj.value(self.ldt_timestamps, self.ls_symbols, s_key).values)
+            self.assertEqual(list(df.columns), self.ls_symbols)
+
+    def test_retries_then_skips(self):
+        dataobj = FlakyData({'S01': 1, 'S02': 5})
+        loader = prefetch.BlockLoader(dataobj, self.ldt_timestamps, self.ls_symbols, self.ls_keys, i_threads=2,
+                                      i_retries=1)
+        df_close = loader.load()[0]
+        self.assertEqual(sorted(loader.d_errors), ['S02'])
+        self.assertTrue(np.isnan(df_close['S02'].values).all())
+        self.assertFalse(loader.is_loaded(2))
+        np.testing.assert_array_equal(df_close['S01'].values,
+                                      dataobj.value(self.ldt_timestamps, ['S01'], 'close')['S01'].values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#-------------------------------------------------------------------------------
+# Name:        test_pricefill.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the in-place gap fill against the fillna chain it replaced:
+#
+#   python test_pricefill.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import pricefill
+
+
+def gappy_frame(i_dates=200, i_symbols=25, i_seed=0):
+    """
+    :return: a dates x symbols price dataframe with scattered gaps, symbols that list late,
+             symbols that stop trading early and one symbol with no price at all
+    """
+    rng = np.random.RandomState(i_seed)
+    na_values = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, (i_dates, i_symbols)), axis=0))
+    na_values[rng.rand(i_dates, i_symbols) < 0.05] = np.NAN
+    for j in range(0, i_symbols, 4):
+        na_values[:rng.randint(1, i_dates), j] = np.NAN
+    for j in range(1, i_symbols, 5):
+        na_values[rng.randint(1, i_dates):, j] = np.NAN
+    na_values[:, 2] = np.NAN
+    index = pd.bdate_range('2008-01-01', periods=i_dates)
+    return pd.DataFrame(na_values, index=index, columns=['S%02d' % j for j in range(i_symbols)])
+
+
+def fillna_chain(df, f_fill=1.0):
+    return df.fillna(method='ffill').fillna(method='bfill').fillna(f_fill)
+
+
+class FillTest(unittest.TestCase):
+
+    def test_frame_matches_fillna(self):
+        for i_seed in range(3):
+            df = gappy_frame(i_seed=i_seed)
+            df_expected = fillna_chain(df)
+            d_data = {'close': df.copy()}
+            pricefill.fill_frames(d_data, ['close'])
+            self.assertTrue(d_data['close'].index.equals(df.index))
+            self.assertTrue(d_data['close'].columns.equals(df.columns))
+            np.testing.assert_array_equal(d_data['close'].values, df_expected.values)
+
+    def test_frames_match_fillna(self):
+        ls_keys = ['open', 'close', 'volume']
+        d_data = dict((s_key, gappy_frame(i_seed=k)) for k, s_key in enumerate(ls_keys))
+        d_expected = dict((s_key, fillna_chain(df, 0.5)) for s_key, df in d_data.items())
+        d_gaps = dict((s_key, np.isnan(df.values)) for s_key, df in d_data.items())
+        d_stats = pricefill.fill_frames(d_data, ls_keys, 0.5)
+        for s_key in ls_keys:
+            np.testing.assert_array_equal(d_data[s_key].values, d_expected[s_key].values)
+            na_gaps = d_gaps[s_key]
+            np.testing.assert_array_equal(d_stats['missing'][s_key].values, na_gaps.sum(axis=0))
+            np.testing.assert_array_equal(d_stats['empty'][s_key].values, na_gaps.all(axis=0))
+            na_leading = np.where(na_gaps.all(axis=0), len(na_gaps), np.argmin(na_gaps, axis=0))
+            np.testing.assert_array_equal(d_stats['leading'][s_key].values, na_leading)
+
+        df_summary = pricefill.summarize_gaps(d_stats)
+        self.assertEqual(list(df_summary.index), ls_keys)
+        for s_key in ls_keys:
+            na_gaps = d_gaps[s_key]
+            self.assertEqual(df_summary['symbols'][s_key], na_gaps.any(axis=0).sum())
+            self.assertEqual(df_summary['missing'][s_key], na_gaps.sum())
+            self.assertEqual(df_summary['empty'][s_key], na_gaps.all(axis=0).sum())
+
+    def test_float32(self):
+        df = gappy_frame()
+        d_data = {'close': df.copy()}
+        pricefill.fill_frames(d_data, ['close'], dtype=np.float32)
+        self.assertEqual(d_data['close'].values.dtype, np.float32)
+        np.testing.assert_array_equal(d_data['close'].values, fillna_chain(df).values.astype(np.float32))
+
+    def test_no_dates(self):
+        df = gappy_frame().iloc[:0]
+        d_data = {'close': df}
+        d_stats = pricefill.fill_frames(d_data, ['close'])
+        self.assertEqual(d_data['close'].shape, df.shape)
+        self.assertEqual(d_stats['missing']['close'].sum(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
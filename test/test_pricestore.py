@@ -0,0 +1,109 @@
+#-------------------------------------------------------------------------------
+# Name:        test_pricestore.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that the local price store serves what DataAccess would, however it was
+# filled:
+#
+#   python test_pricestore.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+from pricestore import PriceStore
+
+
+class FakeData:
+    """
+    Stands in for a QSTK DataAccess object: every (date, symbol, field) has a fixed value,
+    a few of them missing, and each call is recorded.
+    """
+
+    def __init__(self):
+        self.l_calls = []
+
+    def value(self, ldt_timestamps, ls_symbols, s_key):
+        na_days = pd.DatetimeIndex(ldt_timestamps).asi8[:, np.newaxis] // (86400 * 10 ** 9)
+        na_syms = np.array([hash(s) % 1000 for s in ls_symbols])[np.newaxis, :]
+        na_values = (na_days % 97) + na_syms / 1000.0 + len(s_key)
+        na_values[(na_days + na_syms) % 31 == 0] = np.NAN
+        return pd.DataFrame(na_values, index=ldt_timestamps, columns=ls_symbols)
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        self.l_calls.append((len(ldt_timestamps), list(ls_symbols), list(ls_keys)))
+        return [self.value(ldt_timestamps, ls_symbols, s_key) for s_key in ls_keys]
+
+
+def days(s_start, i_days):
+    return list(pd.bdate_range(s_start, periods=i_days) + dt.timedelta(hours=16))
+
+
+class PriceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s_path = tempfile.mkdtemp()
+        self.dataobj = FakeData()
+
+    def tearDown(self):
+        shutil.rmtree(self.s_path)
+
+    def check(self, store, ldt_timestamps, ls_symbols, ls_keys):
+        ldf_data = store.get_data(ldt_timestamps, ls_symbols, ls_keys)
+        for s_key, df in zip(ls_keys, ldf_data):
+            df_expected = self.dataobj.value(ldt_timestamps, ls_symbols, s_key)
+            self.assertTrue(df.index.equals(df_expected.index))
+            self.assertEqual(list(df.columns), ls_symbols)
+            np.testing.assert_array_equal(df.values, df_expected.values)
+
+    def test_grows_symbols_fields_and_dates(self):
+        ldt_first = days('2008-01-01', 120)
+        store = PriceStore(self.s_path)
+        store.update(self.dataobj, ldt_first, ['AAA', 'BBB'], ['close'])
+        self.check(store, ldt_first, ['AAA', 'BBB'], ['close'])
+
+        # new symbols and fields are read for the stored dates only
+        store.update(self.dataobj, ldt_first, ['BBB', 'CCC', 'DDD'], ['close', 'volume'])
+        self.assertEqual(self.dataobj.l_calls[1:], [(120, ['AAA', 'BBB'], ['volume']),
+                                                    (120, ['CCC', 'DDD'], ['close', 'volume'])])
+        self.check(store, ldt_first, ['DDD', 'AAA', 'CCC'], ['volume', 'close'])
+
+        # later dates rebuild the store over the union
+        ldt_all = days('2008-01-01', 200)
+        store.update(self.dataobj, ldt_all[100:], ['AAA'], ['close'])
+        self.check(store, ldt_all, ['AAA', 'BBB', 'CCC', 'DDD'], ['close', 'volume'])
+
+    def test_reopened_store_needs_no_reads(self):
+        ldt_timestamps = days('2009-03-02', 60)
+        PriceStore(self.s_path).update(self.dataobj, ldt_timestamps, ['AAA', 'BBB', 'CCC'], ['close'])
+        i_calls = len(self.dataobj.l_calls)
+        store = PriceStore(self.s_path)
+        store.update(self.dataobj, ldt_timestamps[10:40], ['CCC', 'AAA'], ['close'])
+        self.assertEqual(len(self.dataobj.l_calls), i_calls)
+        self.check(store, ldt_timestamps[10:40], ['CCC', 'AAA'], ['close'])
+
+    def test_contiguous_request_is_a_view(self):
+        ldt_timestamps = days('2009-03-02', 60)
+        store = PriceStore(self.s_path)
+        store.update(self.dataobj, ldt_timestamps, ['AAA', 'BBB', 'CCC'], ['close'])
+        df = store.get_data(ldt_timestamps[5:50], ['BBB', 'CCC'], ['close'])[0]
+        self.assertTrue(np.may_share_memory(df.values, store.array('close')))
+
+    def test_missing_symbol_raises(self):
+        store = PriceStore(self.s_path)
+        store.update(self.dataobj, days('2009-03-02', 10), ['AAA'], ['close'])
+        self.assertRaises(KeyError, store.get_data, days('2009-03-02', 10), ['ZZZ'], ['close'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#-------------------------------------------------------------------------------
+# Name:        test_profiling.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks that the stage timers report nested spans and leave the results of
+# the stages they wrap unchanged:
+#
+#   python test_profiling.py          or          python -m unittest discover test
+
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import datasession
+import eventprofiler
+import marketsim
+import profiling
+from test_predicates import random_data
+from test_sweep import FrameData
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled_spans_record_nothing(self):
+        self.assertTrue(profiling.span('a') is profiling.span('b'))
+        with profiling.span('a'):
+            pass
+        self.assertEqual(profiling.report(), [])
+
+    def test_nested_spans(self):
+        profiling.enable()
+
+        @profiling.timed()
+        def stage():
+            with profiling.span('inner'):
+                pass
+
+        with profiling.span('outer'):
+            stage()
+            stage()
+        d_report = dict((d['span'], d) for d in profiling.report())
+        self.assertEqual(sorted(d_report), ['outer', 'outer;stage', 'outer;stage;inner'])
+        self.assertEqual(d_report['outer;stage']['calls'], 2)
+        self.assertTrue(d_report['outer']['self_seconds'] <= d_report['outer']['seconds'])
+        self.assertEqual(profiling.over_budget({'outer': -1.0, 'outer;stage': 1e6})[0][0], 'outer')
+
+    def test_memory_figures(self):
+        profiling.enable(b_memory=True)
+        with profiling.span('grow'):
+            ls_block = [0] * 1000000
+        d_span = profiling.report()[0]
+        self.assertTrue(d_span['process_peak_rss_kb'] > 0)
+        self.assertTrue(d_span['process_peak_growth_kb'] >= 0)
+
+    def test_no_memory_figures_without_resource(self):
+        old_resource = profiling.resource
+        profiling.resource = None
+        try:
+            profiling.enable(b_memory=True)
+            with profiling.span('a'):
+                pass
+        finally:
+            profiling.resource = old_resource
+        self.assertEqual(sorted(profiling.report()[0]), ['calls', 'seconds', 'self_seconds', 'span'])
+
+    def test_results_unchanged(self):
+        d_random = random_data(i_dates=200, i_symbols=15)
+        d_data = {'actual_close': d_random['actual_close'], 'close': d_random['actual_close'] * 1.1}
+        old_session = datasession._session
+        s_dir = tempfile.mkdtemp()
+        try:
+            datasession.set_session(datasession.DataSession(FrameData(d_data)))
+            df_events = eventprofiler.five_dollar_event(list(d_data['close'].columns), d_data, 'SPY')
+            s_orders = os.path.join(s_dir, 'orders.csv')
+            eventprofiler.transactions_from_eventmatrix(df_events).to_csv(s_orders, header=False, index=False)
+
+            plain = marketsim.portfolio_from_orders(s_orders, 50000)
+            profiling.enable(b_memory=True)
+            timed = marketsim.portfolio_from_orders(s_orders, 50000)
+            self.assertTrue(len(profiling.report()) > 0)
+            self.assertTrue(timed.index.equals(plain.index))
+            np.testing.assert_array_equal(timed['value'].values, plain['value'].values)
+
+            profiling.write_report(os.path.join(s_dir, 'profile'))
+            with open(os.path.join(s_dir, 'profile.folded')) as f:
+                self.assertEqual(len(f.readlines()), len(profiling.report()))
+        finally:
+            datasession.set_session(old_session)
+            shutil.rmtree(s_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#-------------------------------------------------------------------------------
+# Name:        test_sweep.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks every row of the parallel sweep against the full pipeline run for that
+# grid point: event matrix, orders file, marketsim portfolio and its statistics:
+#
+#   python test_sweep.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import QSTK.qstkutil.tsutil as tsu
+import datasession
+import eventprofiler
+import marketsim
+import predicates
+import sweep
+from test_predicates import random_data
+
+
+class FrameData:
+    """
+    Stands in for a QSTK DataAccess object over a dict of dataframes.
+    """
+
+    def __init__(self, d_frames):
+        self.d_frames = d_frames
+
+    def get_all_symbols(self):
+        return list(self.d_frames['close'].columns)
+
+    def get_data(self, ldt_timestamps, ls_symbols, ls_keys):
+        return [self.d_frames[s_key].reindex(index=ldt_timestamps, columns=ls_symbols) for s_key in ls_keys]
+
+
+def pipeline_statistics(d_data, ls_symbols, benchmark, d_point, starting_cash, s_orders):
+    """
+    :return: the row sweep should produce for one grid point, run through the full pipeline
+    """
+    na_mask = predicates.PriceCrossBelow(d_point['f_price']).evaluate(
+        predicates.EventData(ls_symbols, d_data, benchmark))
+    df_events = pd.DataFrame(np.where(na_mask, 1, np.NAN), index=d_data['actual_close'].index, columns=ls_symbols)
+    d_result = dict(d_point)
+    d_result['events'] = int(na_mask.sum())
+    if d_result['events'] == 0:
+        return d_result
+
+    transactions = eventprofiler.transactions_from_eventmatrix(df_events, d_point['i_hold'], d_point['i_shares'],
+                                                               d_point['s_side'])
+    transactions.to_csv(s_orders, header=False, index=False)
+    portfolio = marketsim.portfolio_from_orders(s_orders, starting_cash)
+
+    # the fund statistics of compare_portfolio_to_benchmark
+    value_norm = portfolio['value'] / float(portfolio['value'][0])
+    rets_norm = value_norm.copy()
+    tsu.returnize0(rets_norm)
+    d_result['volatility'] = rets_norm.std()
+    d_result['avg_daily_ret'] = rets_norm.mean()
+    d_result['sharpe'] = np.sqrt(252) * d_result['avg_daily_ret'] / d_result['volatility']
+    d_result['total_return'] = value_norm[-1]
+    return d_result
+
+
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        d_random = random_data(i_dates=250, i_symbols=20)
+        df_close = d_random['actual_close'] * 1.1
+        self.d_data = {'actual_close': d_random['actual_close'].copy(), 'close': df_close}
+        eventprofiler.remove_nan(self.d_data, ['actual_close'])
+        self.ls_symbols = list(df_close.columns)
+        self.s_dir = tempfile.mkdtemp()
+        self.old_session = datasession.get_session() if datasession._session is not None else None
+        datasession.set_session(datasession.DataSession(FrameData(self.d_data)))
+
+    def tearDown(self):
+        datasession.set_session(self.old_session)
+        shutil.rmtree(self.s_dir)
+
+    def test_matches_full_pipeline(self):
+        d_grid = {'f_price': [3.0, 5.0, 6.0],
+                  'i_hold': [1, 5, 20],
+                  'i_shares': [100, 350],
+                  's_side': ['Buy', 'Sell']}
+        results = sweep.sweep(self.d_data, self.ls_symbols, 'SPY', d_grid, 50000, i_processes=2)
+        self.assertEqual(len(results), 36)
+        s_orders = os.path.join(self.s_dir, 'orders.csv')
+        for i, row in results.iterrows():
+            d_point = dict((k, row[k]) for k in sorted(d_grid))
+            d_expected = pipeline_statistics(self.d_data, self.ls_symbols, 'SPY', d_point, 50000, s_orders)
+            self.assertEqual(row['events'], d_expected['events'])
+            self.assertTrue(d_expected['events'] > 0)
+            for s_stat in ['sharpe', 'volatility', 'avg_daily_ret', 'total_return']:
+                np.testing.assert_allclose(row[s_stat], d_expected[s_stat], rtol=1e-9, err_msg=s_stat)
+
+    def test_no_events(self):
+        results = sweep.sweep(self.d_data, self.ls_symbols, 'SPY', {'f_price': [0.01], 'i_hold': [5],
+                                                                    'i_shares': [100]}, i_processes=1)
+        self.assertEqual(results['events'].tolist(), [0])
+        self.assertTrue(np.isnan(results['sharpe'][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#-------------------------------------------------------------------------------
+# Name:        test_tradingcalendar.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the cached trading calendar against getNYSEdays and index lookups:
+#
+#   python test_tradingcalendar.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import os
+import sys
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import QSTK.qstkutil.qsdateutil as du
+import tradingcalendar
+
+
+def holiday_days():
+    # business days less a few scattered holidays
+    days = pd.bdate_range('2008-01-01', '2010-12-31')
+    return days[np.arange(len(days)) % 37 != 5]
+
+
+def loop_days(ldt_days, startdate, enddate, timeofday):
+    # the filter getNYSEdays applies
+    return [d + timeofday for d in ldt_days if startdate <= d + timeofday <= enddate]
+
+
+class TradingCalendarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ldt_days = holiday_days()
+        self.calendar = tradingcalendar.TradingCalendar(self.ldt_days)
+
+    def test_days_match_filter(self):
+        rng = np.random.RandomState(0)
+        for i in range(100):
+            startdate = dt.datetime(2007, 12, 1) + dt.timedelta(days=rng.randint(0, 1200), hours=rng.randint(0, 24))
+            enddate = startdate + dt.timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 24))
+            for timeofday in [dt.timedelta(0), tradingcalendar.CLOSE, dt.timedelta(hours=9, minutes=30)]:
+                self.assertEqual(list(self.calendar.days(startdate, enddate, timeofday)),
+                                 loop_days(self.ldt_days, startdate, enddate, timeofday))
+
+    def test_positions_match_index(self):
+        dates = pd.date_range('2007-12-01', '2011-02-01', freq='7H')
+        na_expected = self.ldt_days.get_indexer(dates.normalize())
+        np.testing.assert_array_equal(self.calendar.positions(dates), na_expected)
+        for date in dates[::50]:
+            self.assertEqual(self.calendar.position(date), self.ldt_days.get_indexer([date.normalize()])[0])
+        na_in = na_expected >= 0
+        self.assertTrue(self.calendar.dates(na_expected[na_in]).equals(dates[na_in].normalize()))
+        self.assertTrue(self.calendar.dates(na_expected[na_in], tradingcalendar.CLOSE).equals(
+            dates[na_in].normalize() + tradingcalendar.CLOSE))
+
+    def test_process_calendar_matches_getnysedays(self):
+        tradingcalendar.set_calendar(None)
+        try:
+            calendar = tradingcalendar.get_calendar()
+            self.assertTrue(calendar is tradingcalendar.get_calendar())
+            startdate, enddate = dt.datetime(2008, 1, 1), dt.datetime(2009, 12, 31)
+            self.assertEqual(list(calendar.days(startdate, enddate, tradingcalendar.CLOSE)),
+                             list(du.getNYSEdays(startdate, enddate, tradingcalendar.CLOSE)))
+        finally:
+            tradingcalendar.set_calendar(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
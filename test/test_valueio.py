@@ -0,0 +1,111 @@
+#-------------------------------------------------------------------------------
+# Name:        test_valueio.py
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+#
+# Checks the bulk value readers and writers against the row by row loops they
+# replaced:
+#
+#   python test_valueio.py          or          python -m unittest discover test
+
+import numpy as np
+import pandas as pd
+import datetime as dt
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'src'))
+
+import valueio
+
+
+def loop_write(portfolio, filename):
+    # the iterrows loop write_portfolio_to_csv_file used
+    with open(filename, 'w') as f:
+        for i, s in portfolio.iterrows():
+            f.write('%d,%d,%d,%d\n' % (i.year, i.month, i.day, int(s['value'])))
+
+
+def loop_read(filename):
+    # the csv.reader loop hw3_analyze used
+    dates_arr = []
+    values_arr = []
+    with open(filename, 'rb') as f:
+        for row in csv.reader(f):
+            dates_arr.append(dt.datetime(int(row[0]), int(row[1]), int(row[2])) + dt.timedelta(hours=16))
+            values_arr.append(int(row[3]))
+    return pd.DataFrame(values_arr, index=dates_arr, columns=['value'])
+
+
+def random_portfolio(i_days=3000, i_seed=0):
+    rng = np.random.RandomState(i_seed)
+    index = pd.bdate_range('1995-01-02', periods=i_days)
+    return pd.DataFrame(1e6 * np.exp(np.cumsum(rng.normal(0, 0.01, i_days))), index=index, columns=['value'])
+
+
+class ValueIOTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.s_dir)
+
+    def path(self, s_name):
+        return os.path.join(self.s_dir, s_name)
+
+    def test_write_matches_loop(self):
+        portfolio = random_portfolio()
+        loop_write(portfolio, self.path('loop.csv'))
+        valueio.write_values(portfolio, self.path('bulk.csv'), i_chunk_rows=777)
+        with open(self.path('loop.csv')) as f_loop:
+            with open(self.path('bulk.csv')) as f_bulk:
+                self.assertEqual(f_bulk.read(), f_loop.read())
+
+    def test_read_matches_loop(self):
+        loop_write(random_portfolio(), self.path('values.csv'))
+        for s_file in [os.path.join(TEST_DIR, '..', 'hw', 'values.csv'), self.path('values.csv')]:
+            df_expected = loop_read(s_file)
+            for i_chunk_bytes in [10, 4096, 16 * 1024 * 1024]:
+                df = valueio.read_values_csv(s_file, i_chunk_bytes=i_chunk_bytes)
+                self.assertTrue(df.index.equals(df_expected.index))
+                np.testing.assert_array_equal(df['value'].values, df_expected['value'].values)
+
+    def test_split_dates(self):
+        dates = pd.date_range('1899-12-25', '2101-01-05', freq='13D')
+        na_year, na_month, na_day = valueio.split_dates(dates)
+        np.testing.assert_array_equal(na_year, dates.year)
+        np.testing.assert_array_equal(na_month, dates.month)
+        np.testing.assert_array_equal(na_day, dates.day)
+
+    def test_several_portfolios(self):
+        portfolio = pd.concat([random_portfolio(i_seed=i)['value'] for i in range(3)], axis=1)
+        portfolio.columns = range(3)
+        valueio.write_values(portfolio, self.path('values.csv'))
+        df = valueio.read_values(self.path('values.csv'))
+        np.testing.assert_array_equal(df.values, portfolio.values.astype(np.int64))
+        self.assertEqual(list(df.columns), [0, 1, 2])
+
+    def test_binary_round_trip(self):
+        portfolio = random_portfolio()
+        portfolio['other'] = portfolio['value'] / 3
+        valueio.save_values(portfolio, self.path('values.npz'))
+        df = valueio.read_values(self.path('values.npz'))
+        self.assertTrue(df.index.equals(portfolio.index))
+        self.assertEqual(list(df.columns), ['value', 'other'])
+        np.testing.assert_array_equal(df.values, portfolio.values)
+
+    def test_nan_raises(self):
+        portfolio = random_portfolio(10)
+        portfolio.iloc[3, 0] = np.NAN
+        self.assertRaises(ValueError, valueio.write_values, portfolio, self.path('values.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()